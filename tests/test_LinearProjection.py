@@ -4,7 +4,6 @@ from yroots.polynomial import Polynomial, MultiCheb, MultiPower, getPoly
 from yroots.MacaulayReduce import find_degree, mon_combos
 from yroots import polyroots as pr
 from yroots.utils import InstabilityWarning, arrays
-from yroots.Multiplication import create_matrix
 from itertools import product
 import unittest
 import warnings
@@ -1,12 +1,16 @@
 import numpy as np
 from yroots.polynomial import Polynomial, MultiCheb, MultiPower, getPoly
-from yroots.MacaulayReduce import find_degree, mon_combos
+from yroots.MacaulayReduce import find_degree, mon_combos, add_polys, triangular_cond, \
+                                  reduce_macaulay_svd, reduce_macaulay_sparse
 from yroots import polyroots as pr
-from yroots.utils import InstabilityWarning, arrays
-from yroots.Multiplication import create_matrix
+from yroots.utils import InstabilityWarning, ConditioningError, arrays, row_swap_matrix, slice_top
+from yroots.Resultant import bezout_matrix_poly
+from yroots.Multiplication import build_macaulay, multiplication, multiplication_batch, msroots, msroots_batch, msroots_in_box, \
+                                indexarray, indexarray_cheb, sorted_matrix_terms
 from itertools import product
 import unittest
 import warnings
+from numpy.polynomial import chebyshev as cheb
 import yroots.subdivision as sbd
 
 def test_paper_example():
@@ -348,5 +352,218 @@ def test_div_cheb_roots():
     C = getPoly(5,3,False)
     correctZeros([A,B,C], -1)
 
+def test_scatter_macaulay():
+    np.random.seed(4)
+    for deg, dim in [(2,2), (5,2), (3,3), (2,4)]:
+        for power in [True, False]:
+            polys = [getPoly(deg, dim, power) for i in range(dim)]
+            degree = find_degree(polys)
+            poly_coeff_list = []
+            for poly in polys:
+                add_polys(degree, poly, poly_coeff_list)
+            scattered, matrix_terms, cut = build_macaulay(polys)
+            assert np.array_equal(matrix_terms, sorted_matrix_terms(degree, dim)[0])
+            assert cut == sorted_matrix_terms(degree, dim)[1]
+            # Each row is one of the monomial multiples, read off at matrix_terms
+            rows = []
+            for coeff in poly_coeff_list:
+                padded = np.zeros([degree+1]*dim)
+                padded[slice_top(coeff.shape)] = coeff
+                rows.append(padded[tuple(matrix_terms.T)])
+            assert np.allclose(row_swap_matrix(np.array(rows)), scattered, rtol=0, atol=1.e-14)
+
+def test_sparse_macaulay():
+    np.random.seed(3)
+    for deg, dim in [(5,2), (4,3)]:
+        for power in [True, False]:
+            polys = [getPoly(deg, dim, power) for i in range(dim)]
+            matrix, matrix_terms, cut = build_macaulay(polys)
+            sparse_matrix, sparse_terms, sparse_cut = build_macaulay(polys, sparse=True)
+            assert np.allclose(matrix, sparse_matrix.toarray(), rtol=0, atol=1.e-14)
+            assert np.array_equal(matrix_terms, sparse_terms)
+            assert cut == sparse_cut
+            # The condition number estimate is within sqrt(cut) of the 2-norm one
+            cond = np.linalg.cond(matrix[:,:cut])
+            E, msg = reduce_macaulay_sparse(sparse_matrix, cut, deg**dim, max_cond=1.)
+            assert E is None
+            assert cond/np.sqrt(cut) <= float(msg.split()[-1]) <= cond*np.sqrt(cut)
+            # The dense reductions estimate the same 2-norm condition number
+            E, msg = reduce_macaulay_svd(matrix.copy(), cut, deg**dim, max_cond=1.)
+            assert E is None
+            assert cond/4 <= float(msg.split()[-1]) <= 4*cond
+            # Both reductions give the same map from the lower-degree columns to the quotient basis
+            E, Q = reduce_macaulay_svd(matrix.copy(), cut, deg**dim)
+            sparse_E, sparse_Q = reduce_macaulay_sparse(sparse_matrix, cut, deg**dim)
+            assert np.allclose(sparse_E @ sparse_Q.T, E @ Q.T, rtol=0, atol=1.e-12*np.max(np.abs(E @ Q.T)))
+
+        roots = multiplication(polys, 1.e10)
+        sparse_roots = multiplication(polys, 1.e10, method='sparse')
+        assert len(sparse_roots) == len(roots) == deg**dim
+        for root in sparse_roots:
+            assert np.min(np.linalg.norm(roots - root, axis=1)) < 1.e-8
+            for poly in polys:
+                assert np.isclose(0, poly(root), atol=1.e-8)
+
+def test_indexarray():
+    for degree, dim in [(5,2), (4,3)]:
+        matrix_terms, cut = sorted_matrix_terms(degree, dim)
+        lower = matrix_terms[cut:]
+        for var in range(dim):
+            shift = np.eye(dim, dtype=int)[var]
+            assert np.array_equal(matrix_terms[indexarray(matrix_terms, cut, var)], lower + shift)
+            up, down = indexarray_cheb(matrix_terms, cut, var)
+            assert np.array_equal(matrix_terms[up], lower + shift)
+            assert np.array_equal(matrix_terms[down], np.abs(lower - shift))
+            # The memoized arrays can't be changed by a caller
+            assert not any(arr.flags.writeable for arr in (indexarray(matrix_terms, cut, var), up, down))
+
+def test_macaulay_diagnostics():
+    np.random.seed(6)
+    R = np.triu(np.random.randn(20,20))
+    R[3,3] = 1.e-9
+    assert np.isclose(triangular_cond(R), np.linalg.cond(R, 1)/np.sqrt(20), rtol=.1)
+    assert triangular_cond(np.triu(np.ones((4,4))) - np.eye(4)) == np.inf
+
+    #The rank is only checked on request
+    poly = getPoly(3, 2, False)
+    polys = [poly, MultiCheb(2*poly.coeff)]
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        multiplication(polys, 1.e10)
+    with warnings.catch_warnings(record=True) as w:
+        warnings.simplefilter("always")
+        multiplication(polys, 1.e10, check_rank=True)
+        assert any("Bezout bound" in str(warning.message) for warning in w)
+
+def test_multiplication_batch():
+    np.random.seed(8)
+    systems = [[getPoly(3, 2, False), getPoly(2, 2, False)] for i in range(10)]
+    stacks = [np.array([system[i].coeff for system in systems]) for i in range(2)]
+    roots, conds = multiplication_batch(stacks, 1.e10)
+    for system, system_roots, system_conds in zip(systems, roots, conds):
+        single_roots, single_conds = multiplication(system, 1.e10, return_conds=True)
+        assert len(system_roots) == len(system_conds) == 6
+        for root, cond in zip(system_roots, system_conds):
+            spot = np.argmin(np.linalg.norm(single_roots - root, axis=1))
+            assert np.allclose(root, single_roots[spot])
+            assert np.isclose(cond, single_conds[spot], rtol=1.e-4)
+
+    #The batch rejects the same systems as multiplication at any max_cond_num
+    single_conds = [float(multiplication(system, 1., return_conds=True)[1].split()[-1]) for system in systems]
+    max_cond = np.median(single_conds)
+    roots, conds = multiplication_batch(stacks, max_cond)
+    for system_roots, single_cond in zip(roots, single_conds):
+        assert (system_roots is None) == (single_cond > max_cond)
+
+    #Systems with roots at infinity are too ill conditioned and are None
+    stacks[1][3][[2,1,0],[0,1,2]] = 0
+    roots, conds = multiplication_batch(stacks, 1.e10)
+    assert roots[3] is None and conds[3] is None
+    assert roots[2] is not None
+
+def test_msroots():
+    np.random.seed(12)
+    roots = np.random.randn(15, 3)
+    X = np.random.randn(15, 15)
+    M = np.stack([X@np.diag(roots[:,i])@np.linalg.inv(X) for i in range(3)], axis=-1)
+    found, conds = msroots(M, return_conds=True)
+    assert found.shape == roots.shape and conds.shape == (15,)
+    for root in roots:
+        assert np.min(np.linalg.norm(found - root, axis=1)) < 1.e-10
+
+    #At a double root the eigenvectors are defective, so the batch solves that system with msroots
+    double = roots.copy()
+    double[1] = double[0]
+    J = [np.diag(double[:,i]) for i in range(3)]
+    for i in range(3):
+        J[i][0,1] = i + 1.
+    M_double = np.stack([X@J[i]@np.linalg.inv(X) for i in range(3)], axis=-1)
+    found, conds = msroots_batch(np.array([M, M_double]))
+    assert found.shape == (2, 15, 3) and conds.shape == (2, 15)
+    for root in roots:
+        assert np.min(np.linalg.norm(found[0] - root, axis=1)) < 1.e-10
+    single, single_conds = msroots(M_double, return_conds=True)
+    assert np.array_equal(found[1], single) and np.array_equal(conds[1], single_conds)
+    for root in double:
+        assert np.min(np.linalg.norm(found[1] - root, axis=1)) < 1.e-6
+
 if __name__ == "__main__":
     test_div_power_roots()
+
+def test_resultant():
+    np.random.seed(12)
+    for deg in [2, 5, 9]:
+        polys = [getPoly(deg, 2, False) for i in range(2)]
+        zeros = pr.solve(polys, method='resultant')
+        assert len(zeros) == deg**2
+        in_box = zeros[np.all(np.abs(zeros) <= 1, axis=1)]
+        for poly in polys:
+            assert np.allclose(poly(in_box), 0, atol=1.e-10)
+        mult_zeros = pr.solve(polys)
+        for zero in mult_zeros[np.all(np.abs(mult_zeros) < 1, axis=1)]:
+            assert np.min(np.linalg.norm(zeros - zero, axis=1)) < 1.e-8
+
+    #Two roots share each y, so the null space of B(y) there is 2 dimensional
+    c1 = np.array([[-.5, 0, 1], [0, 0, 0], [1, 0, 0]])
+    c2 = np.array([[0, 1, 0], [0, 0, 0], [-1, 0, 0]])
+    polys = [MultiPower(c1), MultiPower(c2)]
+    zeros = pr.solve(polys, method='resultant')
+    x0, y0 = np.sqrt((np.sqrt(3)-1)/2), (np.sqrt(3)-1)/2
+    assert len(zeros) == 4
+    assert np.allclose(sorted(zeros[np.abs(zeros[:,1] - y0) < 1.e-8,0].real), [-x0, x0])
+    for poly in polys:
+        assert np.allclose(poly(zeros), 0, atol=1.e-12)
+
+    #A root where the Jacobian is singular is too ill conditioned
+    polys = [MultiPower(np.array([[0, 1], [0, 0], [-1, 0]])), MultiPower(np.array([[0, 1], [0, 0], [1, 0]]))]
+    with np.testing.assert_raises(ConditioningError):
+        pr.solve(polys, method='resultant')
+
+    #(f(s)g(t) - f(t)g(s))/(s - t) = sum B[i,j](y) T_i(s) T_j(t)
+    c1, c2 = getPoly(4, 2, False).coeff, getPoly(4, 2, False).coeff
+    B = bezout_matrix_poly(c1, c2)
+    s, t, y = .3, -.7, .45
+    f = lambda x: cheb.chebval2d(x, y, c1)
+    g = lambda x: cheb.chebval2d(x, y, c2)
+    By = np.einsum('kij,k->ij', B, cheb.chebvander(y, len(B)-1)[0])
+    lhs = (f(s)*g(t) - f(t)*g(s))/(s - t)
+    assert np.isclose(lhs, cheb.chebvander(s, 3)[0] @ By @ cheb.chebvander(t, 3)[0])
+
+def test_msroots_in_box():
+    #Commuting matrices with known roots, few of them in the box
+    np.random.seed(4)
+    n = 150
+    roots = np.random.uniform(-6, 6, (n,2))
+    roots[:8] = np.random.uniform(-.9, .9, (8,2))
+    V = np.random.randn(n, n)
+    M = np.stack([V@np.diag(roots[:,i])@np.linalg.inv(V) for i in range(2)], axis=-1)
+    zeros = msroots_in_box(M)
+    assert len(zeros) < n/2
+    zeros = zeros[np.all(np.abs(zeros) <= 1, axis=1)]
+    box_roots = roots[np.all(np.abs(roots) <= 1, axis=1)]
+    assert len(zeros) == len(box_roots)
+    for zero in box_roots:
+        assert np.min(np.linalg.norm(zeros - zero, axis=1)) < 1.e-8
+    zeros, conds = msroots(M, return_conds=True, in_box=True)
+    assert np.all(np.isnan(conds))
+
+    #A root at the origin doesn't make the shifted matrix singular
+    roots[0] = 0
+    M = np.stack([V@np.diag(roots[:,i])@np.linalg.inv(V) for i in range(2)], axis=-1)
+    zeros = msroots_in_box(M)
+    for zero in roots[np.all(np.abs(roots) <= 1, axis=1)]:
+        assert np.min(np.linalg.norm(zeros - zero, axis=1)) < 1.e-8
+
+    #Inaccurate eigenvectors fall back to finding all the eigenvalues
+    assert msroots_in_box(M, residual_tol=0) is None
+
+    #Too small for Arnoldi, so it finds all the eigenvalues
+    assert msroots_in_box(M[:10,:10]) is None
+    assert len(msroots(M[:10,:10], in_box=True)) == 10
+
+    polys = [getPoly(6, 2, True) for i in range(2)]
+    zeros = pr.solve(polys, return_all_roots=False)
+    box_zeros = pr.solve(polys, in_box=True)
+    assert len(zeros) == len(box_zeros)
+    for zero in zeros:
+        assert np.min(np.linalg.norm(box_zeros - zero, axis=1)) < 1.e-8
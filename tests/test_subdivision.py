@@ -2,7 +2,9 @@ import unittest
 import numpy as np
 from yroots.polynomial import Polynomial, MultiCheb, MultiPower, getPoly
 from yroots import subdivision as subdiv
+from yroots.RootTracker import RootTracker, BoxGrid, PointGrid, rootInBox, merge_boxes
 from itertools import product
+from numpy.polynomial import chebyshev as cheb
 
 def correctZeros(polys, a, b):
     '''
@@ -233,3 +235,398 @@ def test_copy_block():
         idx2 = idx.copy()
         idx2[i] = slice(2*deg-1,deg,-1)
         assert np.all(values[tuple(idx1)] == values[tuple(idx2)])
+
+def test_root_tracker():
+    root_tracker = RootTracker()
+    a, b = -np.ones(2), np.ones(2)
+    root_tracker.add_roots(np.array([[0., 0.], [.5, .5]]), a, b, "Macaulay")
+    root_tracker.add_roots(np.array([[.5, -.5]]), np.zeros(2), np.ones(2), "Base Case")
+    root_tracker.add_potential_roots((a + b)/2, a, b, "Too Deep.")
+    assert root_tracker.roots.shape == (2, 2)
+    assert root_tracker.potential_roots.shape == (1, 2)
+    assert root_tracker.methods == ["Macaulay", "Macaulay", "Too Deep."]
+    #The root outside its interval is in one of the other intervals so it is a duplicate
+    assert len(root_tracker.possible_duplicates) == 0
+
+    root_tracker.add_roots(np.array([[2., 2.]]), np.zeros(2), np.ones(2), "Base Case")
+    root_tracker.keep_possible_duplicates()
+    assert np.all(root_tracker.roots[-1] == [2., 2.])
+    #[0,1]x[0,1] is inside [-1,1]x[-1,1] so they are merged
+    assert len(root_tracker.get_polish_intervals()) == 1
+    assert len(root_tracker.roots) == 0
+
+    #One dimensional roots are stored in a flat array
+    root_tracker = RootTracker()
+    for i in range(40):
+        root_tracker.add_roots(np.array([i + .5]), float(i), float(i + 1), "Macaulay")
+    assert np.all(root_tracker.roots == np.arange(40) + .5)
+    assert root_tracker.intervals.shape == (40, 2)
+
+def test_root_tracker_grids():
+    np.random.seed(0)
+    boxes = []
+    for _ in range(50):
+        a = np.random.rand(2)*4 - 2
+        boxes.append((a, a + np.random.rand(2)*2.**-np.random.randint(8)))
+    box_grid = BoxGrid()
+    for a, b in boxes:
+        box_grid.add(a, b)
+    points = np.random.rand(500, 2)*4 - 2
+    for point in points:
+        assert box_grid.contains(point) == any(rootInBox(point, a, b) for a, b in boxes)
+
+    point_grid = PointGrid()
+    for i, point in enumerate(points):
+        point_grid.add(point, i)
+    remaining = set(range(len(points)))
+    for a, b in boxes:
+        removed = point_grid.pop_in_box(a, b)
+        assert set(removed) == set(i for i in remaining if rootInBox(points[i], a, b))
+        remaining -= set(removed)
+    assert set(point_grid.values()) == remaining
+
+def test_cluster_roots():
+    root_tracker = RootTracker()
+    a, b = -np.ones(2), np.ones(2)
+    root_tracker.add_roots(np.array([[0., 0.], [.5, .5], [1.e-9, -1.e-9]]), a, b, "Macaulay", 1.e-8)
+    root_tracker.add_roots(np.array([[.5, .5 + 1.e-10], [-.5, .5]]), np.array([0., 0.]), np.ones(2), "Base Case", 1.e-12)
+    root_tracker.add_potential_roots(np.array([.7, .7]), a, b, "Too Deep.")
+    root_tracker.cluster_roots()
+    assert np.allclose(root_tracker.roots, [[5.e-10, -5.e-10], [.5, .5 + 5.e-11]])
+    assert np.all(root_tracker.multiplicities == [2, 2])
+    #The interval of the merged copy is dropped, the potential root's is kept
+    assert len(root_tracker.intervals) == 3
+    assert np.all(root_tracker.interval_roots == [0, 1, -1])
+
+    #Nothing to merge
+    root_tracker = RootTracker()
+    root_tracker.add_roots(np.array([0., .5]), -1., 1., "Macaulay", 1.e-8)
+    root_tracker.cluster_roots()
+    assert np.all(root_tracker.roots == [0., .5])
+    assert np.all(root_tracker.multiplicities == [1, 1])
+
+    #Simple roots get a tolerance from their conditioning, only singular ones get sqrt(error)
+    linear = [np.array([[-.2, 0.], [1., 0.]]), np.array([[.1, 1.], [0., 0.]])]
+    singular = [np.array([[.5, 0.], [0., 0.], [.5, 0.]]), np.array([[0., 1.], [0., 0.]])]
+    assert np.allclose(subdiv.root_cluster_tol(a, b, 1.e-14, linear, np.array([[.2, -.1]])), 10*np.sqrt(2)*1.e-14)
+    assert np.allclose(subdiv.root_cluster_tol(a, b, 1.e-14, singular, np.zeros((1,2))), 1.e-7)
+    #So close simple roots aren't merged
+    root_tracker = RootTracker()
+    root_tracker.add_roots(np.array([[.2, -.1], [.2 + 1.e-9, -.1]]), a, b, "Macaulay", np.full(2, 1.e-12))
+    root_tracker.cluster_roots()
+    assert len(root_tracker.roots) == 2
+
+    #A merged root is only as certain as its copies' bounds plus their distance to it
+    root_tracker = RootTracker()
+    root_tracker.add_roots(np.array([[0., 0.], [1.e-6, 0.], [.5, .5]]), a, b, "Macaulay", 1.e-5,
+                           bounds=np.array([1.e-12, np.inf, 1.e-12]))
+    root_tracker.add_roots(np.array([[.5, .5 + 2.e-6]]), a, b, "Macaulay", 1.e-5, bounds=np.array([1.e-12]))
+    root_tracker.cluster_roots()
+    assert root_tracker.bounds[0] == np.inf
+    assert np.isclose(root_tracker.bounds[1], 1.e-12 + 1.e-6)
+    #So neither is certified, where the largest bound of the copies was 1.e-12 for the second
+    root_tracker.get_polish_intervals(certify_tol=1.e-10)
+    assert len(root_tracker.roots) == 0
+
+    #Each root only searches its own tolerance, and a pair is merged from the bigger one
+    root_tracker = RootTracker()
+    root_tracker.add_roots(np.array([[.05, 0.], [0., 0.], [.5, 0.]]), a, b, "Macaulay", np.array([1.e-12, .1, 1.e-12]))
+    root_tracker.cluster_roots()
+    assert np.allclose(root_tracker.roots, [[.025, 0.], [.5, 0.]])
+
+    #The solver only merges roots on request
+    f = lambda x,y: (x-.1)**2
+    g = lambda x,y: y-.2
+    assert len(subdiv.solve([f,g], -np.ones(2), np.ones(2), merge_roots=True)) == 1
+    assert len(subdiv.solve([f,g], -np.ones(2), np.ones(2))) == 2
+
+def test_root_records():
+    root_tracker = RootTracker()
+    a, b = -np.ones(2), np.ones(2)
+    root_tracker.add_roots(np.array([[0., 0.], [1.e-9, -1.e-9], [.5, .5]]), a, b, "Macaulay", 1.e-8, 2, 1.e-12, np.array([1., 5., 2.]))
+    root_tracker.add_roots(np.array([[-.5, .5]]), np.array([-1., 0.]), np.array([0., 1.]), "Degree", 1.e-8, 3, 1.e-14)
+    root_tracker.cluster_roots()
+    records = root_tracker.get_root_records()
+    assert len(records) == 3
+    assert np.allclose(records['root'], root_tracker.roots)
+    assert np.all(records['method'] == ["Macaulay", "Macaulay", "Degree"])
+    assert np.all(records['a'][2] == [-1., 0.]) and np.all(records['b'][2] == [0., 1.])
+    assert np.all(records['depth'] == [2, 2, 3])
+    assert np.allclose(records['error'], [1.e-12, 1.e-12, 1.e-14])
+    #The merged root keeps the worst condition number, roots without one get nan
+    assert np.all(records['cond'][:2] == [5., 2.]) and np.isnan(records['cond'][2])
+    assert np.all(records['multiplicity'] == [2, 1, 1])
+
+    records = RootTracker().get_root_records()
+    assert len(records) == 0
+
+    #From the solver
+    f = lambda x,y: np.sin(4*x+y)-y
+    g = lambda x,y: np.cos(3*x*y)-x
+    records = subdiv.solve([f,g], -np.ones(2), np.ones(2), return_records=True)
+    roots = subdiv.solve([f,g], -np.ones(2), np.ones(2))
+    assert np.allclose(records['root'], roots)
+    assert np.all(records['a'] <= records['root']) and np.all(records['root'] <= records['b'])
+    #The check order doesn't depend on timings, so the solve is reproducible
+    again = subdiv.solve([f,g], -np.ones(2), np.ones(2), return_records=True)
+    assert np.array_equal(records['root'], again['root']) and np.all(records['method'] == again['method'])
+
+def test_merge_boxes():
+    lower = np.array([[0., 0.], [.25, .25], [1., 0.], [0., 0.], [-1., -1.], [.5, 1.]])
+    upper = np.array([[1., 1.], [.5, .5], [2., 1.], [1., 1.], [-.5, -.5], [1.5, 2.]])
+    lower, upper = merge_boxes(lower, upper)
+    boxes = sorted(map(tuple, np.hstack([lower, upper])))
+    #The duplicate and the nested box merge into [0,1]x[0,1], which doesn't merge with the
+    #touching box [1,2]x[0,1] or with [.5,1.5]x[1,2] since the bounding box would add area
+    assert boxes == [(-1., -1., -.5, -.5), (0., 0., 1., 1.), (.5, 1., 1.5, 2.), (1., 0., 2., 1.)]
+
+    #Boxes overlapping across a whole face are merged
+    lower, upper = merge_boxes(np.array([[0., 0.], [.9, 0.], [1.8, 0.]]), np.array([[1., 1.], [1.9, 1.], [3., 1.]]))
+    assert np.allclose(lower, [[0., 0.]]) and np.allclose(upper, [[3., 1.]])
+
+    #Crossing boxes aren't merged, their bounding box is bigger than their union
+    lower, upper = merge_boxes(np.array([[0., 0.], [0., 0.]]), np.array([[2., 1.], [1., 2.]]))
+    assert len(lower) == 2
+
+def test_polish_intervals():
+    root_tracker = RootTracker()
+    a, b = -np.ones(2), np.ones(2)
+    root_tracker.add_roots(np.array([[0., 0.], [.5, .5]]), a, b, "Macaulay", 1.e-3)
+    root_tracker.add_roots(np.array([[.5, .5 + 1.e-4]]), np.zeros(2), np.ones(2), "Macaulay", 1.e-3)
+    root_tracker.cluster_roots()
+    polish_intervals = root_tracker.get_polish_intervals(margin=10.)
+    #Each root gets a box of radius 10*tol, and the two copies of (.5,.5) were merged into one root
+    assert len(polish_intervals) == 2
+    assert np.allclose(polish_intervals[0], [[-.01, -.01], [.01, .01]])
+    assert np.allclose(polish_intervals[1], [[.49, .49005], [.51, .51005]])
+
+def test_certify_roots():
+    #Linear functions, so the bound is just the Newton step
+    coeffs = [np.array([[-.3, 0.], [1., 0.]]), np.array([[.2, 1.], [0., 0.]])]
+    bounds = subdiv.certify_roots(coeffs, np.array([[.3 + 1.e-8, -.2]]), [0., 0.])
+    assert np.isclose(bounds[0], 1.e-8)
+    #The approximation error adds to it
+    bounds = subdiv.certify_roots(coeffs, np.array([[.3, -.2]]), [1.e-6, 1.e-6])
+    assert np.isclose(bounds[0], 1.e-6)
+    #The ball has to be in the box, where the error bounds hold
+    coeffs = [np.array([[-(1 - 1.e-9), 0.], [1., 0.]]), np.array([[.2, 1.], [0., 0.]])]
+    assert subdiv.certify_roots(coeffs, np.array([[1 - 1.e-9, -.2]]), [1.e-12, 1.e-12])[0] < 1.e-9
+    assert subdiv.certify_roots(coeffs, np.array([[1 - 1.e-9, -.2]]), [1.e-8, 1.e-8])[0] == np.inf
+
+    #x^2 + y^2 - .5 and x - y have a simple root at (.5,.5)
+    coeffs = [np.array([[.5, 0., .5], [0., 0., 0.], [.5, 0., 0.]]), np.array([[0., -1., 0.], [1., 0., 0.], [0., 0., 0.]])]
+    zeros = np.array([[.5 + 1.e-6, .5 - 2.e-6], [.5, .5], [0., 0.]])
+    bounds = subdiv.certify_roots(coeffs, zeros, [1.e-15, 1.e-15])
+    assert 2.e-6 <= bounds[0] < 1.e-5
+    assert bounds[1] < 1.e-14
+    #The Jacobian is singular at (0,0)
+    assert bounds[2] == np.inf
+
+    #A double root can't be certified
+    coeffs = [np.array([[-.5, 1.], [0., 0.], [-.5, 0.]]), np.array([[0., 1.], [0., 0.], [0., 0.]])]
+    assert subdiv.certify_roots(coeffs, np.array([[1.e-8, 0.]]), [1.e-15, 1.e-15])[0] == np.inf
+
+    #Certified roots are kept and their intervals aren't polished
+    root_tracker = RootTracker()
+    root_tracker.add_roots(np.array([[0., 0.]]), -np.ones(2), np.zeros(2) + .5, "Macaulay", 1.e-8, bounds=[1.e-12])
+    root_tracker.add_roots(np.array([[.7, .7]]), np.zeros(2) + .5, np.ones(2), "Macaulay", 1.e-8)
+    polish_intervals = root_tracker.get_polish_intervals(certify_tol=1.e-10)
+    assert np.allclose(polish_intervals, [[[.5, .5], [1., 1.]]])
+    assert np.allclose(root_tracker.roots, [[0., 0.]])
+    assert np.all(root_tracker.interval_roots == [0])
+
+    f = lambda x,y: np.sin(4*x+y)-y
+    g = lambda x,y: np.cos(3*x*y)-x
+    tols = {'abs_approx_tol': [1.e-8, 1.e-12], 'rel_approx_tol': [1.e-10, 1.e-15]}
+    roots = subdiv.solve([f,g], -np.ones(2), np.ones(2), certify_tol=1.e-10, **tols)
+    assert len(roots) == 1
+    assert np.allclose([f(*roots[0]), g(*roots[0])], 0, atol=1.e-10)
+
+def test_cluster_solve():
+    #Two circles tangent at (.3,.6)
+    c1 = np.zeros((3,3))
+    c1[0,0], c1[1,0], c1[0,1], c1[2,0], c1[0,2] = .85, -.6, -.2, .5, .5
+    c2 = np.zeros((3,3))
+    c2[0,0], c2[1,0], c2[0,1], c2[2,0], c2[0,2] = 1.15, -.6, -.7, .5, .5
+    zero, radius = subdiv.cluster_solve([c1, c2], [1.e-16, 1.e-16])
+    assert np.allclose(zero, [.3, .6], atol=1.e-12)
+    assert 0 < radius < 1.e-3
+
+    #A simple root isn't a cluster
+    c2 = np.zeros((3,3))
+    c2[0,0], c2[1,0], c2[0,1] = .1, 1., -1.
+    zero, radius = subdiv.cluster_solve([c1, c2], [1.e-16, 1.e-16])
+    assert zero is None
+
+    #The boxes around a cluster box
+    intervals = subdiv.cluster_subintervals(-np.ones(2), np.ones(2), np.array([-.5, 0.]), np.array([0., .5]))
+    assert len(intervals) == 8
+    assert np.isclose(sum(np.prod(b - a) for a, b in intervals), 4 - .25)
+    intervals = subdiv.cluster_subintervals(-np.ones(2), np.ones(2), np.array([-1., 0.]), np.array([0., 1.]))
+    assert len(intervals) == 3
+
+    f = lambda x,y: (x-.3)**2+(y-.1)**2-.25
+    g = lambda x,y: (x-.3)**2+(y-.35)**2-.0625
+    records = subdiv.solve([f,g], -np.ones(2), np.ones(2), return_records=True, fallbacks=('cluster',))
+    assert len(records) == 1
+    assert records['method'][0] == 'Cluster'
+    assert np.allclose(records['root'][0], [.3, .6])
+
+    #Only the roots in a small enough box around the cluster are known to be on its line
+    def tangent_circles(h):
+        c1, c2 = np.zeros((3,3)), np.zeros((3,3))
+        for c, slope in [(c1, 1.), (c2, .5)]:
+            c[0,0], c[2,0], c[0,2], c[0,1] = h**2, h**2/2, h**2/2, slope*h
+        return [c1, c2]
+    assert subdiv.cluster_holds_all_roots(tangent_circles(1.e-4), np.zeros(2))
+    assert not subdiv.cluster_holds_all_roots(tangent_circles(1.), np.zeros(2))
+    assert subdiv.cluster_holds_all_roots(tangent_circles(1.), np.zeros(2), 2.**-8)
+
+    #A cluster and two simple roots
+    g2 = lambda x,y: g(x,y)*(x-.75)
+    records = subdiv.solve([f,g2], -np.ones(2), np.ones(2), return_records=True, fallbacks=('cluster',))
+    assert len(records) == 3 and np.sum(records['method'] == 'Cluster') == 1
+
+def test_at_resolution():
+    assert not subdiv.at_resolution(-np.ones(2), np.ones(2), 10)
+    assert not subdiv.at_resolution(np.array([1.e6]), np.array([1.e6 + 1.e-6]), 10)
+    assert subdiv.at_resolution(np.array([0., 1.e6]), np.array([1., 1.e6 + 1.e-8]), 10)
+    assert subdiv.at_resolution(1., 1., 5)
+
+    #A jump never gets a good approximation, so it is stopped at the resolution
+    zeros, potentials = subdiv.solve(lambda x: np.sign(x - 1000.3), 1000., 1001., return_potentials=True)
+    assert len(zeros) == 0
+    assert np.allclose(potentials, 1000.3)
+
+def test_informed_split():
+    #x(x-.75) has roots at 0 and .75, so the split moves between them
+    coeff = np.array([.5, -.75, .5])
+    split = subdiv.informed_split([coeff], [1.e-15])
+    assert split.shape == (1,)
+    assert 0 < 2*split[0] - 1 < .75
+    #A single group of possible roots keeps the default split
+    coeff = np.zeros((3,3))
+    coeff[0,0], coeff[1,0] = .1, 1.
+    assert np.allclose(subdiv.informed_split([coeff, coeff.T], [1.e-15, 1.e-15]), subdiv.RAND)
+
+    f = lambda x,y: np.sin(10*x)-y
+    g = lambda x,y: np.cos(7*y)-x
+    zeros_fixed = subdiv.solve([f,g], -np.ones(2), np.ones(2))
+    zeros = subdiv.solve([f,g], -np.ones(2), np.ones(2), split_policy='informed')
+    assert len(zeros) == len(zeros_fixed)
+    for zero in zeros:
+        assert np.min(np.linalg.norm(zeros_fixed - zero, axis=1)) < 1.e-10
+    with np.testing.assert_raises(ValueError):
+        subdiv.solve([f,g], -np.ones(2), np.ones(2), split_policy='random')
+
+def test_unique_root_solve():
+    #x + .1y^2 - .3 and y + .05x^2 + .2 are one to one on the box
+    c1 = np.zeros((3,3))
+    c1[0,0], c1[1,0], c1[0,2] = -.25, 1., .05
+    c2 = np.zeros((3,3))
+    c2[0,0], c2[0,1], c2[2,0] = .225, 1., .025
+    zeros = subdiv.unique_root_solve([c1, c2], [1.e-16, 1.e-16])
+    assert zeros.shape == (1, 2)
+    x, y = zeros[0]
+    assert np.allclose([x + .1*y**2 - .3, y + .05*x**2 + .2], 0, atol=1.e-14)
+
+    #Moving the first curve out of the box leaves no root
+    c1[0,0] = -3.
+    assert subdiv.unique_root_solve([c1, c2], [1.e-16, 1.e-16]).shape == (0, 2)
+
+    #x^2 - .25 isn't one to one
+    c1 = np.zeros((3,3))
+    c1[0,0], c1[2,0] = .25, .5
+    assert subdiv.unique_root_solve([c1, c2], [1.e-16, 1.e-16]) is None
+
+    f = lambda x,y,z: x**2+y**2+z**2-.8
+    g = lambda x,y,z: (x-.2)**2+y**2+z**2-.6
+    h = lambda x,y,z: z-.5*x*y-.1
+    a, b = -np.ones(3), np.ones(3)
+    zeros = subdiv.solve([f,g,h], a, b, fallbacks=('cluster',))
+    records = subdiv.solve([f,g,h], a, b, return_records=True, fallbacks=('newton',))
+    assert len(records) == len(zeros) == 2
+    assert 'Newton' in records['method']
+    for zero in records['root']:
+        assert np.allclose([f(*zero), g(*zero), h(*zero)], 0, atol=1.e-10)
+    with np.testing.assert_raises(ValueError):
+        subdiv.solve([f,g,h], a, b, fallbacks=('rotate',))
+
+def test_batch_solve():
+    np.random.seed(1)
+    funcs = [getPoly(3,3,True), getPoly(4,3,True), getPoly(5,3,True)]
+    a, b = -np.ones(3), np.ones(3)
+    zeros = subdiv.solve(funcs, a, b)
+    records = subdiv.solve(funcs, a, b, batch_size=16, return_records=True)
+    assert len(records) == len(zeros) == 3
+    assert 'Macaulay' in records['method']
+    for zero in records['root']:
+        assert np.min(np.linalg.norm(zeros - zero, axis=1)) < 1.e-10
+    with np.testing.assert_raises(ValueError):
+        subdiv.solve(funcs, a, b, method='qrt', batch_size=16)
+
+    #Unbatched, the condition numbers are only computed for the records
+    records = subdiv.solve(funcs, a, b, return_records=True)
+    macaulay = records['method'] == 'Macaulay'
+    assert np.any(macaulay) and np.all(np.isfinite(records['cond'][macaulay]))
+
+def test_quadratic_solve_2d():
+    np.random.seed(9)
+    coeffs1 = np.array([getPoly(2,2,False).coeff for i in range(20)])
+    coeffs2 = np.array([getPoly(2,2,False).coeff for i in range(20)])
+    #The second system has a root at infinity
+    coeffs2[1] = coeffs1[1]
+    coeffs2[1,0,0] += 1
+    zeros, solved = subdiv.quadratic_solve_2d(coeffs1, coeffs2, 1.e5)
+    assert zeros.shape == (20, 4, 2)
+    assert not solved[1] and np.sum(solved) == 19
+    for c1, c2, system_zeros in zip(coeffs1[solved], coeffs2[solved], zeros[solved]):
+        scale = 1 + np.max(np.abs(system_zeros), axis=1)**2
+        assert np.allclose(cheb.chebval2d(*system_zeros.T, c1)/scale, 0, atol=1.e-10)
+        assert np.allclose(cheb.chebval2d(*system_zeros.T, c2)/scale, 0, atol=1.e-10)
+
+    f = lambda x,y: (x-.3)**2+(y-.1)**2-.25
+    g = lambda x,y: x*y-.05
+    records = subdiv.solve([f,g], -np.ones(2), np.ones(2), return_records=True)
+    assert len(records) == 2 and np.all(records['method'] == 'Quadratic')
+    for zero in records['root']:
+        assert np.allclose([f(*zero), g(*zero)], 0, atol=1.e-12)
+    records = subdiv.solve([f,g], -np.ones(2), np.ones(2), method='qrt', return_records=True)
+    assert len(records) == 2 and not np.any(records['method'] == 'Quadratic')
+
+    #Roots that share a y can't be found from q2 f - p2 g, so these aren't solved in closed form
+    c1 = np.array([[.5, 0, .5], [0, 0, 0], [.5, 0, 0]])
+    c2 = np.array([[-.5, 1, 0], [0, 0, 0], [-.5, 0, 0]])
+    assert not subdiv.quadratic_solve_2d(c1[np.newaxis], c2[np.newaxis], 1.e5)[1][0]
+    f = lambda x,y: x**2+y**2-.5
+    g = lambda x,y: y-x**2
+    x0, y0 = np.sqrt((np.sqrt(3)-1)/2), (np.sqrt(3)-1)/2
+    for batch_size in [1, 8]:
+        zeros = subdiv.solve([f,g], -np.ones(2), np.ones(2), batch_size=batch_size)
+        assert len(zeros) == 2
+        assert np.allclose(np.sort(zeros[:,0]), [-x0, x0]) and np.allclose(zeros[:,1], y0)
+
+def test_resultant_solve():
+    np.random.seed(3)
+    coeffs = [getPoly(4,2,False).coeff for i in range(2)]
+    funcs = [lambda x,y,c=c: cheb.chebval2d(x,y,c) for c in coeffs]
+    a, b = -np.ones(2), np.ones(2)
+    zeros = subdiv.solve(funcs, a, b)
+    records = subdiv.solve(funcs, a, b, method='resultant', target_deg=5, return_records=True)
+    assert np.all(records['method'] == 'Resultant')
+    assert len(records) == len(zeros)
+    for zero in records['root']:
+        assert np.allclose([func(*zero) for func in funcs], 0, atol=1.e-10)
+        assert np.min(np.linalg.norm(zeros - zero, axis=1)) < 1.e-10
+
+    #The roots share a y
+    f = lambda x,y: x**2+y**2-.5
+    g = lambda x,y: y-x**2
+    zeros = subdiv.solve([f,g], a, b, method='resultant')
+    assert len(zeros) == 2
+    assert np.allclose([f(*zeros.T), g(*zeros.T)], 0, atol=1.e-12)
+    try:
+        subdiv.solve([lambda x,y,z: x, lambda x,y,z: y, lambda x,y,z: z], -np.ones(3), np.ones(3), method='resultant')
+        assert False
+    except ValueError:
+        pass
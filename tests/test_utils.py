@@ -242,3 +242,59 @@ def test_mon_combos():
             mons2.append(i)
     for i in range(len(mons)):
         assert((mons[i] == mons2[i]).all())
+
+def test_growable_array():
+    buffer = GrowableArray((2,3), capacity=1)
+    rows = np.arange(60, dtype=float).reshape(10,2,3)
+    for row in rows[:7]:
+        buffer.append(row)
+    buffer.extend(rows[7:])
+    assert len(buffer) == 10
+    assert np.all(buffer.values == rows)
+
+    codes = GrowableArray((), np.int64)
+    codes.extend([3,1,2])
+    codes.append(5)
+    assert np.all(codes.values == [3,1,2,5])
+    codes.clear()
+    assert len(codes.values) == 0
+
+    #An empty buffer can still grow
+    empty = GrowableArray((), capacity=0)
+    empty.extend([1., 2., 3.])
+    assert np.all(empty.values == [1., 2., 3.])
+
+def test_condeigs_schur():
+    from scipy.linalg import schur, eig
+    np.random.seed(4)
+    A = np.random.randn(10,10)
+    T = schur(A, output='complex')[0]
+    w, vl, vr = eig(A, left=True, right=True)
+    conds = 1/np.abs(np.sum(vl.conj()*vr, axis=0))
+    # Match the eigenvalues to the diagonal of T
+    order = [np.argmin(np.abs(w - t)) for t in np.diag(T)]
+    assert np.allclose(condeigs_schur(T), conds[order])
+
+    #A repeated eigenvalue is infinitely ill-conditioned
+    assert np.all(np.isinf(condeigs_schur(np.array([[1., 1.], [0., 1.]]))))
+
+def test_lru_memoize():
+    calls = []
+    @lru_memoize(2)
+    def total(arr, scale):
+        calls.append(scale)
+        return arr.sum()*scale
+
+    arr = np.arange(4)
+    assert total(arr, 2) == 12
+    assert total(arr.copy(), 2) == 12
+    assert calls == [2]
+    #Arrays are keyed by their contents.
+    assert total(arr + 1, 2) == 20
+    assert calls == [2, 2]
+    #Only the most recently used results are kept.
+    total(arr, 3)
+    assert len(total.cache) == 2
+    total(arr + 1, 2)
+    total(arr, 2)
+    assert calls == [2, 2, 3, 2]
@@ -1,5 +1,6 @@
 import numpy as np
-from yroots.IntervalChecks import constant_term_check, quadratic_check
+from yroots.IntervalChecks import IntervalData, constant_term_check, quadratic_check, AdaptiveOrder, \
+                                  linear_programming_check, topological_degree_2d, jacobian_is_regular_2d
 from yroots.old_code.OldIntervalChecks import full_quad_check, full_cubic_check, curvature_check, linear_check
 from yroots.polynomial import MultiCheb,MultiPower
 from yroots.subdivision import get_subintervals
@@ -91,7 +92,7 @@ def base_quadratic_check(test_coeff,tol):
                 B_ = B[unfixed]
 
                 for side in itertools.product([0,1],repeat=len(fixed)):
-                    X0 = np.array([interval[j][i] for i,j in enumerate(side)])
+                    X0 = np.array([interval[j][i] for i,j in zip(fixed,side)])
                     X_ = la.solve(A_, -B_-fixed_A@X0, assume_a='sym')
                     X = np.zeros(dim)
                     X[fixed] = X0
@@ -170,12 +171,94 @@ def test_quadratic_check():
         for c in randn_test_cases:
             assert base_quadratic_check(c,tol) == _quadratic_check(c,tol)
 
+def test_quadratic_check_nd():
+    #Coefficients that decay quickly, so the corners often don't decide and the sides are checked
+    tol = 1.e-4
+    for dim in [4, 5]:
+        subintervals = get_subintervals(-np.ones(dim),np.ones(dim),np.arange(dim),None,None,tol)
+        np.random.seed(0)
+        for _ in range(10):
+            c = np.random.randn(*[5]*dim)*(0.2**np.indices([5]*dim).sum(0))
+            assert base_quadratic_check(c,tol) == quadratic_check(c,subintervals,tol)
+
 def test_quadratic_check3D():
     #test 1
     a = np.array([-2.78150902e-05, -2.78150902e-05, -2.78150902e-05])
     b = np.array([4.19383023e-05, 4.19383023e-05, 4.19383023e-05])
     tol = macheps
 
+def test_adaptive_order():
+    #The cheap check that throws out intervals should move to the front
+    order = AdaptiveOrder(3, seed=0)
+    for _ in range(10):
+        order.record(0, 0., 10., 0)
+        order.record(1, 0., 1., 1)
+        order.record(2, 0., 5., 0.5)
+    assert order.order == [1, 2, 0]
+
+    #The same seed gives the same order
+    order1 = AdaptiveOrder(4, seed=5)
+    order2 = AdaptiveOrder(4, seed=5)
+    for i in range(4):
+        order1.record(i, np.random.rand(), 1., 0)
+        order2.record(i, np.random.rand(), 1., 0)
+    assert order1.order == order2.order
+
+    #Timings are only used when asked for
+    for timed, expected in [(False, [0, 1]), (True, [1, 0])]:
+        order = AdaptiveOrder(2, timed=timed)
+        order.record(0, 100., 1., 0)
+        order.record(1, 0., 10., 0)
+        assert order.order == expected
+
+def test_linear_programming_check():
+    #Each function has zeros in the box, but x = .5 and x + .1y = -.5 don't meet in it
+    f = np.array([[-.5, 0.], [1., 0.]])
+    g = np.array([[.5, .1], [1., 0.]])
+    intervals = [np.array([[-1., -1.], [1., 1.]]), np.array([[0., 0.], [1., 1.]])]
+    assert linear_programming_check([f, g], [1.e-10, 1.e-10], intervals) == [False, False]
+    #With a large enough error they could meet
+    assert linear_programming_check([f, g], [1., 1.], intervals) == [True, True]
+    #Crossing lines have a common zero in the box
+    g = np.array([[0., 1.], [0., 0.]])
+    assert linear_programming_check([f, g], [1.e-10, 1.e-10], intervals) == [True, True]
+
+def test_topological_degree_2d():
+    x = np.array([[0., 0.], [1., 0.]])
+    y = np.array([[0., 1.], [0., 0.]])
+    errors = [1.e-15, 1.e-15]
+    assert topological_degree_2d([x, y], errors) == 1
+    assert topological_degree_2d([x, -y], errors) == -1
+    assert jacobian_is_regular_2d([x, y])
+    #The root x = 2 is outside the box
+    assert topological_degree_2d([x - np.array([[2., 0.], [0., 0.]]), y], errors) == 0
+    #z^2 - .1 as a map of the plane has two roots with positive orientation and a singular jacobian
+    f = np.array([[-.1, 0., -.5], [0., 0., 0.], [.5, 0., 0.]])
+    g = np.array([[0., 0.], [0., 2.]])
+    assert topological_degree_2d([f, g], errors) == 2
+    assert not jacobian_is_regular_2d([f, g])
+    #The degree can't be computed with a root on the boundary
+    assert topological_degree_2d([x - np.array([[1., 0.], [0., 0.]]), y], errors) is None
+
+def test_interval_data_tracking():
+    a, b = -np.ones(2), np.ones(2)
+    boxes = [[-np.ones(2), np.zeros(2)], [np.zeros(2), np.ones(2)], [np.array([-1.,0.]), np.array([0.,1.])]]
+    #By default only the counts and the area are kept
+    interval_data = IntervalData(a, b)
+    interval_data.track_interval("Macaulay", boxes[0])
+    interval_data.track_interval("constant_term_check", boxes[1])
+    assert interval_data.interval_counts[interval_data.interval_codes["Macaulay"]] == 1
+    assert interval_data.current_area == 2.
+    assert not hasattr(interval_data, 'interval_log')
+
+    interval_data = IntervalData(a, b, track_intervals=True)
+    interval_data.track_interval("Macaulay", boxes[0])
+    interval_data.track_interval("constant_term_check", boxes[1])
+    interval_data.track_interval("Macaulay", boxes[2])
+    results = interval_data.get_interval_results()
+    assert results["Macaulay"].shape == (2,2,2)
+    assert np.all(results["Macaulay"][1] == boxes[2])
+    assert len(results["Base Case"]) == 0
 
 if __name__ == "__main__":
     test_zero_check2D()
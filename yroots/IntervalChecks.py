@@ -12,8 +12,86 @@ from matplotlib import pyplot as plt
 from yroots.polynomial import MultiCheb, Polynomial
 from matplotlib import patches
 from scipy import linalg as la
+from scipy.optimize import linprog
+from numpy.polynomial import chebyshev as cheb
 from math import fabs                      # faster than np.abs for small arrays
-from yroots.utils import memoize
+from yroots.utils import memoize, GrowableArray
+import time
+from numba import njit
+
+class AdaptiveOrder:
+    '''
+    Class to choose the order in which a set of tests is run, where each test can throw out an
+    interval. It is used for the interval checks, the subinterval checks, and the functions being
+    approximated in subdivision_solve_nd. It records the cost per call and the rejection rate of
+    every item, and keeps the items sorted so that the one expected to throw out an interval for
+    the least cost runs first.
+
+    For independent tests, running them in increasing order of cost/rejection_rate minimizes the
+    expected cost of throwing out an interval. The rejection rate is smoothed so that items that
+    have not been run yet are tried early.
+
+    Attributes
+    ----------
+    order: list
+        The indices of the items in the order they should be run.
+    calls: list
+        The number of times each item has been run.
+    costs: list
+        The total cost of running each item.
+    rejections: list
+        How many intervals each item has thrown out. Can be fractional if an item is run on
+        several intervals at once.
+    timed: bool
+        If True the costs are wall-clock times. Otherwise they are counted in units of work, so
+        the order is reproducible.
+    tiebreak: list
+        The priority used to break ties. A random permutation if a seed is given.
+
+    Methods
+    -------
+    __init__
+        Initializes everything.
+    record
+        Records the cost and the result of running an item and updates the order.
+    '''
+    def __init__(self, num_items, seed=None, timed=False):
+        self.calls = [0]*num_items
+        self.costs = [0.]*num_items
+        self.rejections = [0.]*num_items
+        self.timed = timed
+        if seed is None:
+            self.tiebreak = list(range(num_items))
+        else:
+            self.tiebreak = list(np.random.RandomState(seed).permutation(num_items))
+        self.order = sorted(range(num_items), key=lambda i: self.tiebreak[i])
+
+    def _score(self, i):
+        ''' The expected cost of throwing out an interval with item i.
+        '''
+        if self.calls[i] == 0:
+            return 0.
+        rate = (self.rejections[i] + 1) / (self.calls[i] + 2)
+        return self.costs[i] / self.calls[i] / rate
+
+    def record(self, i, elapsed, work, rejected):
+        ''' Records the result of running item i and updates the order.
+
+        Parameters
+        ----------
+        i : int
+            The index of the item that was run.
+        elapsed : float
+            The time it took to run the item. Only used if timed is True.
+        work : float
+            A deterministic measure of the work it took to run the item.
+        rejected : float
+            The fraction of the intervals the item threw out.
+        '''
+        self.calls[i] += 1
+        self.costs[i] += elapsed if self.timed else work
+        self.rejections[i] += rejected
+        self.order.sort(key=lambda j: (self._score(j), self.tiebreak[j]))
 
 class IntervalData:
     '''
@@ -32,12 +110,42 @@ class IntervalData:
         represented by that matrix, and accurate to within that tolerance, can ever be zero on the given subintervals.
         Before the checks can be run the subintervals must be rescaled to subintervals of [-1,1]
         The list of sign changes represents if we already know the function changes sign on a given subinterval.
+    system_checks: list
+        A list of functions. Each function accepts a list of coefficient matrices, one for each
+        function in the system, their approximation errors and a list of subintervals. It returns
+        a list of booleans whether the Chebyshev Polynomials can ever have a common zero on the
+        given subintervals of [-1,1].
+    check_order: AdaptiveOrder
+        Chooses the order the interval_checks are run in.
+    subcheck_order: AdaptiveOrder
+        Chooses the order the subinterval_checks are run in.
+    system_order: AdaptiveOrder
+        Chooses the order the system_checks are run in.
+    func_order: AdaptiveOrder
+        Chooses the order the functions are approximated and checked in.
+    fallbacks: list
+        The names of the solvers to try on an interval when the Macaulay matrix is ill conditioned,
+        before subdividing it.
+    fallback_order: AdaptiveOrder
+        Chooses the order the fallbacks are tried in.
     a: numpy array
         The lower bounds of the overall interval to solve on.
     b: numpy array
         The upper bounds of the overall interval to solve on.
-    interval_results: dictionary
-        A dictionary of funciton names to lists of intervals that were solved by that function.
+    interval_names: list
+        The names of the checks and methods (Macaulay, Base Case, ...) that can solve an interval.
+        An interval's method code is its index in this list.
+    interval_codes: dictionary
+        A dictionary of the names to their method codes.
+    interval_counts: list
+        How many intervals were solved by each check/method.
+    track_intervals: bool
+        If True every solved interval is kept in interval_log, which is needed for plotting.
+        Otherwise only the counts and the area are kept.
+    interval_log: GrowableArray
+        The solved intervals as an (N,2,dim) array of lower and upper bounds. Only if track_intervals.
+    interval_methods: GrowableArray
+        The method code of each interval in interval_log. Only if track_intervals.
     total_area: float
         The total n dimensional volume of the overall interval being solved on.
     current_area: float
@@ -66,8 +174,12 @@ class IntervalData:
         Checks if a polynomial can be zero on an interval.
     check_subintervals
         Checks if a polynomial can be zero on an list of intervals.
+    check_system
+        Checks if a system of polynomials can have a common zero on an interval.
     track_interval
         Tracks what happened to a given interval.
+    get_interval_results
+        Gets the intervals solved by each check/method.
     print_progress
         Prints what percentage of the domain has been searched
     print_results
@@ -75,19 +187,30 @@ class IntervalData:
     plot_results
         Plots the results of subdivision solve
     '''
-    def __init__(self,a,b):
+    def __init__(self,a,b,num_funcs=None,seed=None,track_intervals=False,fallbacks=('cluster','newton'),timed=False):
         self.interval_checks = [constant_term_check]
         self.subinterval_checks = [quadratic_check]
+        self.system_checks = [linear_programming_check]
+        if num_funcs is None:
+            num_funcs = np.size(a)
+        self.check_order = AdaptiveOrder(len(self.interval_checks), seed, timed)
+        self.subcheck_order = AdaptiveOrder(len(self.subinterval_checks), seed, timed)
+        self.system_order = AdaptiveOrder(len(self.system_checks), seed, timed)
+        self.func_order = AdaptiveOrder(num_funcs, seed, timed)
+        self.fallbacks = list(fallbacks)
+        self.fallback_order = AdaptiveOrder(len(self.fallbacks), seed, timed)
         self.a = a
         self.b = b
-        self.interval_results = dict()
-        for check in self.interval_checks:
-            self.interval_results[check.__name__] = []
-        for check in self.subinterval_checks:
-            self.interval_results[check.__name__] = []
-        self.interval_results["Base Case"] = []
-        self.interval_results["Macaulay"] = []
-        self.interval_results["Too Deep"] = []
+        self.interval_names = [check.__name__ for check in self.interval_checks]
+        self.interval_names += [check.__name__ for check in self.subinterval_checks]
+        self.interval_names += [check.__name__ for check in self.system_checks]
+        self.interval_names += ["Base Case", "Macaulay", "Too Deep", "Degree", "Cluster", "Resolution", "Newton", "Quadratic", "Resultant"]
+        self.interval_codes = {name:code for code,name in enumerate(self.interval_names)}
+        self.interval_counts = [0]*len(self.interval_names)
+        self.track_intervals = track_intervals
+        if track_intervals:
+            self.interval_log = GrowableArray((2,np.size(a)))
+            self.interval_methods = GrowableArray((), np.int64)
         self.total_area = np.prod(self.b-self.a)
         self.current_area = 0.
         self.tick = 0
@@ -144,8 +267,12 @@ class IntervalData:
         check_interval : bool
             True if we can throw out the interval. Otherwise False.
         '''
-        for check in self.interval_checks:
-            if not check(coeff, error):
+        for i in tuple(self.check_order.order):
+            check = self.interval_checks[i]
+            start = time.perf_counter()
+            result = check(coeff, error)
+            self.check_order.record(i, time.perf_counter() - start, coeff.size, not result)
+            if not result:
                 if not self.polishing:
                     self.track_interval(check.__name__, [a,b])
                 return True
@@ -169,9 +296,15 @@ class IntervalData:
         check_interval : bool
             True if we can throw out the interval. Otherwise False.
         '''
-        for check in self.subinterval_checks:
+        for check_num in tuple(self.subcheck_order.order):
+            check = self.subinterval_checks[check_num]
             for poly,error in zip(polys, errors):
+                if len(subintervals) == 0:
+                    return subintervals
+                start = time.perf_counter()
                 mask = check(poly, scaled_subintervals, error)
+                self.subcheck_order.record(check_num, time.perf_counter() - start,
+                                           poly.size*len(mask), 1 - sum(mask)/len(mask))
                 new_scaled_subintervals = []
                 new_subintervals = []
                 for i, result in enumerate(mask):
@@ -183,6 +316,59 @@ class IntervalData:
                             self.track_interval(check.__name__, subintervals[i])
                 scaled_subintervals = new_scaled_subintervals
                 subintervals = new_subintervals
+        return self._run_system_checks(subintervals, scaled_subintervals, polys, errors)
+
+    def check_system(self, polys, errors, a, b):
+        ''' Runs the system checks on the interval [a,b]
+
+        Parameters
+        ----------
+        polys: list
+            The coefficient tensors of Chebyshev polynomials that approximate the functions on [a,b].
+        errors: list
+            The approximation errors of the polynomials.
+        a: numpy array
+            The lower bounds of the interval to check.
+        b: numpy array
+            The upper bounds of the interval to check.
+        Returns
+        -------
+        check_system : bool
+            True if we can throw out the interval. Otherwise False.
+        '''
+        dim = len(a)
+        unit_box = [(-np.ones(dim), np.ones(dim))]
+        return len(self._run_system_checks([[a,b]], unit_box, polys, errors)) == 0
+
+    def _run_system_checks(self, subintervals, scaled_subintervals, polys, errors):
+        ''' Runs the system checks on the given subintervals of [-1,1]. Only useful when there
+        are at least two polynomials, as a single polynomial is handled by the other checks.
+
+        Returns
+        -------
+        subintervals : list
+            The subintervals that could not be thrown out.
+        '''
+        if len(polys) < 2:
+            return subintervals
+        for check_num in tuple(self.system_order.order):
+            check = self.system_checks[check_num]
+            if len(subintervals) == 0:
+                break
+            start = time.perf_counter()
+            mask = check(polys, errors, scaled_subintervals)
+            self.system_order.record(check_num, time.perf_counter() - start,
+                                     sum(poly.size for poly in polys)*len(mask), 1 - sum(mask)/len(mask))
+            new_scaled_subintervals = []
+            new_subintervals = []
+            for i, result in enumerate(mask):
+                if result:
+                    new_scaled_subintervals.append(scaled_subintervals[i])
+                    new_subintervals.append(subintervals[i])
+                elif not self.polishing:
+                    self.track_interval(check.__name__, subintervals[i])
+            scaled_subintervals = new_scaled_subintervals
+            subintervals = new_subintervals
         return subintervals
 
     def track_interval(self, name, interval):
@@ -191,14 +377,32 @@ class IntervalData:
         Parameters
         ----------
         name : string
-            The name of the check or process (Macaulay, Base Case, Too Deep) that solved this interval
+            The name of the check or process (Macaulay, Base Case, Too Deep, Resolution) that solved this interval
         interval: list
             [a,b] where a and b are the lower and upper bound of the interval to track.
         '''
         if not self.polishing:
-            self.interval_results[name].append(interval)
+            code = self.interval_codes[name]
+            self.interval_counts[code] += 1
+            if self.track_intervals:
+                self.interval_log.append(np.reshape(interval, (2,-1)))
+                self.interval_methods.append(code)
         self.current_area += np.prod(interval[1] - interval[0])
 
+    def get_interval_results(self):
+        ''' Gets the intervals solved by each check/method. Needs track_intervals.
+
+        Returns
+        -------
+        interval_results : dictionary
+            A dictionary of the check/method names to (N,2,dim) arrays of the intervals they solved.
+        '''
+        if not self.track_intervals:
+            raise ValueError("The intervals are only kept when track_intervals is True.")
+        log = self.interval_log.values
+        methods = self.interval_methods.values
+        return {name:log[methods == code] for code,name in enumerate(self.interval_names)}
+
     def print_progress(self):
         ''' Prints the progress of subdivision solve. Only prints every 100th time this function is
             called to save time.
@@ -218,10 +422,10 @@ class IntervalData:
         ''' Prints the results of subdivision solve, how many intervals there were and what percent were
             solve by each check/method.
         '''
-        results_numbers = np.array([len(self.interval_results[name]) for name in self.interval_results])
+        results_numbers = np.array(self.interval_counts)
         total_intervals = sum(results_numbers)
         self.total_intervals = total_intervals
-        checkers = [name for name in self.interval_results]
+        checkers = self.interval_names
         print("Total intervals checked was {}".format(total_intervals))
         print("Methods used were {}".format(checkers))
         print("The percent solved by each was {}".format((100*results_numbers / total_intervals).round(4)))
@@ -267,7 +471,7 @@ class IntervalData:
             else:
                 plt.contour(X,Y,funcs[i](X,Y),levels=[0],colors=contour_colors[i])
 
-        colors = ['w','#c3c3c3', 'C8', '#708090', '#897A57', '#D6C7A4','#73e600','#ccff99']
+        colors = ['w','#c3c3c3', 'C8', '#708090', '#897A57', '#D6C7A4','#73e600','#ccff99','#e6b800','#b30000','#4da6ff','#ff99cc','#9966ff']
         #colors = ['w','#d3d3d3', '#708090', '#c5af7d', '#897A57', '#D6C7A4','#73e600','#ccff99']
 
         if plot_intervals:
@@ -275,9 +479,10 @@ class IntervalData:
             #plt.title('What happened to the intervals')
             #plot results
             i = -1
-            for check in self.interval_results:
+            interval_results = self.get_interval_results()
+            for check in interval_results:
                 i += 1
-                results = self.interval_results[check]
+                results = interval_results[check]
                 first = True
                 for data in results:
                     a0,b0 = data
@@ -951,105 +1156,392 @@ def quadratic_check_nd(test_coeff, intervals, tol):
     pure_quad_coeff_doubled = [p*2 for p in pure_quad_coeff]
     A[np.diag_indices(dim)] = [p*2 for p in pure_quad_coeff_doubled]
 
-    #create a poly object for evals
     k0 = const - sum(pure_quad_coeff)
-    def eval_func(point):
-        "fast evaluation of quadratic chebyshev polynomials using horner's algorithm"
-        _sum = k0
-        for i,coord in enumerate(point):
-            _sum += (B[i] + pure_quad_coeff_doubled[i]*coord + \
-                     sum([A[i,j]*point[j] for j in range(i+1,dim)])) * coord
-        return _sum
 
     #The sum of the absolute values of everything else
     other_sum = np.sum(np.abs(test_coeff)) + tol
 
-    #iterator for sides
-    fixed_vars = get_fixed_vars(dim)
+    #The critical points on each side only depend on the coefficients, so solve for them once
+    unfixed_vars, fixed_vars, num_fixed, face_valid, face_K0, face_K = get_quadratic_faces(A, B)
+
+    #fix no vars--> interior
+    #if diagonal entries change sign, can't be definite
+    interior_valid = False
+    interior_X = np.zeros(dim)
+    for i,c in enumerate(pure_quad_coeff[:-1]):
+        #sign change?
+        if c*pure_quad_coeff[i+1]<0:
+            break
+    #if no sign change, can find extrema
+    else:
+        #not full rank --> no soln
+        if np.linalg.matrix_rank(A,hermitian=True) == A.shape[0]:
+            interior_valid = True
+            interior_X = la.solve(A, -B, assume_a='sym')
 
-    for k, interval in enumerate(intervals):
-        Done = False
-        min_satisfied, max_satisfied = False,False
+    intervals = np.array(intervals, dtype=float).reshape(-1, 2, dim)
+    return quadratic_check_nd_boxes(intervals, k0, B, np.array(pure_quad_coeff_doubled, dtype=float), A,
+                                    other_sum, unfixed_vars, fixed_vars, num_fixed, face_valid, face_K0,
+                                    face_K, interior_valid, interior_X).tolist()
+
+def get_quadratic_faces(A, B):
+    """Used in quadratic_check_nd to find the critical points of the quadratic part on each side of
+    the domain, as an affine function of the values the fixed variables are set to.
+
+    Setting the variables in fixed to X0, the critical point on that side has the unfixed variables
+    at K0 + K@X0. Sides where the quadratic part can't be definite or the system is singular have
+    no critical point to check.
+
+    Parameters
+    ----------
+    A : numpy array
+        The symmetric matrix of the system of equations AX+B = 0 for the critical points.
+    B : numpy array
+        The constant terms of the system.
+
+    Returns
+    -------
+    unfixed_vars : numpy array
+        For each side, the unfixed variables, padded with zeros.
+    fixed_vars : numpy array
+        For each side, the fixed variables, padded with zeros.
+    num_fixed : numpy array
+        For each side, how many variables are fixed.
+    valid : numpy array
+        For each side, whether there is a critical point to check.
+    K0 : numpy array
+        For each side, the constant part of the critical point.
+    K : numpy array
+        For each side, the linear part of the critical point.
+    """
+    dim = len(B)
+    fixed_vars_list = get_fixed_vars(dim)
+    num_faces = len(fixed_vars_list)
+    unfixed_vars = np.zeros((num_faces, dim), dtype=np.int64)
+    fixed_vars = np.zeros((num_faces, dim), dtype=np.int64)
+    num_fixed = np.zeros(num_faces, dtype=np.int64)
+    valid = np.zeros(num_faces, dtype=np.bool_)
+    K0 = np.zeros((num_faces, dim))
+    K = np.zeros((num_faces, dim, dim))
+    for face, fixed in enumerate(fixed_vars_list):
+        #fixed some variables --> "sides"
+        #we only care about the equations from the unfixed variables
+        fixed = np.array(fixed)
+        unfixed = np.delete(np.arange(dim), fixed)
+        num_fixed[face] = len(fixed)
+        fixed_vars[face,:len(fixed)] = fixed
+        unfixed_vars[face,:len(unfixed)] = unfixed
+        A_ = A[unfixed][:,unfixed]
+        #if diagonal entries change sign, can't be definite
+        diag = np.diag(A_)
+        if np.any(diag[:-1]*diag[1:] < 0):
+            continue
+        #not full rank --> no soln
+        if np.linalg.matrix_rank(A_,hermitian=True) < A_.shape[0]:
+            continue
+        valid[face] = True
+        K0[face,:len(unfixed)] = la.solve(A_, -B[unfixed], assume_a='sym')
+        K[face,:len(unfixed),:len(fixed)] = la.solve(A_, -A[unfixed][:,fixed], assume_a='sym')
+    return unfixed_vars, fixed_vars, num_fixed, valid, K0, K
+
+@njit(cache=True)
+def quadratic_eval(point, k0, B, pure_quad_coeff_doubled, A):
+    "fast evaluation of quadratic chebyshev polynomials using horner's algorithm"
+    dim = len(point)
+    _sum = k0
+    for i in range(dim):
+        term = B[i] + pure_quad_coeff_doubled[i]*point[i]
+        for j in range(i+1, dim):
+            term += A[i,j]*point[j]
+        _sum += term*point[i]
+    return _sum
+
+@njit(cache=True)
+def quadratic_check_nd_boxes(intervals, k0, B, pure_quad_coeff_doubled, A, other_sum, unfixed_vars,
+                             fixed_vars, num_fixed, face_valid, face_K0, face_K, interior_valid,
+                             interior_X):
+    """The loop over the intervals in quadratic_check_nd. The interval is kept if the quadratic
+    part takes a value below other_sum and a value above -other_sum at one of its possible extrema.
+    """
+    num_intervals, _, dim = intervals.shape
+    mask = np.ones(num_intervals, dtype=np.bool_)
+    X = np.zeros(dim)
+    X0 = np.zeros(dim)
+    for k in range(num_intervals):
+        lower = intervals[k,0]
+        upper = intervals[k,1]
+        min_satisfied, max_satisfied = False, False
         #fix all variables--> corners
-        for corner in itertools.product([0,1],repeat=dim):
-            #j picks if upper/lower bound. i is which var
-            eval = eval_func([interval[j][i] for i,j in enumerate(corner)])
-            min_satisfied = min_satisfied or eval < other_sum
-            max_satisfied = max_satisfied or eval > -other_sum
+        for corner in range(2**dim):
+            for i in range(dim):
+                X[i] = upper[i] if (corner >> i) & 1 else lower[i]
+            value = quadratic_eval(X, k0, B, pure_quad_coeff_doubled, A)
+            min_satisfied = min_satisfied or value < other_sum
+            max_satisfied = max_satisfied or value > -other_sum
             if min_satisfied and max_satisfied:
-                Done = True
                 break
-        #need to check sides/interior
-        if not Done:
-            X = np.zeros(dim)
-            for fixed in fixed_vars:
-                #fixed some variables --> "sides"
-                #we only care about the equations from the unfixed variables
-                fixed = np.array(fixed)
-                unfixed = np.delete(np.arange(dim), fixed)
-                A_ = A[unfixed][:,unfixed]
-                #if diagonal entries change sign, can't be definite
-                diag = np.diag(A_)
-                for i,c in enumerate(diag[:-1]):
-                    #sign change?
-                    if c*diag[i+1]<0:
+        #need to check sides
+        for face in range(len(face_valid)):
+            if min_satisfied and max_satisfied:
+                break
+            if not face_valid[face]:
+                continue
+            nfixed = num_fixed[face]
+            nunfixed = dim - nfixed
+            for side in range(2**nfixed):
+                for i in range(nfixed):
+                    var = fixed_vars[face,i]
+                    X0[i] = upper[var] if (side >> i) & 1 else lower[var]
+                    X[var] = X0[i]
+                #make sure it's in the domain
+                in_domain = True
+                for i in range(nunfixed):
+                    var = unfixed_vars[face,i]
+                    x = face_K0[face,i]
+                    for j in range(nfixed):
+                        x += face_K[face,i,j]*X0[j]
+                    if not lower[var] <= x <= upper[var]:
+                        in_domain = False
                         break
-                #if no sign change, can find extrema
-                else:
-                    #not full rank --> no soln
-                    if np.linalg.matrix_rank(A_,hermitian=True) == A_.shape[0]:
-                        fixed_A = A[unfixed][:,fixed]
-                        B_ = B[unfixed]
-                        for side in itertools.product([0,1],repeat=len(fixed)):
-                            X0 = np.array([interval[j][i] for i,j in enumerate(side)])
-                            X_ = la.solve(A_, -B_-fixed_A@X0, assume_a='sym')
-                            #make sure it's in the domain
-                            for i,var in enumerate(unfixed):
-                                if interval[0][var] <= X_[i] <= interval[1][var]:
-                                    continue
-                                else:
-                                    break
-                            else:
-                                X[fixed] = X0
-                                X[unfixed] = X_
-                                eval = eval_func(X)
-                                min_satisfied = min_satisfied or eval < other_sum
-                                max_satisfied = max_satisfied or eval > -other_sum
-                                if min_satisfied and max_satisfied:
-                                    Done = True
-                                    break
-                if Done:
-                    break
-            else:
-                #fix no vars--> interior
-                #if diagonal entries change sign, can't be definite
-                for i,c in enumerate(pure_quad_coeff[:-1]):
-                    #sign change?
-                    if c*pure_quad_coeff[i+1]<0:
+                    X[var] = x
+                if in_domain:
+                    value = quadratic_eval(X, k0, B, pure_quad_coeff_doubled, A)
+                    min_satisfied = min_satisfied or value < other_sum
+                    max_satisfied = max_satisfied or value > -other_sum
+                    if min_satisfied and max_satisfied:
                         break
-                #if no sign change, can find extrema
-                else:
-                    #not full rank --> no soln
-                    if np.linalg.matrix_rank(A,hermitian=True) == A.shape[0]:
-                        X = la.solve(A, -B, assume_a='sym')
-                        #make sure it's in the domain
-                        for i in range(dim):
-                            if interval[0][i] <= X[i] <= interval[1][i]:
-                                continue
-                            else:
-                                break
-                        else:
-                            eval = eval_func(X)
-                            min_satisfied = min_satisfied or eval < other_sum
-                            max_satisfied = max_satisfied or eval > -other_sum
-                            if min_satisfied and max_satisfied:
-                                Done = True
+        #need to check interior
+        if not (min_satisfied and max_satisfied) and interior_valid:
+            in_domain = True
+            for i in range(dim):
+                if not lower[i] <= interior_X[i] <= upper[i]:
+                    in_domain = False
+                    break
+            if in_domain:
+                value = quadratic_eval(interior_X, k0, B, pure_quad_coeff_doubled, A)
+                min_satisfied = min_satisfied or value < other_sum
+                max_satisfied = max_satisfied or value > -other_sum
         #no root
-        if not Done:
+        if not (min_satisfied and max_satisfied):
             mask[k] = False
+    return mask
+
+def linear_programming_check(polys, errors, intervals):
+    """One of system_checks
+
+    Each approximation is split into its linear part and the rest. The rest is bounded by the sum of
+    the absolute values of its coefficients plus the approximation error, so any zero of the function
+    lies in the slab where the linear part is within that bound. If the slabs of all the functions
+    don't intersect on an interval there can't be a common root there. This is decided by a small
+    linear program, which is only run when the cheap bounds on each slab can't decide it.
 
+    Parameters
+    ----------
+    polys : list
+        The coefficient matrices of the polynomials to check
+    errors : list
+        The bounds of the sup norm error of the chebyshev approximations.
+    intervals : list
+        A list of the intervals to check.
+
+    Returns
+    -------
+    mask : list
+        A list of the results of each interval. False if the functions are guarenteed to never have
+        a common zero in the interval, True otherwise
+    """
+    dim = polys[0].ndim
+    num_polys = len(polys)
+    consts = np.zeros(num_polys)
+    linear = np.zeros((num_polys, dim))
+    radii = np.zeros(num_polys)
+    for i, (coeff, error) in enumerate(zip(polys, errors)):
+        consts[i] = coeff[(0,)*dim]
+        for var in range(dim):
+            if coeff.shape[var] > 1:
+                spot = [0]*dim
+                spot[var] = 1
+                linear[i, var] = coeff[tuple(spot)]
+        radii[i] = np.sum(np.abs(coeff)) - fabs(consts[i]) - np.sum(np.abs(linear[i])) + error
+
+    # The common zeros satisfy -radii <= consts + linear@x <= radii
+    A_ub = np.vstack([linear, -linear])
+    b_ub = np.concatenate([radii - consts, radii + consts])
+    abs_linear = np.abs(linear)
+    # Where all the linear parts vanish. If this is in an interval the slabs intersect there.
+    center_zero = None
+    if num_polys == dim and np.linalg.matrix_rank(linear) == dim:
+        center_zero = np.linalg.solve(linear, -consts)
+    mask = [True]*len(intervals)
+    for k, interval in enumerate(intervals):
+        lower, upper = np.asarray(interval[0]), np.asarray(interval[1])
+        center = consts + linear@((upper + lower)/2)
+        spread = abs_linear@((upper - lower)/2)
+        # Some slab misses the interval entirely
+        if np.any(center - spread > radii) or np.any(center + spread < -radii):
+            mask[k] = False
+            continue
+        # The interval is inside every slab
+        if np.all(center + spread <= radii) and np.all(center - spread >= -radii):
+            continue
+        # The slabs intersect if the clipped point where the linear parts vanish is in all of them
+        if center_zero is not None:
+            point = np.clip(center_zero, lower, upper)
+            if np.all(np.abs(consts + linear@point) <= radii):
+                continue
+        res = linprog(np.zeros(dim), A_ub=A_ub, b_ub=b_ub, bounds=list(zip(lower, upper)))
+        if res.status == 2:
+            # The linear program is infeasible
+            mask[k] = False
     return mask
 
+@memoize
+def chebyshev_halves(num_coeffs):
+    """Matrices mapping the coefficients of a 1D Chebyshev series on [-1,1] to the coefficients of
+    the same polynomial on [-1,0] and [0,1], each rescaled to [-1,1]. memoized for speed.
+
+    Parameters
+    ----------
+    num_coeffs : int
+        The number of coefficients in the series.
+
+    Returns
+    -------
+    left : numpy array
+        The matrix for the left half.
+    right : numpy array
+        The matrix for the right half.
+    """
+    left = np.zeros((num_coeffs, num_coeffs))
+    right = np.zeros((num_coeffs, num_coeffs))
+    for k in range(num_coeffs):
+        basis = cheb.Chebyshev.basis(k)
+        coef = basis(cheb.Chebyshev([-.5, .5])).coef
+        left[:len(coef), k] = coef
+        coef = basis(cheb.Chebyshev([.5, .5])).coef
+        right[:len(coef), k] = coef
+    return left, right
+
+def boundary_restrictions_2d(coeff):
+    """The 1D Chebyshev restrictions of a 2D Chebyshev polynomial to the edges of [-1,1]^2.
+
+    The edges are returned counterclockwise starting from the bottom left corner, each one
+    parameterized by t in [-1,1] so that increasing t moves counterclockwise.
+
+    Parameters
+    ----------
+    coeff : numpy array
+        The coefficient matrix of the polynomial, with x along the first axis.
+
+    Returns
+    -------
+    edges : list
+        The coefficients of the restrictions to the bottom, right, top and left edges.
+    """
+    x_signs = (-1.)**np.arange(coeff.shape[0])
+    y_signs = (-1.)**np.arange(coeff.shape[1])
+    bottom = coeff@y_signs
+    right = np.sum(coeff, axis=0)
+    top = np.sum(coeff, axis=1)*x_signs
+    left = (x_signs@coeff)*y_signs
+    return [bottom, right, top, left]
+
+def jacobian_is_regular_2d(polys):
+    """Checks if the Jacobian of a 2D system of Chebyshev polynomials is nonsingular everywhere on
+    [-1,1]^2.
+
+    Every partial derivative is enclosed in an interval by bounding its non-constant terms by the
+    sum of their absolute values, and the determinant of the resulting interval matrix is enclosed
+    with interval arithmetic. If the determinant can't be zero the system has at most one root in
+    the box.
+
+    Parameters
+    ----------
+    polys : list
+        The coefficient matrices of the two polynomials.
+
+    Returns
+    -------
+    jacobian_is_regular_2d : bool
+        True if every Jacobian on the box is guaranteed to be nonsingular, False otherwise.
+    """
+    lower = np.zeros((2,2))
+    upper = np.zeros((2,2))
+    for i, coeff in enumerate(polys):
+        for j in range(2):
+            if coeff.shape[j] < 2:
+                continue
+            deriv = cheb.chebder(coeff, axis=j)
+            const = deriv[0,0]
+            radius = np.sum(np.abs(deriv)) - fabs(const)
+            lower[i,j] = const - radius
+            upper[i,j] = const + radius
+    # Enclose J00*J11 - J01*J10
+    diag = [lower[0,0]*lower[1,1], lower[0,0]*upper[1,1], upper[0,0]*lower[1,1], upper[0,0]*upper[1,1]]
+    off = [lower[0,1]*lower[1,0], lower[0,1]*upper[1,0], upper[0,1]*lower[1,0], upper[0,1]*upper[1,0]]
+    det_lower = min(diag) - max(off)
+    det_upper = max(diag) - min(off)
+    return det_lower > 0 or det_upper < 0
+
+def topological_degree_2d(polys, errors, max_depth=8):
+    """Computes the topological degree of a 2D system of Chebyshev approximations on [-1,1]^2.
+
+    Each edge of the boundary is split into segments on which one of the approximations provably
+    has a constant sign, including its approximation error. The image of each segment then lies
+    in an open half plane, labeled by the function and its sign. Consecutive half planes overlap,
+    so the winding number of the boundary around the origin is the sum of the quarter turns
+    between consecutive labels. As the signs hold for anything within the approximation errors,
+    the degree is the same for the approximations and the functions they approximate.
+
+    Parameters
+    ----------
+    polys : list
+        The coefficient matrices of the two approximations.
+    errors : list
+        The bounds of the sup norm error of the approximations.
+    max_depth : int
+        How many times an edge segment can be halved before giving up.
+
+    Returns
+    -------
+    topological_degree_2d : int or None
+        The degree, which counts the roots in the box with the signs of their Jacobian
+        determinants. None if it can't be computed because the functions are too close to a
+        common zero on the boundary.
+    """
+    edges = [boundary_restrictions_2d(coeff) for coeff in polys]
+    labels = []
+    for edge in range(4):
+        restrictions = [edges[0][edge], edges[1][edge]]
+        stack = [(restrictions, 0)]
+        while stack:
+            restrictions, depth = stack.pop()
+            label = None
+            for func_num in range(2):
+                coeff = restrictions[func_num]
+                const = coeff[0]
+                if fabs(const) > np.sum(np.abs(coeff)) - fabs(const) + errors[func_num]:
+                    # 0, 1, 2, 3 are the half planes f1>0, f2>0, f1<0, f2<0
+                    label = func_num if const > 0 else func_num + 2
+                    break
+            if label is not None:
+                labels.append(label)
+                continue
+            if depth == max_depth:
+                return None
+            halves = [chebyshev_halves(len(coeff)) for coeff in restrictions]
+            # Push the right half first so the left half is labeled first
+            stack.append(([right@coeff for coeff, (left, right) in zip(restrictions, halves)], depth+1))
+            stack.append(([left@coeff for coeff, (left, right) in zip(restrictions, halves)], depth+1))
+    quarter_turns = 0
+    for label, next_label in zip(labels, labels[1:] + labels[:1]):
+        turn = (next_label - label)%4
+        if turn == 2:
+            # Opposite half planes can't overlap
+            return None
+        quarter_turns += 1 if turn == 1 else -1 if turn == 3 else 0
+    return quarter_turns//4
+
 def slices_max_min_check(test_coeff, intervals, tol):
     dim = test_coeff.ndim
     #at first just implement WRT x
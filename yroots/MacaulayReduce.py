@@ -1,6 +1,8 @@
 import numpy as np
 import itertools
-from scipy.linalg import qr, solve_triangular, qr_multiply, svd
+from scipy.linalg import qr, solve_triangular, qr_multiply, svd, eigh, get_lapack_funcs
+from scipy.sparse import bmat, identity
+from scipy.sparse.linalg import splu, onenormest, LinearOperator, norm as spnorm
 from yroots.polynomial import Polynomial, MultiCheb, MultiPower
 from yroots.utils import row_swap_matrix, MacaulayError, slice_top, mon_combos, \
                               num_mons_full, memoized_all_permutations, mons_ordered, \
@@ -65,7 +67,64 @@ def find_degree(poly_list, verbose=False):
         print('Degree of Macaulay Matrix:', sum(poly.degree for poly in poly_list) - len(poly_list) + 1)
     return sum(poly.degree for poly in poly_list) - len(poly_list) + 1
 
-def reduce_macaulay_qrt(M, cut, bezout_bound, max_cond=1e6):
+def triangular_cond(R):
+    """Estimates the 2-norm condition number of an upper triangular matrix with
+    the LAPACK condition estimator, which costs O(n^2) instead of the O(n^3) of
+    an SVD. gecon is given R as its own LU factorization, with L the identity.
+
+    gecon estimates the 1-norm condition number, which is between 1/n and n
+    times the 2-norm one. It is divided by sqrt(n), the middle of that range,
+    so the estimate can be compared with the same max_cond as np.linalg.cond.
+
+    Parameters
+    ----------
+    R : 2d ndarray
+        The upper triangular matrix.
+
+    Returns
+    -------
+    cond : float
+        The estimated condition number, inf if R is singular.
+    """
+    if R.shape[0] == 0:
+        return 1.
+    gecon, = get_lapack_funcs(('gecon',), (R,))
+    rcond, info = gecon(np.triu(R), np.linalg.norm(R, 1), norm='1')
+    return 1/(rcond*np.sqrt(R.shape[0])) if rcond > 0 else np.inf
+
+def check_bezout_rank(M, bezout_bound):
+    """Warns if the numerical rank of the Macaulay matrix doesn't match the
+    Bezout bound. This takes an SVD of the whole matrix, so the reductions only
+    run it when asked to with check_rank.
+
+    Parameters
+    ----------
+    M : 2d ndarray
+        The Macaulay matrix
+    bezout_bound : int
+        The number of roots of the system, by Bezout's Theorem
+    """
+    s = svd(M, compute_uv=False)
+    tol = max(M.shape)*s[0]*macheps
+    warn_bezout_rank(len(s[s>tol]), M.shape[1]-bezout_bound)
+
+def warn_bezout_rank(rank, bezout_rank):
+    """Warns if a numerical rank doesn't match the rank expected from the
+    Bezout bound.
+
+    Parameters
+    ----------
+    rank : int
+        The numerical rank of the Macaulay matrix
+    bezout_rank : int
+        The rank it should have
+    """
+    if rank < bezout_rank:
+        warn("Rank of Macaulay Matrix does not match the Bezout bound. Expected rank {}, found rank {}. System potentially has infinitely many solutions.".format(bezout_rank,rank))
+    elif rank > bezout_rank:
+        warn('Rank of Macaulay Matrix does not match the Bezout bound. Expected rank {}, found rank {}.'.format(bezout_rank,rank))
+
+def reduce_macaulay_qrt(M, cut, bezout_bound, max_cond=1e6, check_rank=False):
     """Reduces the Macaulay matrix using the Transposed QR method.
 
     Parameters:
@@ -74,8 +133,13 @@ def reduce_macaulay_qrt(M, cut, bezout_bound, max_cond=1e6):
         The Macaulay matrix
     cut : int
         Number of columns of max degree
+    bezout_bound : int
+        The number of roots of the system, by Bezout's Theorem
     max_cond : int or float
-        Max condition number for the two condition number checks
+        Max condition number for the condition number check
+    check_rank : bool
+        If True, warns when the numerical rank of the matrix doesn't match the
+        Bezout bound. This costs an SVD of the whole matrix.
 
     Returns:
     --------
@@ -85,24 +149,15 @@ def reduce_macaulay_qrt(M, cut, bezout_bound, max_cond=1e6):
         Matrix giving the quotient basis in terms of the monomial basis. Q2[:,i]
         being the coefficients for the ith basis element
     """
-    # Compute numerical rank
-    s = svd(M, compute_uv=False)
-    tol = max(M.shape)*s[0]*macheps
-    rank = len(s[s>tol])
-    # Check if numerical rank doesn't match bezout bound
     bezout_rank = M.shape[1]-bezout_bound
-    if rank < bezout_rank:
-        warn("Rank of Macaulay Matrix does not match the Bezout bound. Expected rank {}, found rank {}. System potentially has infinitely many solutions.".format(bezout_rank,rank))
-    elif rank > bezout_rank:
-        warn('Rank of Macaulay Matrix does not match the Bezout bound. Expected rank {}, found rank {}.'.format(bezout_rank,rank))
+    if check_rank:
+        check_bezout_rank(M, bezout_bound)
 
-    # Check condition number before first QR
-    cond_num = np.linalg.cond(M[:,:cut])
+    # QR reduce the highest-degree columns, then check their condition number
+    Q,M[:,:cut] = qr(M[:,:cut])
+    cond_num = triangular_cond(M[:cut,:cut]) if cut <= M.shape[0] else np.inf
     if cond_num > max_cond:
         return None, "Condition number of the Macaulay high-degree columns is {}".format(cond_num)
-
-    # QR reduce the highest-degree columns
-    Q,M[:,:cut] = qr(M[:,:cut])
     M[:,cut:] = Q.T @ M[:,cut:]
     Q = None
     del Q
@@ -116,7 +171,7 @@ def reduce_macaulay_qrt(M, cut, bezout_bound, max_cond=1e6):
     # Return the backsolved columns and coefficient matrix for the quotient basis
     return solve_triangular(M[:cut,:cut],M[:cut,bezout_rank:]),Q[:,-bezout_bound:]
 
-def reduce_macaulay_svd(M, cut, bezout_bound, max_cond=1e6):
+def reduce_macaulay_svd(M, cut, bezout_bound, max_cond=1e6, check_rank=False):
     """Reduces the Macaulay matrix using the Transposed QR method.
 
     Parameters:
@@ -125,8 +180,13 @@ def reduce_macaulay_svd(M, cut, bezout_bound, max_cond=1e6):
         The Macaulay matrix
     cut : int
         Number of columns of max degree
+    bezout_bound : int
+        The number of roots of the system, by Bezout's Theorem
     max_cond : int or float
-        Max condition number for the two condition number checks
+        Max condition number for the condition number check
+    check_rank : bool
+        If True, warns when the numerical rank of the matrix doesn't match the
+        Bezout bound. This costs an SVD of the whole matrix.
 
     Returns:
     --------
@@ -136,24 +196,15 @@ def reduce_macaulay_svd(M, cut, bezout_bound, max_cond=1e6):
         Matrix giving the quotient basis in terms of the monomial basis. Q2[:,i]
         being the coefficients for the ith basis element
     """
-    # Compute numerical rank
-    s = svd(M, compute_uv=False)
-    tol = max(M.shape)*s[0]*macheps
-    rank = len(s[s>tol])
-    # Check if numerical rank doesn't match bezout bound
     bezout_rank = M.shape[1]-bezout_bound
-    if rank < bezout_rank:
-        warn("Rank of Macaulay Matrix does not match the Bezout bound. Expected rank {}, found rank {}. System potentially has infinitely many solutions.".format(bezout_rank,rank))
-    elif rank > bezout_rank:
-        warn('Rank of Macaulay Matrix does not match the Bezout bound. Expected rank {}, found rank {}.'.format(bezout_rank,rank))
+    if check_rank:
+        check_bezout_rank(M, bezout_bound)
 
-    # Check condition number before first QR
-    cond_num = np.linalg.cond(M[:,:cut])
+    # QR reduce the highest-degree columns, then check their condition number
+    Q,M[:,:cut] = qr(M[:,:cut])
+    cond_num = triangular_cond(M[:cut,:cut]) if cut <= M.shape[0] else np.inf
     if cond_num > max_cond:
         return None, "Condition number of the Macaulay high-degree columns is {}".format(cond_num)
-
-    # QR reduce the highest-degree columns
-    Q,M[:,:cut] = qr(M[:,:cut])
     M[:,cut:] = Q.T @ M[:,cut:]
     Q = None
     del Q
@@ -167,25 +218,40 @@ def reduce_macaulay_svd(M, cut, bezout_bound, max_cond=1e6):
     # Return the backsolved columns and coefficient matrix for the quotient basis
     return solve_triangular(M[:cut,:cut],M[:cut,bezout_rank:]),Q[:,-bezout_bound:]
 
-def reduce_macaulay_tvb(M, cut, bezout_bound, max_cond=1e6):
-    # Compute numerical rank
-    s = svd(M, compute_uv=False)
-    tol = max(M.shape)*s[0]*macheps
-    rank = len(s[s>tol])
-    # Check if numerical rank doesn't match bezout bound
+def reduce_macaulay_tvb(M, cut, bezout_bound, max_cond=1e6, check_rank=False):
+    """Reduces the Macaulay matrix using the Telen-Van Barel method, with QR
+    with pivoting on the lower-degree columns.
+
+    Parameters:
+    -----------
+    matrix : 2d ndarray
+        The Macaulay matrix
+    cut : int
+        Number of columns of max degree
+    bezout_bound : int
+        The number of roots of the system, by Bezout's Theorem
+    max_cond : int or float
+        Max condition number for the two condition number checks
+    check_rank : bool
+        If True, warns when the numerical rank of the matrix doesn't match the
+        Bezout bound. This costs an SVD of the whole matrix.
+
+    Returns:
+    --------
+    E : 2d ndarray
+        The columns of the reduced Macaulay matrix corresponding to the quotient basis
+    P : 1d ndarray
+        The column pivots of the lower-degree columns
+    """
     bezout_rank = M.shape[1]-bezout_bound
-    if rank < bezout_rank:
-        warn("Rank of Macaulay Matrix does not match the Bezout bound. Expected rank {}, found rank {}. System potentially has infinitely many solutions.".format(bezout_rank,rank))
-    elif rank > bezout_rank:
-        warn('Rank of Macaulay Matrix does not match the Bezout bound. Expected rank {}, found rank {}.'.format(bezout_rank,rank))
+    if check_rank:
+        check_bezout_rank(M, bezout_bound)
 
-    # Check condition number before first QR
-    cond_num = np.linalg.cond(M[:,:cut])
+    # QR reduce the highest-degree columns, then check their condition number
+    Q,M[:,:cut] = qr(M[:,:cut])
+    cond_num = triangular_cond(M[:cut,:cut]) if cut <= M.shape[0] else np.inf
     if cond_num > max_cond:
         return None, "Condition number of the Macaulay high-degree columns is {}".format(cond_num)
-
-    # QR reduce the highest-degree columns
-    Q,M[:,:cut] = qr(M[:,:cut])
     M[:,cut:] = Q.T @ M[:,cut:]
     Q = None
     del Q
@@ -197,9 +263,9 @@ def reduce_macaulay_tvb(M, cut, bezout_bound, max_cond=1e6):
         M[:cut,cut:] = M[:cut,cut:][:,P] # Permute columns
 
     # Check condition number before backsolve
-    cond_num_back = np.linalg.cond(M[:bezout_rank,:bezout_rank])
+    cond_num_back = triangular_cond(M[:bezout_rank,:bezout_rank])
     if cond_num_back > max_cond:
-        return None, "Condition number of the Macaulay primary submatrix is {}".format(cond_num)
+        return None, "Condition number of the Macaulay primary submatrix is {}".format(cond_num_back)
 
     return solve_triangular(M[:bezout_rank,:bezout_rank],M[:bezout_rank,bezout_rank:]),P
 
@@ -237,3 +303,106 @@ def reduce_macaulay_p(M, cut, P, max_cond=1e6):
         return None, "Condition number of the Macaulay primary submatrix is {}".format(cond_num)
 
     return solve_triangular(M[:bezout_rank,:bezout_rank],M[:bezout_rank,bezout_rank:]),P
+
+def reduce_macaulay_sparse(M, cut, bezout_bound, max_cond=1e6, check_rank=False, block_size=64):
+    """Reduces a sparse Macaulay matrix like reduce_macaulay_svd, without
+    forming the dense matrix or a QR of its high-degree columns.
+
+    The lower-degree columns B are solved in the least squares sense against
+    the high-degree columns A through a sparse LU of the augmented system
+    [[I, A], [A^H, 0]], a few columns at a time, which gives the solution X
+    and the residual B - AX. Only the Schur complement of A^H A in M^H M,
+    S = B^H (B - AX), is kept. Its eigenvectors for the bezout_bound smallest
+    eigenvalues are the right singular vectors of the residual that span the
+    quotient basis, so X and S, with one column for each lower-degree
+    monomial, are the only dense matrices. The condition number of A is
+    estimated from the same LU.
+
+    Parameters:
+    -----------
+    M : scipy.sparse matrix
+        The Macaulay matrix
+    cut : int
+        Number of columns of max degree
+    bezout_bound : int
+        The number of roots of the system, by Bezout's Theorem
+    max_cond : int or float
+        Max condition number for the condition number check
+    check_rank : bool
+        If True, warns when the numerical rank of the matrix doesn't match the
+        Bezout bound. As S squares the singular values of the residual, the
+        rank is only found to the square root of machine epsilon.
+    block_size : int
+        How many of the lower-degree columns are solved for at a time.
+
+    Returns:
+    --------
+    E : 2d ndarray
+        The columns of the reduced Macaulay matrix corresponding to the quotient basis
+    Q2 : 2d ndarray
+        Matrix giving the quotient basis in terms of the monomial basis. Q2[:,i]
+        being the coefficients for the ith basis element
+    """
+    M = M.tocsc()
+    rows = M.shape[0]
+    if cut > rows:
+        return None, "Condition number of the Macaulay high-degree columns is {}".format(np.inf)
+    A, low = M[:,:cut], M[:,cut:]
+    num_low = low.shape[1]
+    AH = A.conj().T.tocsc()
+    try:
+        lu = splu(bmat([[identity(rows, format='csc'), A], [AH, None]], format='csc'))
+    except RuntimeError:
+        # The high-degree columns are rank deficient
+        return None, "Condition number of the Macaulay high-degree columns is {}".format(np.inf)
+    dtype = np.result_type(lu.U.dtype, low.dtype, float)
+
+    # Estimate the condition number of A from that of A^H A. With a right hand
+    # side of [0, c] the augmented system gives -(A^H A)^{-1} c.
+    gram = AH @ A
+    def gram_inv(c):
+        rhs = np.zeros((rows + cut,) + c.shape[1:], dtype=np.result_type(dtype, c.dtype))
+        rhs[rows:] = c
+        return -lu.solve(rhs)[rows:]
+    gram_inv = LinearOperator((cut, cut), matvec=gram_inv, rmatvec=gram_inv,
+                              matmat=gram_inv, dtype=dtype)
+    cond_num = np.sqrt(spnorm(gram, 1)*onenormest(gram_inv))
+    if cond_num > max_cond:
+        return None, "Condition number of the Macaulay high-degree columns is {}".format(cond_num)
+
+    # Solve the lower-degree columns against A a block at a time, keeping X
+    # and the Schur complement S
+    X = np.empty((cut, num_low), dtype=dtype)
+    S = np.empty((num_low, num_low), dtype=dtype)
+    lowH = low.conj().T.tocsr()
+    rhs = np.zeros((rows + cut, min(block_size, num_low)), dtype=dtype)
+    for start in range(0, num_low, block_size):
+        stop = min(start + block_size, num_low)
+        rhs[:rows,:stop-start] = low[:,start:stop].toarray()
+        sol = lu.solve(rhs[:,:stop-start])
+        X[:,start:stop] = sol[rows:]
+        S[:,start:stop] = lowH @ sol[:rows]
+    rhs = sol = None
+
+ 
+    # The eigenvalues of S are the squared singular values of the residual,
+    # only known to about macheps times its norm
+    vals, V = eigh(S, overwrite_a=True, check_finite=False)
+    S = None
+    tol = max(M.shape)*vals[-1]*macheps if num_low else 0
+
+    if check_rank:
+        # A is full rank since its condition number is small
+        warn_bezout_rank(M.shape[1] - np.sum(vals <= tol), M.shape[1]-bezout_bound)
+
+    # Squaring the singular values squares the error in the quotient basis, so
+    # take one Newton step for the null space of the residual, like corrected
+    # semi-normal equations. The residual is applied as B - AX, without S.
+    V, V_rest, vals_rest = V[:,:bezout_bound], V[:,bezout_bound:], vals[bezout_bound:]
+    residual = low @ V - A @ (X @ V)
+    step = V_rest.conj().T @ (lowH @ residual - X.conj().T @ (AH @ residual))
+    step /= np.where(vals_rest > tol, vals_rest, np.inf)[:,np.newaxis]
+    V = qr(V - V_rest @ step, mode='economic')[0]
+
+    # Return the solved columns and coefficient matrix for the quotient basis
+    return X @ V,V
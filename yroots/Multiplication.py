@@ -1,18 +1,21 @@
 import numpy as np
 import itertools
-from scipy.linalg import solve_triangular, eig, schur
+from scipy.linalg import solve_triangular, schur, lu_factor, lu_solve
 from yroots.LinearProjection import nullspace
 from yroots.polynomial import MultiCheb, MultiPower, is_power
 from yroots.MacaulayReduce import reduce_macaulay_qrt, find_degree, \
-                              add_polys, reduce_macaulay_tvb, reduce_macaulay_svd
+                              add_polys, reduce_macaulay_tvb, \
+                              reduce_macaulay_svd, reduce_macaulay_sparse, triangular_cond
 from yroots.utils import row_swap_matrix, MacaulayError, slice_top, get_var_list, \
                               mon_combos, mon_combosHighest, sort_polys_by_degree, \
                               deg_d_polys, all_permutations_cheb,\
-                              newton_polish, condeigs, solve_linear, memoize
+                              newton_polish, condeigs, condeigs_schur, solve_linear, memoize, lru_memoize
 import warnings
 from scipy.stats import ortho_group
+from scipy.sparse import coo_matrix
+from scipy.sparse.linalg import eigs, LinearOperator, ArpackError
 
-def multiplication(polys, max_cond_num, verbose=False, return_all_roots=True,method='svd'):
+def multiplication(polys, max_cond_num, verbose=False, return_all_roots=True,method='svd',return_conds=False,check_rank=False,in_box=False):
     '''
     Finds the roots of the given list of multidimensional polynomials using a multiplication matrix.
 
@@ -26,10 +29,23 @@ def multiplication(polys, max_cond_num, verbose=False, return_all_roots=True,met
         Prints information about how the roots are computed.
     return_all_roots : bool
         If True returns all the roots, otherwise just the ones in the unit box.
+    return_conds : bool
+        If True also returns the condition numbers of the eigenvalues the roots
+        came from.
+    check_rank : bool
+        If True, warns when the numerical rank of the Macaulay matrix doesn't
+        match the Bezout bound. This costs an extra SVD.
+    in_box : bool
+        If True only the eigenvalues that can come from roots in the unit box
+        are computed, with shift-invert Arnoldi. This is faster for large
+        Möller-Stetter matrices, and implies return_all_roots=False.
     returns
     -------
     roots : numpy array
         The common roots of the polynomials. Each row is a root.
+    conds : numpy array
+        The condition number of each root, if return_conds is True. They are
+        nan when the system is linear or in_box is True.
     '''
     #We don't want to use Linear Projection right now
 #    polys, transform, is_projected = polys, lambda x:x, False
@@ -43,7 +59,7 @@ def multiplication(polys, max_cond_num, verbose=False, return_all_roots=True,met
     #By Bezout's Theorem. Useful for making sure that the reduced Macaulay Matrix is as we expect
     bezout_bound = np.prod([poly.degree for poly in polys])
 
-    matrix, matrix_terms, cut = build_macaulay(polys, verbose)
+    matrix, matrix_terms, cut = build_macaulay(polys, verbose, sparse=(method == 'sparse'))
 
     roots = np.array([])
 
@@ -53,51 +69,61 @@ def multiplication(polys, max_cond_num, verbose=False, return_all_roots=True,met
         roots, cond = solve_linear([p.coeff for p in polys])
         # Make sure roots is a 2D array.
         roots = np.array([roots])
+        conds = np.full(1, np.nan)
     else:
         # Attempt to reduce the Macaulay matrix
         if method == 'svd':
-            res = reduce_macaulay_svd(matrix,cut,bezout_bound,max_cond_num)
+            res = reduce_macaulay_svd(matrix,cut,bezout_bound,max_cond_num,check_rank)
             if res[0] is None:
                 return res
             E,Q = res
         elif method == 'qrt':
-            res = reduce_macaulay_qrt(matrix,cut,bezout_bound,max_cond_num)
+            res = reduce_macaulay_qrt(matrix,cut,bezout_bound,max_cond_num,check_rank)
             if res[0] is None:
                 return res
             E,Q = res
         elif method == 'tvb':
-            res = reduce_macaulay_tvb(matrix,cut,bezout_bound,max_cond_num)
+            res = reduce_macaulay_tvb(matrix,cut,bezout_bound,max_cond_num,check_rank)
+            if res[0] is None:
+                return res
+            E,Q = res
+        elif method == 'sparse':
+            res = reduce_macaulay_sparse(matrix,cut,bezout_bound,max_cond_num,check_rank)
             if res[0] is None:
                 return res
             E,Q = res
         else:
-            raise ValueError("Method must be one of 'svd','qrt' or 'tvb'")
+            raise ValueError("Method must be one of 'svd','qrt','tvb' or 'sparse'")
 
         # Construct the Möller-Stetter matrices
         # M is a 3d array containing the multiplication-by-x_i matrix in M[...,i]
         if poly_type == "MultiCheb":
-            if method == 'qrt' or method == 'svd':
+            if method == 'qrt' or method == 'svd' or method == 'sparse':
                 M = ms_matrices_cheb(E,Q,matrix_terms,dim)
             elif method == 'tvb':
                 M = ms_matrices_p_cheb(E,Q,matrix_terms,dim,cut)
 
         else:
-            if method == 'qrt' or method == 'svd':
+            if method == 'qrt' or method == 'svd' or method == 'sparse':
                 M = ms_matrices(E,Q,matrix_terms,dim)
             elif method == 'tvb':
                 M = ms_matrices_p(E,Q,matrix_terms,dim,cut)
 
         # Compute the roots using eigenvalues of the Möller-Stetter matrices
-        roots = msroots(M)
+        roots, conds = msroots(M, return_conds=True, in_box=in_box)
 
-    if return_all_roots:
-        return roots
-    else:
+    if not return_all_roots or in_box:
         # only return roots in the unit complex hyperbox
-        return roots[[np.all(np.abs(root) <= 1) for root in roots]]
+        mask = [np.all(np.abs(root) <= 1) for root in roots]
+        roots, conds = roots[mask], conds[mask]
+    if return_conds:
+        return roots, conds
+    return roots
 
+@lru_memoize()
 def indexarray(matrix_terms,m,var):
-    """Compute the array mapping monomials under multiplication by x_var
+    """Compute the array mapping monomials under multiplication by x_var.
+    Memoized on the contents of matrix_terms, so the returned array is read only.
 
     Parameters
     ----------
@@ -119,10 +145,14 @@ def indexarray(matrix_terms,m,var):
     """
     mults = matrix_terms[m:].copy()
     mults[:,var] += 1
-    return np.argmin(np.abs(mults[:,np.newaxis] - matrix_terms[np.newaxis]).sum(axis=-1),axis=1)
+    arr = term_positions(matrix_terms,mults)
+    arr.flags.writeable = False
+    return arr
 
+@lru_memoize()
 def indexarray_cheb(matrix_terms,m,var):
-    """Compute the array mapping Chebyshev monomials under multiplication by x_var:
+    """Compute the array mapping Chebyshev monomials under multiplication by x_var.
+    Memoized on the contents of matrix_terms, so the returned arrays are read only.
 
         T_1*T_0 = T_1
         T_1*T_n = .5(T_(n+1)+ T_(n-1))
@@ -151,10 +181,37 @@ def indexarray_cheb(matrix_terms,m,var):
     down = matrix_terms[m:].copy()
     down[:,var] -= 1
     down[down[:,var]==-1,var] += 2
-    arr1 = np.argmin(np.abs(up[:,np.newaxis] - matrix_terms[np.newaxis]).sum(axis=-1),axis=1)
-    arr2 = np.argmin(np.abs(down[:,np.newaxis] - matrix_terms[np.newaxis]).sum(axis=-1),axis=1)
+    arr1 = term_positions(matrix_terms,up)
+    arr2 = term_positions(matrix_terms,down)
+    arr1.flags.writeable = False
+    arr2.flags.writeable = False
     return arr1,arr2
 
+def term_positions(matrix_terms,terms):
+    """Finds where each of some monomials is in matrix_terms. Each monomial is
+    encoded as a single integer by reading its exponents as the digits of a
+    number in a base one bigger than any exponent, so the lookup is a binary
+    search of the sorted codes of matrix_terms instead of a comparison with
+    every monomial.
+
+    Parameters
+    ----------
+    matrix_terms : 2d integer ndarray
+        Array containing the monomials in order.
+    terms : 2d integer ndarray
+        The monomials to look up. Each one must be in matrix_terms, and no
+        exponent can be more than one bigger than those in matrix_terms.
+
+    Returns
+    -------
+    arr : 1d integer ndarray
+        The index of each monomial of terms in matrix_terms.
+    """
+    place_values = (np.max(matrix_terms) + 2)**np.arange(matrix_terms.shape[1], dtype=np.int64)
+    codes = matrix_terms@place_values
+    order = np.argsort(codes)
+    return order[np.searchsorted(codes[order], terms@place_values)]
+
 def ms_matrices(E,Q,matrix_terms,dim):
     """Compute the Möller-Stetter matrices in the monomial basis
 
@@ -198,24 +255,27 @@ def ms_matrices_cheb(E,Q,matrix_terms,dim):
     dim : int
         Number of variables
 
+    E and Q can also be stacks of these for several systems, in which case M
+    is stacked the same way.
+
     Returns
     -------
     M : (n,n,dim) ndarray
         Array containing the nxn Möller-Stetter matrices, where the matrix
         corresponding to multiplication by x_i is M[...,i]
     """
-    n = Q.shape[1]
-    m = E.shape[0]
-    M = np.empty((n,n,dim))
-    A = np.hstack((-E.T,Q.T))
+    n = Q.shape[-1]
+    m = E.shape[-2]
+    M = np.empty(Q.shape[:-2]+(n,n,dim))
+    A = np.concatenate((-np.swapaxes(E,-1,-2),np.swapaxes(Q,-1,-2)),axis=-1)
     for i in range(dim):
         arr1,arr2 = indexarray_cheb(matrix_terms,m,i)
-        M[...,i] = .5*(A[:,arr1]+A[:,arr2])@Q
+        M[...,i] = .5*(A[...,arr1]+A[...,arr2])@Q
     return M
 
 def ms_matrices_p(E,P,matrix_terms,dim,cut):
     r,n = E.shape
-    matrix_terms[cut:] = matrix_terms[cut:][P]
+    matrix_terms = np.vstack((matrix_terms[:cut], matrix_terms[cut:][P]))
     M = np.empty((n,n,dim))
     A = np.hstack((-E.T,np.eye(n)))
     for i in range(dim):
@@ -245,7 +305,7 @@ def ms_matrices_p_cheb(E,P,matrix_terms,dim,cut):
         corresponding to multiplication by x_i is M[...,i]
     """
     r,n = E.shape
-    matrix_terms[cut:] = matrix_terms[cut:][P]
+    matrix_terms = np.vstack((matrix_terms[:cut], matrix_terms[cut:][P]))
     M = np.empty((n,n,dim))
     A = np.hstack((-E.T,np.eye(n)))
     for i in range(dim):
@@ -253,31 +313,6 @@ def ms_matrices_p_cheb(E,P,matrix_terms,dim,cut):
         M[...,i] = .5*(A[:,arr1]+A[:,arr2])
     return M
 
-def sort_eigs(eigs,diag):
-    """Sorts the eigs array to match the order on the diagonal
-    of the Schur factorization
-
-    Parameters
-    ----------
-    eigs : 1d ndarray
-        Array of unsorted eigenvalues
-    diag : 1d complex ndarray
-        Array containing the diagonal of the approximate Schur factorization
-
-    Returns
-    -------
-    w : 1d ndarray
-        Eigenvalues from eigs sorted to match the order in diag
-    """
-    n = diag.shape[0]
-    lst = list(range(n))
-    arr = []
-    for eig in eigs:
-        i = lst[np.argmin(np.abs(diag[lst]-eig))]
-        arr.append(i)
-        lst.remove(i)
-    return np.argsort(arr)
-
 @memoize
 def get_Q_c(dim):
     """Generates a once-chosen random orthogonal matrix and a random linear combination
@@ -300,44 +335,239 @@ def get_Q_c(dim):
     c = np.random.randn(dim)
     return Q,c
 
-def msroots(M):
+def msroots(M, return_conds=False, in_box=False):
     """Computes the roots to a system via the eigenvalues of the Möller-Stetter
     matrices. Implicitly performs a random rotation of the coordinate system
     to avoid repeated eigenvalues arising from special structure in the underlying
     polynomial system. Approximates the joint eigenvalue problem using a Schur
-    factorization of a linear combination of the matrices.
+    factorization of a linear combination of the matrices. The matrices commute,
+    so the U of that factorization triangularizes all of them, and each
+    coordinate of the roots is the diagonal of U^H M[...,i] U.
 
     Parameters
     ----------
     M : (n,n,dim) ndarray
         Array containing the nxn Möller-Stetter matrices, where the matrix
         corresponding to multiplication by x_i is M[...,i]
+    return_conds : bool
+        If True also returns the condition numbers of the eigenvalues of the
+        linear combination, computed from its Schur form.
+    in_box : bool
+        If True only finds the eigenvalues that can come from roots in the
+        complex unit box, with msroots_in_box. Some roots outside the box can
+        still be returned.
 
     Returns
     -------
     roots : (n,dim) ndarray
         Array containing the approximate roots of the system, where each row
         is a root.
+    conds : (n,) ndarray
+        The condition number of the eigenvalue each root came from, if
+        return_conds is True. They are nan if in_box is True.
     """
+    if in_box:
+        roots = msroots_in_box(M)
+        if roots is not None:
+            return (roots, np.full(len(roots), np.nan)) if return_conds else roots
+
     dim = M.shape[-1]
 
     # perform a random rotation with a random orthogonal Q
     Q,c = get_Q_c(dim)
     M = (Q@M[...,np.newaxis])[...,0]
 
-    eigs = np.empty((dim,M.shape[0]),dtype='complex')
     # Compute the matrix U that triangularizes a random linear combination
-    U = schur((M*c).sum(axis=-1),output='complex')[1]
+    T0,U = schur((M*c).sum(axis=-1),output='complex')
 
-    for i in range(0,dim):
-        T = (U.conj().T)@(M[...,i])@U
-        w = eig(M[...,i],right=False)
-        arr = sort_eigs(w,np.diag(T))
-        eigs[i] = w[arr]
+    # The diagonal of U^H M[...,i] U for each i
+    eigs = np.einsum('ji,lji->li',U.conj(),np.moveaxis(M,-1,0)@U)
 
     # Rotate back before returning, transposing to match expected shape
+    if return_conds:
+        return (Q.T@eigs).T, condeigs_schur(T0)
     return (Q.T@eigs).T
 
+def msroots_in_box(M, k=16, residual_tol=1.e-10):
+    """Computes the roots of a system that can be in the complex unit box from
+    the Möller-Stetter matrices, without finding all their eigenvalues.
+
+    For a random linear combination c, the eigenvalue of sum c_i M[...,i]
+    that comes from a root x is c.x, so the roots in the box give eigenvalues
+    with |c.x| <= |c|_1. Shift-invert Arnoldi finds the k eigenvalues closest
+    to a once-chosen random shift in that disk, and k is increased until one of
+    them is farther from the shift than the whole disk, assuming the
+    eigenvalues found so far are as dense as the rest of the disk. The shift
+    isn't 0, which is an eigenvalue whenever the system has a root at the
+    origin. The matrices commute, so each coordinate of a root is the Rayleigh
+    quotient of M[...,i] at the eigenvector, which has to be an eigenvector of
+    every M[...,i] to within residual_tol.
+
+    Parameters
+    ----------
+    M : (n,n,dim) ndarray
+        The Möller-Stetter matrices, where M[...,i] is multiplication by x_i.
+    k : int
+        The number of eigenvalues to find at first.
+    residual_tol : float
+        How big |M[...,i]v - x_i v| can be, relative to the 1-norm of
+        M[...,i], for a unit eigenvector v.
+
+    Returns
+    -------
+    roots : (m,dim) ndarray or None
+        The roots whose eigenvalues are in the disk, some of which can be
+        outside the box. None if the matrices are too small for Arnoldi, more
+        than a quarter of the eigenvalues would be needed, Arnoldi fails or
+        doesn't converge, or an eigenvector isn't accurate enough.
+    """
+    n, dim = M.shape[0], M.shape[-1]
+    # A complex combination keeps real roots outside the box away from the disk
+    Q, c = get_Q_c(dim)
+    c = c + 1j*Q[0]
+    L = (M*c).sum(axis=-1)
+    radius = np.sum(np.abs(c))
+    # Shift by a random point within |c|_1/100 of 0, so the disk to search is barely bigger
+    r, theta = np.random.RandomState(104).uniform(size=2)
+    shift = .01*radius*np.sqrt(r)*np.exp(2j*np.pi*theta)
+    # ARPACK needs k < n-1
+    if min(k, n) >= n-1:
+        return None
+
+    # Factor once to use for every k
+    factors = lu_factor(L - shift*np.eye(n), check_finite=False)
+    if not np.all(np.isfinite(factors[0])) or np.any(np.diag(factors[0]) == 0):
+        return None
+    OPinv = LinearOperator(L.shape, matvec=lambda v: lu_solve(factors, v, check_finite=False), dtype=L.dtype)
+    while True:
+        try:
+            vals, vecs = eigs(L, k=k, sigma=shift, OPinv=OPinv)
+        except ArpackError:
+            return None
+        farthest = np.max(np.abs(vals - shift))
+        if farthest > radius + np.abs(shift):
+            break
+        k = max(2*k, int(1.2*k*((radius + np.abs(shift))/farthest)**2))
+        if k > n//4:
+            # Arnoldi for that many eigenvalues costs more than a dense Schur factorization
+            return None
+
+    vecs = vecs[:,np.abs(vals) <= radius]
+    vecs /= np.linalg.norm(vecs, axis=0)
+    MV = np.moveaxis(M,-1,0)@vecs
+    roots = np.einsum('ji,lji->il', vecs.conj(), MV)
+    residuals = np.linalg.norm(MV - roots.T[:,np.newaxis]*vecs, axis=1)
+    if np.any(residuals > residual_tol*np.linalg.norm(M, 1, axis=(0,1))[:,np.newaxis]):
+        return None
+    return roots
+
+def msroots_batch(M, max_cond=1.e6):
+    """Computes the roots of several systems at once from a stack of their
+    Möller-Stetter matrices, like msroots with return_conds=True.
+
+    The random linear combinations of all the systems are diagonalized with one
+    stacked eig. As the matrices commute, each coordinate of the roots is the
+    diagonal of X^-1 M[...,i] X for the eigenvectors X. The condition number of
+    an eigenvalue is the norm of its right eigenvector times the norm of its
+    left eigenvector, the matching row of X^-1. That loses accuracy when X is
+    ill conditioned, as it is near a multiple root, so those systems are solved
+    one at a time with the Schur factorization in msroots instead.
+
+    Parameters
+    ----------
+    M : (k,n,n,dim) ndarray
+        The Möller-Stetter matrices of k systems.
+    max_cond : float
+        The largest condition number of X a system is solved with.
+
+    Returns
+    -------
+    roots : (k,n,dim) ndarray
+        The roots of each system.
+    conds : (k,n) ndarray
+        The condition number of the eigenvalue each root came from.
+    """
+    dim = M.shape[-1]
+    roots = np.empty(M.shape[:2] + (dim,), dtype=complex)
+    conds = np.empty(M.shape[:2])
+
+    # perform a random rotation with a random orthogonal Q
+    Q,c = get_Q_c(dim)
+    rotated = (Q@M[...,np.newaxis])[...,0]
+
+    X = np.linalg.eig((rotated*c).sum(axis=-1))[1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        good = np.linalg.cond(X) <= max_cond
+    if np.any(good):
+        X = X[good]
+        X_inv = np.linalg.inv(X)
+        eigs = np.einsum('kij,kjlm,kli->kim',X_inv,rotated[good],X)
+        # Rotate back
+        roots[good] = eigs@Q
+        conds[good] = np.linalg.norm(X,axis=-2)*np.linalg.norm(X_inv,axis=-1)
+    for i in np.flatnonzero(~good):
+        roots[i], conds[i] = msroots(M[i], return_conds=True)
+    return roots, conds
+
+def multiplication_batch(coeffs, max_cond_num):
+    '''
+    Finds the roots of several systems of Chebyshev polynomials of the same
+    shapes at once, like multiplication with method='svd' and return_conds=True.
+    The Macaulay matrices are built as one 3D stack, and the QR, SVD and
+    eigenvalue problems of all the systems are each one stacked numpy call.
+
+    Parameters
+    ----------
+    coeffs : list of ndarrays
+        coeffs[i][j] is the Chebyshev coefficient tensor of the ith polynomial
+        of the jth system. The ith polynomials have total degree
+        coeffs[i].shape[1]-1, and they can't all be linear.
+    max_cond_num : float
+        The maximum condition number of the Macaulay Matrix Reduction
+    returns
+    -------
+    roots : list
+        The roots of each system, with one root in each row, or None if the
+        Macaulay matrix of the system was too ill conditioned.
+    conds : list
+        The condition number of each root, or None.
+    '''
+    num, dim = len(coeffs[0]), len(coeffs)
+    degrees = [coeff.shape[1]-1 for coeff in coeffs]
+    degree = sum(degrees) - dim + 1
+    bezout_bound = np.prod(degrees)
+    roots, conds = [None]*num, [None]*num
+
+    # Build the Macaulay matrices
+    matrix_terms, cut = sorted_matrix_terms(degree, dim)
+    kinds = tuple((coeff.shape[1:], poly_degree) for coeff, poly_degree in zip(coeffs, degrees))
+    rows, cols, spots, weights, num_rows = macaulay_indices(degree, False, kinds)
+    num_cols = len(matrix_terms)
+    if cut >= num_rows:
+        # There are no lower-degree rows to find a quotient basis from
+        return roots, conds
+    vals = weights*np.concatenate([coeff.reshape(num, -1) for coeff in coeffs], axis=1)[:,spots]
+    places = (np.arange(num)[:,np.newaxis]*num_rows + rows)*num_cols + cols
+    matrices = np.bincount(places.ravel(), vals.ravel(), num*num_rows*num_cols).reshape(num, num_rows, num_cols)
+
+    # QR reduce the highest-degree columns, like reduce_macaulay_svd
+    Q, R = np.linalg.qr(matrices[...,:cut], mode='complete')
+    R = R[:,:cut]
+    good = np.flatnonzero([triangular_cond(R_) <= max_cond_num for R_ in R])
+    if len(good) == 0:
+        return roots, conds
+    lower = np.swapaxes(Q[good],-1,-2)@matrices[good][...,cut:]
+
+    # Orthogonally transform the remaining columns and backsolve
+    V = np.swapaxes(np.linalg.svd(lower[:,cut:])[2].conj(),-1,-2)[...,-bezout_bound:]
+    E = np.array([solve_triangular(R_, B) for R_, B in zip(R[good], lower[:,:cut]@V)])
+
+    M = ms_matrices_cheb(E, V, matrix_terms, dim)
+    good_roots, good_conds = msroots_batch(M)
+    for i, system_roots, system_conds in zip(good, good_roots, good_conds):
+        roots[i], conds[i] = system_roots, system_conds
+    return roots, conds
+
 def MSMultMatrix(polys, poly_type, max_cond_num, macaulay_zero_tol, verbose=False, MSmatrix=0):
     '''
     Finds the multiplication matrix using the reduced Macaulay matrix.
@@ -421,7 +651,7 @@ def MSMultMatrix(polys, poly_type, max_cond_num, macaulay_zero_tol, verbose=Fals
 
     return mMatrix, var_dict, basisDict, VB
 
-def build_macaulay(initial_poly_list, verbose=False):
+def build_macaulay(initial_poly_list, verbose=False, sparse=False):
     """Constructs the unreduced Macaulay matrix. Removes linear polynomials by
     substituting in for a number of variables equal to the number of linear
     polynomials.
@@ -432,9 +662,12 @@ def build_macaulay(initial_poly_list, verbose=False):
         The polynomials in the system we are solving.
     verbose : bool
         Prints information about how the roots are computed.
+    sparse : bool
+        If True the matrix is built as a scipy.sparse CSR matrix, without
+        making the dense matrix or keeping all the dense multiples.
     Returns
     -----------
-    matrix : 2d ndarray
+    matrix : 2d ndarray or scipy.sparse.csr_matrix
         The Macaulay matrix
     matrix_terms : 2d integer ndarray
         Array containing the ordered basis, where the ith row contains the
@@ -477,13 +710,12 @@ def build_macaulay(initial_poly_list, verbose=False):
     #     A,Pc = None,None
     #     varsToRemove = []
 
-    #add nonlinear polys to poly_coeff_list
-    for poly in initial_poly_list:#nonlinear_polys:
-        poly_coeff_list = add_polys(degree, poly, poly_coeff_list)
+    if sparse:
+        return create_sparse_matrix(initial_poly_list, degree, dim)
 
     #Creates the matrix
     # return (*create_matrix(poly_coeff_list, degree, dim, varsToRemove), A, Pc)
-    return create_matrix(poly_coeff_list, degree, dim)#, varsToRemove)
+    return scatter_matrix(initial_poly_list, degree, dim)#, varsToRemove)
 
 def makeBasisDict(matrix, matrix_terms, VB, power):
     '''Calculates and returns the basisDict.
@@ -529,19 +761,48 @@ def makeBasisDict(matrix, matrix_terms, VB, power):
 
     return basisDict
 
-def create_matrix(poly_coeffs, degree, dim):#, varsToRemove):
-    ''' Builds a Macaulay matrix.
+def create_sparse_matrix(polys, degree, dim):
+    ''' Builds a Macaulay matrix as a sparse matrix, with the same rows and
+    columns as scatter_matrix.
 
     Parameters
     ----------
-    poly_coeffs : list.
-        Contains numpy arrays that hold the coefficients of the polynomials to be put in the matrix.
+    polys : list.
+        The polynomials whose monomial multiples go in the matrix.
+    degree : int
+        The degree of the Macaulay Matrix
+    dim : int
+        The dimension of the polynomials going into the matrix.
+    Returns
+    -------
+    matrix : scipy.sparse.csr_matrix
+        The Macaulay matrix.
+    matrix_terms : numpy array
+        The ith row is the term represented by the ith column of the matrix.
+    cut : int
+        Number of monomials of highest degree
+    '''
+    matrix_terms, cut = sorted_matrix_terms(degree, dim)
+    rows, cols, vals, num_rows = macaulay_entries(polys, degree)
+    matrix = coo_matrix((vals, (rows, cols)), shape=(num_rows, len(matrix_terms))).tocsr()
+    matrix.eliminate_zeros()
+    matrix.sort_indices()
+    return matrix, matrix_terms, cut
+
+def scatter_matrix(polys, degree, dim):
+    ''' Builds a Macaulay matrix by scattering the coefficients of the
+    polynomials straight into it with the indices from macaulay_template.
+    Gives the Macaulay matrix of the monomial multiples of the polynomials,
+    with its rows sorted by row_swap_matrix, without computing the multiples.
+
+    Parameters
+    ----------
+    polys : list.
+        The polynomials whose monomial multiples go in the matrix.
     degree : int
         The degree of the Macaulay Matrix
     dim : int
         The dimension of the polynomials going into the matrix.
-    varsToRemove : list
-        The variables to remove from the basis because we have linear polysnomials
     Returns
     -------
     matrix : 2D numpy array
@@ -551,35 +812,161 @@ def create_matrix(poly_coeffs, degree, dim):#, varsToRemove):
     cut : int
         Number of monomials of highest degree
     '''
-    bigShape = [degree+1]*dim
-
-    matrix_terms, cut = sorted_matrix_terms(degree, dim)#, varsToRemove)
-
-    #Get the slices needed to pull the matrix_terms from the coeff matrix.
-    matrix_term_indexes = list()
-    for row in matrix_terms.T:
-        matrix_term_indexes.append(row)
-
-    #Adds the poly_coeffs to flat_polys, using added_zeros to make sure every term is in there.
-    added_zeros = np.zeros(bigShape)
-    flat_polys = list()
-    for coeff in poly_coeffs:
-        slices = slice_top(coeff.shape)
-        added_zeros[slices] = coeff
-        flat_polys.append(added_zeros[tuple(matrix_term_indexes)])
-        added_zeros[slices] = np.zeros_like(coeff)
-    del poly_coeffs
-
-    #Make the matrix. Reshape is faster than stacking.
-    matrix = np.reshape(flat_polys, (len(flat_polys),len(matrix_terms)))
-
-    #Sorts the rows of the matrix so it is close to upper triangular.
-    matrix = row_swap_matrix(matrix)
+    matrix_terms, cut = sorted_matrix_terms(degree, dim)
+    rows, cols, vals, num_rows = macaulay_entries(polys, degree)
+    num_cols = len(matrix_terms)
+    matrix = np.bincount(rows*num_cols + cols, vals, num_rows*num_cols).reshape(num_rows, num_cols)
     return matrix, matrix_terms, cut
 
+def macaulay_entries(polys, degree):
+    ''' Finds the entries of the Macaulay matrix of some polynomials, with the
+    rows already sorted so the matrix is close to upper triangular. Only the
+    coefficients are looked up on each call, the indices come from
+    macaulay_indices.
+
+    Parameters
+    ----------
+    polys : list.
+        The polynomials whose monomial multiples go in the matrix.
+    degree : int
+        The degree of the Macaulay Matrix
+    Returns
+    -------
+    rows : 1d integer ndarray
+        The row of each entry.
+    cols : 1d integer ndarray
+        The column of each entry. The same spot can show up more than once, in
+        which case the entries add.
+    vals : 1d ndarray
+        The value of each entry.
+    num_rows : int
+        The number of rows in the matrix.
+    '''
+    kinds = tuple((poly.coeff.shape, poly.degree) for poly in polys)
+    rows, cols, spots, weights, num_rows = macaulay_indices(degree, is_power(polys), kinds)
+    vals = weights*np.concatenate([poly.coeff.ravel() for poly in polys])[spots]
+    return rows, cols, vals, num_rows
+
+@lru_memoize(64)
+def macaulay_indices(degree, power, kinds):
+    ''' Finds where every coefficient of a system of polynomials goes in its
+    Macaulay matrix, with the rows sorted by their leading column like
+    row_swap_matrix. The leading column of a row is where the leading term
+    of that multiple goes, so the order only depends on the shapes and
+    degrees of the polynomials, and building the matrix for a system seen
+    before only costs a scatter of its coefficients. Memoized, so the returned
+    arrays are read only.
+
+    Parameters
+    ----------
+    degree : int
+        The degree of the Macaulay Matrix
+    power : bool
+        True for the power basis, False for the Chebyshev basis.
+    kinds : tuple
+        The shape of the coefficient array and the degree of each polynomial.
+    Returns
+    -------
+    rows : 1d integer ndarray
+        The row each entry goes in.
+    cols : 1d integer ndarray
+        The column each entry goes in.
+    spots : 1d integer ndarray
+        The index in the concatenated raveled coefficient arrays each entry
+        comes from.
+    weights : 1d ndarray
+        What to multiply each coefficient by.
+    num_rows : int
+        The number of rows in the matrix.
+    '''
+    all_rows, all_cols, all_spots, all_weights = [], [], [], []
+    num_rows = num_spots = 0
+    for shape, poly_degree in kinds:
+        rows, cols, spots, weights, poly_rows = macaulay_template(degree, shape, poly_degree, power)
+        all_rows.append(rows + num_rows)
+        all_cols.append(cols)
+        all_spots.append(spots + num_spots)
+        all_weights.append(weights)
+        num_rows += poly_rows
+        num_spots += np.prod(shape)
+    rows, cols = np.concatenate(all_rows), np.concatenate(all_cols)
+
+    #Sorts the rows by their leading column.
+    leading = np.full(num_rows, np.iinfo(cols.dtype).max)
+    np.minimum.at(leading, rows, cols)
+    order = np.empty(num_rows, dtype=int)
+    order[np.argsort(leading)] = np.arange(num_rows)
+    arrays = order[rows], cols, np.concatenate(all_spots), np.concatenate(all_weights)
+    for arr in arrays:
+        arr.flags.writeable = False
+    return (*arrays, num_rows)
+
+def macaulay_template(degree, shape, poly_degree, power):
+    ''' Finds where every coefficient of a polynomial goes in the rows of a
+    Macaulay matrix holding its monomial multiples.
+
+    In the power basis x^m x^a = x^(m+a). In the Chebyshev basis
+    T_m T_a = (T_(m+a) + T_|m-a|)/2 in each variable, so each coefficient goes
+    to 2^dim spots with weight 1/2^dim, some of which are the same. Coefficients
+    of terms above poly_degree are zero, so they are skipped.
+
+    Parameters
+    ----------
+    degree : int
+        The degree of the Macaulay Matrix
+    shape : tuple
+        The shape of the coefficient array of the polynomial.
+    poly_degree : int
+        The degree of the polynomial.
+    power : bool
+        True for the power basis, False for the Chebyshev basis.
+    Returns
+    -------
+    rows : 1d integer ndarray
+        The row each entry goes in, counting from the first multiple.
+    cols : 1d integer ndarray
+        The column each entry goes in.
+    spots : 1d integer ndarray
+        The index in the raveled coefficient array each entry comes from.
+    weights : 1d ndarray
+        What to multiply each coefficient by.
+    num_rows : int
+        The number of multiples.
+    '''
+    dim = len(shape)
+    matrix_terms, cut = sorted_matrix_terms(degree, dim)
+    mons = np.array(mon_combos([0]*dim, degree - poly_degree)).reshape(-1, dim)
+    terms = np.indices(shape).reshape(dim, -1).T
+    term_spots = np.flatnonzero(terms.sum(axis=1) <= poly_degree)
+    terms = terms[term_spots]
+
+    num_rows, num_terms = len(mons), len(terms)
+    rows = np.repeat(np.arange(num_rows), num_terms)
+    spots = np.tile(np.arange(num_terms), len(mons))
+    mons, terms = mons[rows], terms[spots]
+    if power:
+        products = [mons + terms]
+        weight = 1.
+    else:
+        products = [np.where(ups, mons + terms, np.abs(mons - terms)) for ups in itertools.product([True, False], repeat=dim)]
+        weight = .5**dim
+    products = np.concatenate(products)
+    rows = np.tile(rows, len(products)//len(rows))
+    spots = np.tile(spots, len(products)//len(spots))
+
+    #The column of each term, -1 for the terms not in the matrix.
+    columns = np.full(np.max(products, axis=0) + 1, -1)
+    in_range = np.all(matrix_terms < columns.shape, axis=1)
+    columns[tuple(matrix_terms[in_range].T)] = np.arange(len(matrix_terms))[in_range]
+    cols = columns[tuple(products.T)]
+    keep = cols >= 0
+    return rows[keep], cols[keep], term_spots[spots[keep]], np.full(np.count_nonzero(keep), weight), num_rows
+
+@lru_memoize()
 def sorted_matrix_terms(degree, dim):#, varsToRemove):
     '''Finds the matrix_terms sorted in the term order needed for Macaulay reduction.
-    So the highest terms come first,the x,y,z etc monomials last.
+    So the highest terms come first,the x,y,z etc monomials last. Memoized, so
+    the returned array is read only.
     Parameters
     ----------
     degree : int
@@ -621,6 +1008,7 @@ def sorted_matrix_terms(degree, dim):#, varsToRemove):
     #     matrix_terms[cuts[0]:] = np.vstack([B[mask], B[~mask]])
     #     cuts = tuple([cuts[0] + np.sum(mask), cuts[1]+1])
 
+    matrix_terms.flags.writeable = False
     return matrix_terms, cuts
 
 def _random_poly(_type, dim):
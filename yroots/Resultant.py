@@ -0,0 +1,372 @@
+"""
+Resultant provides a solver for systems of two bivariate polynomials that uses
+the Chebyshev-Bezout hidden-variable resultant, as in Chebfun2's roots. The
+problem becomes a polynomial eigenvalue problem in y whose size is the degree
+in x, not the number of monomials of a Macaulay matrix.
+"""
+
+import numpy as np
+from scipy.linalg import eig
+from numpy.polynomial import chebyshev as cheb
+from yroots.polynomial import is_power, poly2cheb
+from yroots.utils import memoize
+
+macheps = 2.220446049250313e-16
+
+def solve(polys, return_all_roots=True, return_conds=False, max_cond_num=1.e6):
+    '''
+    Finds the common roots of two bivariate polynomials with the Chebyshev-Bezout
+    resultant.
+
+    Parameters
+    ----------
+    polys : list of polynomial objects
+        The two polynomials to find the common roots of.
+    return_all_roots : bool
+        If True returns all the roots, otherwise just the ones in the unit box.
+    return_conds : bool
+        If True also returns the condition numbers of the roots. They are nan,
+        as the roots don't come from a standard eigenvalue problem.
+    max_cond_num : float
+        The maximum condition number of the Jacobian at a root in or near the
+        unit box.
+
+    Returns
+    -------
+    roots : numpy array
+        The common roots of the polynomials. Each row is a root. None if the
+        resultant is identically zero, or if a root in or near the unit box is
+        too ill conditioned or isn't a root after polishing, in which case the
+        second return value is a message saying why.
+    conds : numpy array
+        The condition number of each root, if return_conds is True.
+    '''
+    if len(polys) != 2 or polys[0].dim != 2:
+        raise ValueError("The resultant method is only for systems of two bivariate polynomials.")
+    if is_power(polys):
+        polys = [poly2cheb(poly) for poly in polys]
+    roots = resultant_roots(polys[0].coeff, polys[1].coeff)
+    if roots is None:
+        return None, "The resultant of the system is identically zero"
+    cond = roots_cond(polys[0].coeff, polys[1].coeff, roots[np.all(np.abs(roots) <= 1.1, axis=1)])
+    if cond > max_cond_num:
+        return None, "Condition number of the resultant roots is {}".format(cond)
+    if not return_all_roots:
+        roots = roots[np.all(np.abs(roots) <= 1, axis=1)]
+    if return_conds:
+        return roots, np.full(len(roots), np.nan)
+    return roots
+
+def resultant_roots(coeff1, coeff2, polish_steps=2):
+    """Finds the common roots of two bivariate Chebyshev polynomials.
+
+    y is the hidden variable. The Chebyshev-Bezout matrix B(y) of the polynomials
+    in x is singular exactly at the y of a common root, and the vector of
+    T_j(x) at that root is in its null space. So the y are the eigenvalues of the
+    colleague linearization of B(y), and x comes from the ratio of the first two
+    entries of the eigenvector. If several roots share a y its eigenvectors are
+    arbitrary combinations of their T_j(x) vectors, so the x there are instead
+    the common roots of the polynomials in x (see shared_y_roots). If the
+    polynomials are less than quadratic in x the
+    roles of x and y are swapped. At most the Bezout bound of roots are kept, and
+    they are then polished with a few Newton steps.
+
+    Parameters
+    ----------
+    coeff1 : (m,n) numpy array
+        The Chebyshev coefficients of the first polynomial.
+    coeff2 : (m,n) numpy array
+        The Chebyshev coefficients of the second polynomial.
+    polish_steps : int
+        The number of Newton steps to polish the roots with.
+
+    Returns
+    -------
+    roots : (k,2) numpy array or None
+        The finite complex roots, or None if the resultant is identically zero.
+    """
+    shape = np.maximum(coeff1.shape, coeff2.shape)
+    if shape[0] < 3 and shape[1] >= 3:
+        roots = resultant_roots(coeff1.T, coeff2.T, polish_steps)
+        return None if roots is None else roots[:,::-1]
+
+    matrix_poly = bezout_matrix_poly(coeff1, coeff2)
+    if not np.any(matrix_poly):
+        return None
+    # Drop zero leading coefficients so they don't give infinite eigenvalues
+    degree = np.max(np.flatnonzero(np.any(matrix_poly != 0, axis=(1,2))))
+    if degree == 0:
+        return None
+    values, vectors = eig(*colleague_pencil(matrix_poly[:degree+1]))
+    if np.any(np.isnan(values)):
+        return None
+    finite = np.isfinite(values)
+    y, vectors = values[finite], vectors[:,finite]
+
+    if matrix_poly.shape[1] > 1:
+        with np.errstate(all='ignore'):
+            x = (vectors[1]/vectors[0]).astype(complex)
+        for group in eigenvalue_clusters(y):
+            # Independent eigenvectors mean the null space of B(y) has a root for each
+            vecs = vectors[:,group]/np.linalg.norm(vectors[:,group], axis=0)
+            s = np.linalg.svd(vecs, compute_uv=False)
+            if s[-1] > 1.e-3*s[0]:
+                x[group] = shared_y_roots(coeff1, coeff2, np.mean(y[group]), len(group))
+    else:
+        # The polynomials are linear in x, so solve the one with the larger slope at each y.
+        slopes = [cheb.chebval(y, coeff[1]) if coeff.shape[0] > 1 else np.zeros_like(y) for coeff in (coeff1, coeff2)]
+        consts = [cheb.chebval(y, coeff[0]) for coeff in (coeff1, coeff2)]
+        use_second = np.abs(slopes[1]) > np.abs(slopes[0])
+        with np.errstate(all='ignore'):
+            x = -np.where(use_second, consts[1]/slopes[1], consts[0]/slopes[0])
+    roots = np.column_stack([x, y])
+    roots = roots[np.all(np.isfinite(roots), axis=1)]
+
+    # Infinite eigenvalues can be perturbed into huge finite ones, so only keep as many roots as
+    # Bezout's theorem allows, dropping the largest.
+    bezout_bound = total_degree(coeff1)*total_degree(coeff2)
+    roots = roots[np.argsort(np.max(np.abs(roots), axis=1), kind='stable')[:bezout_bound]]
+    return newton_polish_2d(coeff1, coeff2, roots, polish_steps)
+
+def eigenvalue_clusters(values, tol=np.sqrt(macheps)):
+    """Groups eigenvalues that are the same to within a relative tolerance.
+
+    Parameters
+    ----------
+    values : numpy array
+        The eigenvalues.
+    tol : float
+        How close eigenvalues have to be, relative to 1 + their size.
+
+    Returns
+    -------
+    groups : list
+        The indices of the eigenvalues in each group of more than one.
+    """
+    close = np.abs(values[:,np.newaxis] - values) <= tol*(1 + np.abs(values[:,np.newaxis]))
+    groups, left = [], np.ones(len(values), dtype=bool)
+    for i in range(len(values)):
+        if left[i]:
+            group = np.flatnonzero(close[i] & left)
+            left[group] = False
+            if len(group) > 1:
+                groups.append(group)
+    return groups
+
+def shared_y_roots(coeff1, coeff2, y, num):
+    """Finds the x of several common roots of two bivariate Chebyshev polynomials
+    with the same y. They are the roots in x of the polynomial of lower degree in
+    x at that y where the other polynomial is smallest.
+
+    Parameters
+    ----------
+    coeff1 : (m,n) numpy array
+        The Chebyshev coefficients of the first polynomial.
+    coeff2 : (m,n) numpy array
+        The Chebyshev coefficients of the second polynomial.
+    y : complex
+        The y of the roots.
+    num : int
+        How many roots there are.
+
+    Returns
+    -------
+    x : (num,) numpy array
+        The x of the roots. nan if the polynomials don't have enough roots in x.
+    """
+    polys = [np.trim_zeros(coeff @ cheb.chebvander(y, coeff.shape[1]-1)[0], 'b') for coeff in (coeff1, coeff2)]
+    if min(len(poly) for poly in polys) < 2:
+        # One of the polynomials is constant in x at y
+        polys.sort(key=len, reverse=True)
+    else:
+        polys.sort(key=len)
+    x = cheb.chebroots(polys[0]) if len(polys[0]) > 1 else np.array([])
+    if len(x) < num:
+        return np.full(num, np.nan)
+    values = np.abs(cheb.chebval(x, polys[1]))/np.maximum(cheb.chebval(np.abs(x), np.abs(polys[1])), macheps)
+    return x[np.argsort(values, kind='stable')[:num]]
+
+def roots_cond(coeff1, coeff2, roots):
+    """Finds how well two bivariate Chebyshev polynomials determine their roots.
+
+    A root that doesn't make both polynomials vanish to about the rounding error
+    of evaluating them has an infinite condition number. Otherwise it is the
+    condition number of the Jacobian there, with its rows scaled to unit size.
+
+    Parameters
+    ----------
+    coeff1 : (m,n) numpy array
+        The Chebyshev coefficients of the first polynomial.
+    coeff2 : (m,n) numpy array
+        The Chebyshev coefficients of the second polynomial.
+    roots : (k,2) numpy array
+        The roots.
+
+    Returns
+    -------
+    cond : float
+        The largest condition number of the roots, 1 if there are none.
+    """
+    if len(roots) == 0:
+        return 1.
+    x, y = roots.T
+    jacobian = np.empty((len(roots), 2, 2), dtype=complex)
+    for i, coeff in enumerate((coeff1, coeff2)):
+        # The rounding error of evaluating the polynomial is about macheps times
+        # the sum of the sizes of its terms
+        terms = np.abs(cheb.chebvander(x, coeff.shape[0]-1))[:,:,np.newaxis]*np.abs(cheb.chebvander(y, coeff.shape[1]-1))[:,np.newaxis]
+        scale = np.einsum('kij,ij->k', terms, np.abs(coeff))
+        if np.any(np.abs(cheb.chebval2d(x, y, coeff)) > 1.e3*macheps*scale) or not np.all(np.isfinite(roots)):
+            return np.inf
+        jacobian[:,i,0] = cheb.chebval2d(x, y, cheb.chebder(coeff, axis=0))
+        jacobian[:,i,1] = cheb.chebval2d(x, y, cheb.chebder(coeff, axis=1))
+    jacobian /= np.linalg.norm(jacobian, axis=2, keepdims=True)
+    with np.errstate(all='ignore'):
+        conds = np.linalg.cond(jacobian)
+    return np.max(np.nan_to_num(conds, nan=np.inf))
+
+def total_degree(coeff):
+    """Finds the total degree of a polynomial from its coefficients.
+
+    Parameters
+    ----------
+    coeff : numpy array
+        The coefficients of the polynomial.
+
+    Returns
+    -------
+    degree : int
+        The largest sum of the indices of a nonzero coefficient.
+    """
+    spots = np.argwhere(coeff != 0)
+    return spots.sum(axis=1).max() if len(spots) else 0
+
+@memoize
+def cheb_product_tensor(m, n):
+    """Finds how products of Chebyshev polynomials expand in Chebyshev polynomials,
+    T_a T_b = (T_(a+b) + T_|a-b|)/2. memoized for speed.
+
+    Parameters
+    ----------
+    m : int
+        The number of polynomials T_a.
+    n : int
+        The number of polynomials T_b.
+
+    Returns
+    -------
+    product : (m,n,m+n-1) numpy array
+        The coefficient of T_k in T_a T_b is product[a,b,k].
+    """
+    product = np.zeros((m, n, m+n-1))
+    a, b = np.indices((m, n))
+    np.add.at(product, (a, b, a+b), .5)
+    np.add.at(product, (a, b, np.abs(a-b)), .5)
+    return product
+
+def bezout_matrix_poly(coeff1, coeff2):
+    """Finds the Chebyshev-Bezout matrix in x of two bivariate Chebyshev
+    polynomials, as a matrix polynomial in y.
+
+    The Bezout matrix B of f and g has (f(s)g(t) - f(t)g(s))/(s - t) equal to
+    the sum of B[i,j] T_i(s) T_j(t). With S the matrix of multiplication by s,
+    S B - B S^T is the coefficient matrix of f(s)g(t) - f(t)g(s), which gives B
+    one row at a time from the bottom. This is linear, so it is done on all the
+    Chebyshev coefficients in y at once.
+
+    Parameters
+    ----------
+    coeff1 : (m,n) numpy array
+        The Chebyshev coefficients of the first polynomial.
+    coeff2 : (m,n) numpy array
+        The Chebyshev coefficients of the second polynomial.
+
+    Returns
+    -------
+    matrix_poly : (k,d,d) numpy array
+        B(y) is the sum of matrix_poly[i] T_i(y). d is the degree in x.
+    """
+    deg = max(coeff1.shape[0], coeff2.shape[0]) - 1
+    coeff1 = np.pad(coeff1, ((0, deg+1-coeff1.shape[0]), (0, 0)))
+    coeff2 = np.pad(coeff2, ((0, deg+1-coeff2.shape[0]), (0, 0)))
+    product = cheb_product_tensor(coeff1.shape[1], coeff2.shape[1])
+    F = np.einsum('ia,jb,abk->ijk', coeff1, coeff2, product)
+    F -= np.swapaxes(F, 0, 1)
+
+    # Multiplication by s: s T_0 = T_1 and s T_i = (T_(i+1) + T_(i-1))/2
+    S = np.zeros((deg+1, deg+1))
+    S[1,0] = 1
+    S[np.arange(deg), np.arange(1, deg+1)] = .5
+    S[np.arange(2, deg+1), np.arange(1, deg)] = .5
+    B = np.zeros((deg+2, deg+1, F.shape[2]))
+    for r in range(deg, 0, -1):
+        B[r-1] = (F[r] + np.einsum('jl,lk->jk', S, B[r]) - .5*B[r+1])/S[r,r-1]
+    return np.moveaxis(B[:deg,:deg], 2, 0)
+
+def colleague_pencil(matrix_poly):
+    """Finds a linearization of a matrix polynomial in the Chebyshev basis.
+
+    With v(y) = [T_0(y) v, ..., T_(k-1)(y) v], the pencil uses y T_0 = T_1,
+    2y T_i = T_(i+1) + T_(i-1), and the matrix polynomial to replace T_k(y) v,
+    so P(y) v = 0 exactly when X v(y) = y Y v(y).
+
+    Parameters
+    ----------
+    matrix_poly : (k+1,d,d) numpy array
+        The matrix polynomial is the sum of matrix_poly[i] T_i(y).
+
+    Returns
+    -------
+    X : (kd,kd) numpy array
+        The left side of the pencil.
+    Y : (kd,kd) numpy array
+        The right side of the pencil, multiplied by y.
+    """
+    k = len(matrix_poly) - 1
+    d = matrix_poly.shape[1]
+    if k == 1:
+        return -matrix_poly[0], matrix_poly[1]
+    X = np.zeros((k, d, k, d))
+    Y = np.zeros((k, d, k, d))
+    I = np.eye(d)
+    X[0,:,1] = I
+    Y[0,:,0] = I
+    for i in range(1, k-1):
+        X[i,:,i-1] = I
+        X[i,:,i+1] = I
+        Y[i,:,i] = 2*I
+    X[k-1] = -np.moveaxis(matrix_poly[:k], 0, 1)
+    X[k-1,:,k-2] += matrix_poly[k]
+    Y[k-1,:,k-1] = 2*matrix_poly[k]
+    return X.reshape(k*d, k*d), Y.reshape(k*d, k*d)
+
+def newton_polish_2d(coeff1, coeff2, roots, steps):
+    """Polishes roots of two bivariate Chebyshev polynomials with Newton's method.
+
+    Parameters
+    ----------
+    coeff1 : (m,n) numpy array
+        The Chebyshev coefficients of the first polynomial.
+    coeff2 : (m,n) numpy array
+        The Chebyshev coefficients of the second polynomial.
+    roots : (k,2) numpy array
+        The roots to polish.
+    steps : int
+        The number of Newton steps.
+
+    Returns
+    -------
+    roots : (k,2) numpy array
+        The polished roots.
+    """
+    derivs = [(cheb.chebder(coeff, axis=0), cheb.chebder(coeff, axis=1)) for coeff in (coeff1, coeff2)]
+    x, y = roots.T
+    for _ in range(steps):
+        f, g = [cheb.chebval2d(x, y, coeff) for coeff in (coeff1, coeff2)]
+        (fx, fy), (gx, gy) = [[cheb.chebval2d(x, y, deriv) for deriv in pair] for pair in derivs]
+        det = fx*gy - fy*gx
+        step = det != 0
+        with np.errstate(all='ignore'):
+            x = np.where(step, x - (f*gy - g*fy)/det, x)
+            y = np.where(step, y - (g*fx - f*gx)/det, y)
+    return np.column_stack([x, y])
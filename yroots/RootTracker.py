@@ -1,4 +1,9 @@
 import numpy as np
+from itertools import product
+from math import ceil, log2
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from yroots.utils import GrowableArray
 
 def rootInBox(root, a, b):
     """Checks to see if a root is in a box.
@@ -18,24 +23,278 @@ def rootInBox(root, a, b):
     """
     return np.all(root > a) and np.all(root < b)
 
+def grid_level(a, b):
+    """The level of the grid cells used to index a box. Cells at level k are cubes of side 2**k
+    aligned to multiples of 2**k, so a box overlaps at most 2**dim cells at its level.
+
+    Parameters
+    ----------
+    a : numpy array
+        The lower bound on the box.
+    b : numpy array
+        The upper bound on the box.
+    Returns
+    -------
+    grid_level : int
+        The smallest k with 2**k at least the largest side of the box.
+    """
+    return ceil(log2(max(np.max(b - a), 2.**-1000)))
+
+def grid_cells(a, b, level):
+    """The grid cells at the given level that the box [a,b] overlaps.
+
+    Parameters
+    ----------
+    a : numpy array
+        The lower bound on the box.
+    b : numpy array
+        The upper bound on the box.
+    level : int
+        The grid level.
+    Returns
+    -------
+    grid_cells : iterator
+        The keys of the cells, each a tuple of the level and the cell coordinates.
+    """
+    size = 2.**level
+    lower = np.floor(a/size)
+    upper = np.floor(b/size)
+    return ((level,) + cell for cell in product(*[np.arange(l, u+1) for l,u in zip(lower, upper)]))
+
+def merge_boxes(lower, upper):
+    """Merges overlapping boxes into fewer boxes covering the same area.
+
+    Two boxes are merged into their bounding box when it is no bigger than the volume of their
+    union, up to rounding, which holds for nested boxes and for boxes that overlap across a whole
+    face, so merging never adds area that wasn't covered. Overlapping pairs are found with a sweep along the first
+    coordinate. Merges are repeated until no pair can be merged.
+
+    Parameters
+    ----------
+    lower : numpy array
+        The lower bounds of the boxes, one box per row.
+    upper : numpy array
+        The upper bounds of the boxes, one box per row.
+
+    Returns
+    -------
+    lower : numpy array
+        The lower bounds of the merged boxes.
+    upper : numpy array
+        The upper bounds of the merged boxes.
+    """
+    lower, upper = np.unique(np.stack([lower, upper], axis=1), axis=0).transpose(1,0,2)
+    while len(lower) > 1:
+        num_boxes = len(lower)
+        order = np.argsort(lower[:,0], kind='stable')
+        lower, upper = lower[order], upper[order]
+        # Box j > i overlaps box i along the first coordinate if it starts before box i ends
+        ends = np.searchsorted(lower[:,0], upper[:,0], side='left')
+        counts = np.maximum(ends - np.arange(num_boxes) - 1, 0)
+        starts = np.repeat(np.cumsum(counts) - counts, counts)
+        i = np.repeat(np.arange(num_boxes), counts)
+        j = i + 1 + np.arange(np.sum(counts)) - starts
+        overlap = np.all(lower[j] < upper[i], axis=1) & np.all(lower[i] < upper[j], axis=1)
+        i, j = i[overlap], j[overlap]
+        volumes = np.prod(upper - lower, axis=1)
+        bounding = np.prod(np.maximum(upper[i], upper[j]) - np.minimum(lower[i], lower[j]), axis=1)
+        intersection = np.prod(np.minimum(upper[i], upper[j]) - np.maximum(lower[i], lower[j]), axis=1)
+        mergeable = bounding <= (volumes[i] + volumes[j] - intersection)*(1 + 1.e-12)
+        if not np.any(mergeable):
+            break
+        # Merge each box at most once per pass
+        merged = np.zeros(num_boxes, dtype=bool)
+        keep = np.ones(num_boxes, dtype=bool)
+        for i_, j_ in zip(i[mergeable], j[mergeable]):
+            if merged[i_] or merged[j_]:
+                continue
+            merged[i_] = merged[j_] = True
+            lower[i_] = np.minimum(lower[i_], lower[j_])
+            upper[i_] = np.maximum(upper[i_], upper[j_])
+            keep[j_] = False
+        lower, upper = lower[keep], upper[keep]
+    return lower, upper
+
+class BoxGrid:
+    '''
+    A spatial index of boxes to find if a point is in any of them. Each box is stored in the cells of
+    a grid of the level matching its size that it overlaps. A point is looked up in the cell that
+    contains it on each level in use, so the cost doesn't grow with the number of boxes.
+
+    Attributes
+    ----------
+    cells : dictionary
+        The boxes in each cell, keyed by the level and the cell coordinates.
+    levels : numpy array
+        The levels that have boxes.
+
+    Methods
+    -------
+    __init__
+        Initializes everything.
+    add
+        Adds a box.
+    contains
+        Checks if a point is in any of the boxes.
+    '''
+    def __init__(self):
+        self.cells = dict()
+        self.levels = np.zeros(0)
+
+    def add(self, a, b):
+        ''' Adds the box [a,b].
+        '''
+        a, b = np.atleast_1d(a), np.atleast_1d(b)
+        level = grid_level(a, b)
+        if level not in self.levels:
+            self.levels = np.append(self.levels, level)
+        for cell in grid_cells(a, b, level):
+            self.cells.setdefault(cell, []).append((a,b))
+
+    def contains(self, point):
+        ''' Checks if a point is strictly inside any of the boxes.
+        '''
+        point = np.atleast_1d(point)
+        cells = np.floor(point/2.**self.levels[:,np.newaxis])
+        for level, cell in zip(self.levels, cells):
+            for a, b in self.cells.get((level,) + tuple(cell), ()):
+                if rootInBox(point, a, b):
+                    return True
+        return False
+
+class PointGrid:
+    '''
+    A spatial index of points, each one stored with some data, to find and remove the points in a
+    box. The points are hashed into grid cells on every level that has been queried, so a box only
+    looks at the points in the 2**dim cells it overlaps on its level.
+
+    Attributes
+    ----------
+    entries : dictionary
+        The point and data of each entry, keyed by an id.
+    cells : dictionary
+        The ids of the points in each cell, keyed by the level and the cell coordinates.
+    levels : list
+        The levels the points are hashed on.
+
+    Methods
+    -------
+    __init__
+        Initializes everything.
+    add
+        Adds a point.
+    pop_in_box
+        Removes the points in a box.
+    values
+        The data of all the points.
+    '''
+    def __init__(self):
+        self.entries = dict()
+        self.cells = dict()
+        self.levels = []
+        self.next_id = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _hash(self, point_id, level):
+        point = self.entries[point_id][0]
+        cell = (level,) + tuple(np.floor(point/2.**level))
+        self.cells.setdefault(cell, set()).add(point_id)
+
+    def add(self, point, data):
+        ''' Adds a point along with its data.
+        '''
+        point_id = self.next_id
+        self.next_id += 1
+        self.entries[point_id] = (np.atleast_1d(point), data)
+        for level in self.levels:
+            self._hash(point_id, level)
+
+    def pop_in_box(self, a, b):
+        ''' Removes the points strictly inside the box [a,b].
+
+        Returns
+        -------
+        pop_in_box : list
+            The data of the removed points.
+        '''
+        if len(self.entries) == 0:
+            return []
+        a, b = np.atleast_1d(a), np.atleast_1d(b)
+        level = grid_level(a, b)
+        if level not in self.levels:
+            self.levels.append(level)
+            for point_id in self.entries:
+                self._hash(point_id, level)
+        found = []
+        for cell in grid_cells(a, b, level):
+            for point_id in self.cells.get(cell, ()):
+                if rootInBox(self.entries[point_id][0], a, b):
+                    found.append(point_id)
+        removed = []
+        for point_id in found:
+            point, data = self.entries.pop(point_id)
+            for level in self.levels:
+                self.cells[(level,) + tuple(np.floor(point/2.**level))].discard(point_id)
+            removed.append(data)
+        return removed
+
+    def values(self):
+        ''' The data of all the points, in the order they were added.
+        '''
+        return [data for point, data in self.entries.values()]
+
 class RootTracker:
     '''
     Class to track the roots that are found found using the subdivision solver.
 
+    The roots, potential roots, intervals and methods are stored in GrowableArrays, so adding a
+    root is amortized constant time. They are exposed as views of those buffers.
+
     Attributes
     ----------
     roots: numpy array
         The roots of the system being solved
+    root_tols : numpy array
+        How far apart two copies of each root can be and still be the same root.
+    multiplicities : numpy array
+        How many copies of each root were merged into it by cluster_roots. An estimate of the
+        multiplicity of the root.
+    depths : numpy array
+        The subdivision depth of the interval each root was found in.
+    errors : numpy array
+        The approximation error on the interval each root was found in.
+    conds : numpy array
+        The condition number of the eigenvalue each root came from, or nan if it wasn't found
+        from an eigenvalue problem.
+    bounds : numpy array
+        A bound on how far each root is from a root of the functions, from a Kantorovich test,
+        or inf if the test failed.
+    track_conds : bool
+        Whether the solver should compute the condition numbers of the roots. They cost extra
+        work, so they are only needed for the root records.
+    track_bounds : bool
+        Whether the solver should compute the bounds of the roots, for certifying them or for
+        the root records.
     possible_duplicates : list
         Roots that were outside their search interval so might be duplicates
+    duplicate_grid : PointGrid
+        A spatial index of the possible duplicates.
+    interval_grid : BoxGrid
+        A spatial index of the intervals.
     potential_roots : numpy array
         Places that may or may not have a root that we found.
-    intervals : list
-        The intervals that the roots were found in.
-    polish_intervals : list
-        The intervals to run polishing on.
+    intervals : numpy array
+        The intervals that the roots were found in, as an array of [a,b] pairs.
+    interval_roots : numpy array
+        The index of the root each interval was found with, -1 for potential roots.
     methods : list
         The methods used to find the roots.
+    method_codes : numpy array
+        The methods used to find the roots, as indices into method_names.
+    method_names : list
+        The names of the methods that have been used.
 
     Methods
     -------
@@ -47,20 +306,109 @@ class RootTracker:
         Adds roots that were found by the solver but are questionable. We will
         want to double check that these roots aren't duplicated elsewhere or that
         they give a fairly good answer.
+    cluster_roots
+        Merges copies of the same root.
     get_polish_intervals
         Gets the intervals to run the next round of polishing on.
+    get_root_records
+        Gets a structured array with the roots and their information.
     '''
-    def __init__(self):
-        self.roots = np.array([])
-        self.possible_duplicates = []
-        self.potential_roots = np.array([])
-        self.intervals = []
-        self.methods = []
-        #for tracking condition numbers and gradients
-        self.conds = []
-        self.grads = []
-
-    def add_roots(self, zeros, a, b, method):
+    def __init__(self, track_conds=False, track_bounds=False):
+        self.track_conds = track_conds
+        self.track_bounds = track_bounds
+        self._roots = None
+        self._potential_roots = None
+        self._intervals = None
+        self._root_tols = GrowableArray()
+        self._multiplicities = GrowableArray((), np.int64)
+        self._depths = GrowableArray((), np.int64)
+        self._errors = GrowableArray()
+        self._conds = GrowableArray()
+        self._bounds = GrowableArray()
+        self._interval_roots = GrowableArray((), np.int64)
+        self._method_codes = GrowableArray((), np.int64)
+        self.duplicate_grid = PointGrid()
+        self.interval_grid = BoxGrid()
+        self.method_names = []
+        self._codes = dict()
+
+    @property
+    def roots(self):
+        return np.array([]) if self._roots is None else self._roots.values
+
+    @property
+    def root_tols(self):
+        return self._root_tols.values
+
+    @property
+    def multiplicities(self):
+        return self._multiplicities.values
+
+    @property
+    def depths(self):
+        return self._depths.values
+
+    @property
+    def errors(self):
+        return self._errors.values
+
+    @property
+    def conds(self):
+        return self._conds.values
+
+    @property
+    def bounds(self):
+        return self._bounds.values
+
+    @property
+    def potential_roots(self):
+        return np.array([]) if self._potential_roots is None else self._potential_roots.values
+
+    @property
+    def intervals(self):
+        return np.array([]) if self._intervals is None else self._intervals.values
+
+    @property
+    def interval_roots(self):
+        return self._interval_roots.values
+
+    @property
+    def possible_duplicates(self):
+        return self.duplicate_grid.values()
+
+    @property
+    def method_codes(self):
+        return self._method_codes.values
+
+    @property
+    def methods(self):
+        return [self.method_names[code] for code in self.method_codes]
+
+    def _setup(self, a):
+        ''' Creates the buffers once the dimension is known from the first interval.
+        '''
+        if self._intervals is None:
+            dim = np.size(a)
+            root_shape = () if dim == 1 else (dim,)
+            self._roots = GrowableArray(root_shape)
+            self._potential_roots = GrowableArray(root_shape)
+            self._intervals = GrowableArray((2,) + np.shape(a))
+
+    def _add_intervals(self, a, b, method, num, root_num=-1):
+        ''' Stores num copies of the interval [a,b] and the method.
+        '''
+        if method not in self._codes:
+            self._codes[method] = len(self.method_names)
+            self.method_names.append(method)
+        code = self._codes[method]
+        if num > 0:
+            self.interval_grid.add(a, b)
+        for _ in range(num):
+            self._intervals.append((a,b))
+            self._method_codes.append(code)
+            self._interval_roots.append(root_num)
+
+    def add_roots(self, zeros, a, b, method, tol=0., depth=0, error=np.nan, conds=None, bounds=None):
         ''' Store the roots that were found, along with the interval they were found in and the method used.
 
         Parameters
@@ -73,46 +421,34 @@ class RootTracker:
             The upper bounds of the interval the roots were found in.
         method : string
             The method used to find the roots
+        tol : float or numpy array
+            How far apart two copies of the same root can be, from the approximation error.
+            Either one for all the roots or one for each root.
+        depth : int
+            The subdivision depth of the interval.
+        error : float
+            The approximation error on the interval.
+        conds : numpy array or None
+            The condition number of each root. If None they are nan.
+        bounds : numpy array or None
+            The bound on the distance from each root to a root of the functions. If None they
+            are inf.
         '''
-        for zero in zeros:
+        self._setup(a)
+        if conds is None:
+            conds = np.full(len(zeros), np.nan)
+        if bounds is None:
+            bounds = np.full(len(zeros), np.inf)
+        tols = np.broadcast_to(tol, len(zeros))
+        for zero, tol, cond, bound in zip(zeros, tols, conds, bounds):
             if rootInBox(zero, a, b):
-                self.add_root(zero, a, b, method)
-            else:
-                found = False
-                for a_,b_ in self.intervals:
-                    if rootInBox(zero, a_, b_):
-                        found = True
-                        break
-                if not found:
-                    self.possible_duplicates.append([zero, a, b, method])
-
-        temp = []
-        for zero, a_, b_, method in self.possible_duplicates:
-            if rootInBox(zero, a, b):
-                pass
-            else:
-                temp.append([zero, a_, b_, method])
-        self.possible_duplicates = temp
-
-
-#         if not isinstance(a, np.ndarray):
-#             dim = 1
-#         else:
-#             dim = len(a)
-#         if len(self.roots) == 0:
-#             if dim == 1:
-#                 self.roots = np.zeros([0])
-#             else:
-#                 self.roots = np.zeros([0,dim])
-
-#         if dim > 1:
-#             self.roots = np.vstack([self.roots, zeros])
-#         else:
-#             self.roots = np.hstack([self.roots, zeros])
-#         self.intervals += [(a,b)]*len(zeros)
-#         self.methods += [method]*len(zeros)
-
-    def add_root(self, zero, a, b, method):
+                self.add_root(zero, a, b, method, tol, depth, error, cond, bound)
+            elif not self.interval_grid.contains(zero):
+                self.duplicate_grid.add(zero, [zero, a, b, method, tol, depth, error, cond, bound])
+        # Roots found in this interval aren't duplicates
+        self.duplicate_grid.pop_in_box(a, b)
+
+    def add_root(self, zero, a, b, method, tol=0., depth=0, error=np.nan, cond=np.nan, bound=np.inf):
         ''' Store the root that was found, along with the interval it was found in and the method used.
 
         Parameters
@@ -125,22 +461,26 @@ class RootTracker:
             The upper bounds of the interval the roots were found in.
         method : string
             The method used to find the roots
+        tol : float
+            How far apart two copies of the same root can be, from the approximation error.
+        depth : int
+            The subdivision depth of the interval.
+        error : float
+            The approximation error on the interval.
+        cond : float
+            The condition number of the root.
+        bound : float
+            The bound on the distance from the root to a root of the functions.
         '''
-        if not isinstance(a, np.ndarray):
-            dim = 1
-        else:
-            dim = len(a)
-        if len(self.roots) == 0:
-            if dim == 1:
-                self.roots = np.zeros([0])
-            else:
-                self.roots = np.zeros([0,dim])
-        if dim > 1:
-            self.roots = np.vstack([self.roots, zero])
-        else:
-            self.roots = np.hstack([self.roots, zero])
-        self.intervals += [(a,b)]
-        self.methods += [method]
+        self._setup(a)
+        self._roots.append(zero)
+        self._root_tols.append(tol)
+        self._multiplicities.append(1)
+        self._depths.append(depth)
+        self._errors.append(error)
+        self._conds.append(cond)
+        self._bounds.append(bound)
+        self._add_intervals(a, b, method, 1, len(self._roots) - 1)
 
     def add_potential_roots(self, potentials, a, b, method):
         ''' Store the potential roots that were found, along with the interval
@@ -157,43 +497,233 @@ class RootTracker:
         method : string
             The method used to find the roots
         '''
-        if not isinstance(a, np.ndarray):
-            dim = 1
-        else:
-            dim = len(a)
-        if len(self.potential_roots) == 0:
-            if dim == 1:
-                self.potential_roots = np.zeros([0])
-            else:
-                self.potential_roots = np.zeros([0,dim])
-
-        if dim > 1:
-            self.potential_roots = np.vstack([self.potential_roots, potentials])
-        else:
-            self.potential_roots = np.hstack([self.potential_roots, potentials])
-        self.intervals += [(a,b)]*len(potentials)
-        self.methods += [method]*len(potentials)
+        self._setup(a)
+        potentials = np.reshape(potentials, (-1,) + self._potential_roots.data.shape[1:])
+        self._potential_roots.extend(potentials)
+        self._add_intervals(a, b, method, len(potentials))
+
+    def cluster_roots(self):
+        ''' Merges roots that are within the tolerance of each other into one root.
+
+        Copies of a root are found when it is on the boundary between intervals or when it is a
+        multiple root. Two roots are linked if every coordinate differs by at most the larger
+        of their tolerances, and each connected group is replaced by its mean. The number of
+        copies is added to its multiplicity, and it keeps the depth of its first copy and the
+        largest error and condition number of its copies. The mean can be up to a tolerance
+        away from each copy, so its bound is the largest of the bound of a copy plus the
+        distance from the copy to the mean. Intervals that only held merged copies are dropped
+        so they aren't polished again.
+        '''
+        num_roots = len(self.roots)
+        if num_roots < 2:
+            return
+        points = self.roots.reshape(num_roots, -1)
+        tols = self.root_tols
+        # Each root is compared with the roots within its own tolerance in the first
+        # coordinate, so a pair is found from the root with the larger tolerance
+        order = np.argsort(points[:,0], kind='stable')
+        first = points[order,0]
+        sorted_tols = tols[order]
+        starts = np.searchsorted(first, first - sorted_tols, side='left')
+        ends = np.searchsorted(first, first + sorted_tols, side='right')
+        counts = ends - starts
+        i = np.repeat(np.arange(num_roots), counts)
+        j = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(np.sum(counts))
+        i, j = order[i], order[j]
+        close = (i != j) & (np.max(np.abs(points[i] - points[j]), axis=1) <= tols[i])
+        if not np.any(close):
+            return
+        graph = coo_matrix((np.ones(np.sum(close)), (i[close], j[close])), shape=(num_roots, num_roots))
+        num_clusters, labels = connected_components(graph, directed=False)
+
+        # Keep the clusters in the order of their first root
+        first_root = np.full(num_clusters, num_roots)
+        np.minimum.at(first_root, labels, np.arange(num_roots))
+        cluster_order = np.argsort(first_root)
+        new_labels = np.empty(num_clusters, dtype=np.int64)
+        new_labels[cluster_order] = np.arange(num_clusters)
+        labels = new_labels[labels]
+
+        sizes = np.bincount(labels, minlength=num_clusters)
+        means = np.zeros((num_clusters, points.shape[1]))
+        np.add.at(means, labels, points)
+        means /= sizes[:,np.newaxis]
+        cluster_tols = np.zeros(num_clusters)
+        np.maximum.at(cluster_tols, labels, tols)
+        multiplicities = np.bincount(labels, weights=self.multiplicities, minlength=num_clusters).astype(np.int64)
+        cluster_errors = np.full(num_clusters, -np.inf)
+        np.fmax.at(cluster_errors, labels, self.errors)
+        cluster_conds = np.full(num_clusters, -np.inf)
+        np.fmax.at(cluster_conds, labels, self.conds)
+        cluster_bounds = np.zeros(num_clusters)
+        np.maximum.at(cluster_bounds, labels, self.bounds + np.max(np.abs(points - means[labels]), axis=1))
+        depths = self.depths[np.sort(first_root)]
+
+        root_shape = self._roots.data.shape[1:]
+        self._roots = GrowableArray(root_shape)
+        self._roots.extend(means)
+        self._root_tols = GrowableArray()
+        self._root_tols.extend(cluster_tols)
+        self._multiplicities = GrowableArray((), np.int64)
+        self._multiplicities.extend(multiplicities)
+        self._depths = GrowableArray((), np.int64)
+        self._depths.extend(depths)
+        self._errors = GrowableArray()
+        self._errors.extend(np.where(cluster_errors == -np.inf, np.nan, cluster_errors))
+        self._conds = GrowableArray()
+        self._conds.extend(np.where(cluster_conds == -np.inf, np.nan, cluster_conds))
+        self._bounds = GrowableArray()
+        self._bounds.extend(cluster_bounds)
 
-    def get_polish_intervals(self):
+        # Keep the intervals of the potential roots and of the first root of each cluster
+        interval_roots = self.interval_roots
+        is_first = np.zeros(num_roots, dtype=bool)
+        is_first[first_root] = True
+        keep = (interval_roots == -1) | is_first[interval_roots]
+        intervals = self.intervals[keep]
+        method_codes = self.method_codes[keep]
+        interval_roots = np.where(interval_roots[keep] == -1, -1, labels[interval_roots[keep]])
+        self._intervals = GrowableArray(self._intervals.data.shape[1:])
+        self._intervals.extend(intervals)
+        self._method_codes = GrowableArray((), np.int64)
+        self._method_codes.extend(method_codes)
+        self._interval_roots = GrowableArray((), np.int64)
+        self._interval_roots.extend(interval_roots)
+        self.interval_grid = BoxGrid()
+        for a, b in intervals:
+            self.interval_grid.add(a, b)
+
+    def _keep_roots(self, keep):
+        ''' Keeps the roots where keep is True along with their intervals. The other roots and
+        intervals are deleted.
+        '''
+        for name in ['_roots', '_root_tols', '_multiplicities', '_depths', '_errors', '_conds', '_bounds']:
+            old = getattr(self, name)
+            if old is None:
+                continue
+            new = GrowableArray(old.data.shape[1:], old.data.dtype)
+            new.extend(old.values[keep])
+            setattr(self, name, new)
+        interval_roots = self.interval_roots
+        kept = np.zeros(len(interval_roots), dtype=bool)
+        has_root = interval_roots != -1
+        kept[has_root] = keep[interval_roots[has_root]]
+        new_nums = np.cumsum(keep) - 1
+        intervals = self.intervals[kept]
+        method_codes = self.method_codes[kept]
+        if self._intervals is not None:
+            self._intervals = GrowableArray(self._intervals.data.shape[1:])
+            self._intervals.extend(intervals)
+        self._method_codes = GrowableArray((), np.int64)
+        self._method_codes.extend(method_codes)
+        self._interval_roots = GrowableArray((), np.int64)
+        self._interval_roots.extend(new_nums[interval_roots[kept]])
+        self.interval_grid = BoxGrid()
+        for a, b in intervals:
+            self.interval_grid.add(a, b)
+
+    def get_polish_intervals(self, margin=None, certify_tol=None):
         ''' Find the intervals to run the polishing on.
 
-        Deletes the rest of the info as subdivision will be rerun on these intervals.
+        Overlapping intervals are merged so no area is solved twice. If margin is given, the
+        interval of each root is first shrunk to the box around the root that is margin times
+        its tolerance wide in each direction.
+
+        Deletes the rest of the info as subdivision will be rerun on these intervals, except for
+        the certified roots, which are kept along with their intervals.
+
+        Parameters
+        ----------
+        margin : float or None
+            How many times its tolerance to keep around each root. If None, or for roots without
+            a tolerance, the whole interval is kept.
+        certify_tol : float or None
+            Roots whose bound is at most certify_tol are certified, so their intervals aren't
+            polished. If None no roots are certified.
 
         returns
         -------
-        polish_intervals : list
+        polish_intervals : numpy array
             The intervals to rerun the search on.
         '''
-        polish_intervals = np.unique(self.intervals,axis=0)
-        self.intervals = []
-        self.roots = []
-        self.methods = []
+        num_roots = len(self.roots)
+        if certify_tol is None:
+            certified = np.zeros(num_roots, dtype=bool)
+        else:
+            certified = self.bounds <= certify_tol
+        intervals = self.intervals
+        interval_roots = self.interval_roots
+        if len(intervals) > 0:
+            has_root = interval_roots != -1
+            polish = np.ones(len(intervals), dtype=bool)
+            polish[has_root] = ~certified[interval_roots[has_root]]
+            intervals, interval_roots = intervals[polish], interval_roots[polish]
+        if len(intervals) > 0:
+            shape = intervals.shape
+            intervals = intervals.reshape(shape[0], 2, -1).copy()
+            if margin is not None:
+                has_root = interval_roots != -1
+                radii = margin*self.root_tols[interval_roots[has_root]]
+                roots = self.roots.reshape(num_roots, -1)[interval_roots[has_root]]
+                # Possible duplicates that were kept can be outside their interval
+                inside = np.all(roots > intervals[has_root,0], axis=1) & np.all(roots < intervals[has_root,1], axis=1)
+                use = (radii > 0) & inside
+                shrink = np.zeros(len(intervals), dtype=bool)
+                shrink[has_root] = use
+                roots, radii = roots[use], radii[use][:,np.newaxis]
+                intervals[shrink,0] = np.maximum(intervals[shrink,0], roots - radii)
+                intervals[shrink,1] = np.minimum(intervals[shrink,1], roots + radii)
+            lower, upper = merge_boxes(intervals[:,0], intervals[:,1])
+            polish_intervals = np.stack([lower, upper], axis=1).reshape((len(lower),) + shape[1:])
+        else:
+            polish_intervals = np.unique(intervals,axis=0)
+        self._keep_roots(certified)
         return polish_intervals
 
+    def get_root_records(self):
+        ''' Gets the roots along with the information about how they were found.
+
+        returns
+        -------
+        records : numpy structured array
+            One record per root, with the fields
+                root -- The root.
+                a, b -- The bounds of the interval it was found in.
+                method -- The method used to find it.
+                depth -- The subdivision depth of the interval.
+                error -- The approximation error on the interval.
+                cond -- The condition number of the eigenvalue it came from, or nan.
+                bound -- The bound on its distance to a root of the functions, or inf.
+                multiplicity -- The estimated multiplicity from cluster_roots.
+        '''
+        num_roots = len(self.roots)
+        shape = () if self._intervals is None else self._intervals.data.shape[2:]
+        name_length = max([len(name) for name in self.method_names], default=1)
+        dtype = [('root', float, shape), ('a', float, shape), ('b', float, shape),
+                 ('method', 'U{}'.format(name_length)), ('depth', np.int64),
+                 ('error', float), ('cond', float), ('bound', float), ('multiplicity', np.int64)]
+        records = np.zeros(num_roots, dtype=dtype)
+        if num_roots == 0:
+            return records
+        # Each root has exactly one interval
+        has_root = self.interval_roots != -1
+        root_nums = self.interval_roots[has_root]
+        intervals = self.intervals[has_root]
+        codes = self.method_codes[has_root]
+        records['root'] = self.roots
+        records['a'][root_nums] = intervals[:,0]
+        records['b'][root_nums] = intervals[:,1]
+        records['method'][root_nums] = np.array(self.method_names)[codes]
+        records['depth'] = self.depths
+        records['error'] = self.errors
+        records['cond'] = self.conds
+        records['bound'] = self.bounds
+        records['multiplicity'] = self.multiplicities
+        return records
+
     def keep_possible_duplicates(self):
         ''' Adds the possible duplicate roots to the roots
         '''
-        for zero, a, b, method in self.possible_duplicates:
-            # Pass in None for the condition number since we don't have it
-            self.add_root(zero, a, b, method)
-        self.possible_duplicates = []
+        for zero, a, b, method, tol, depth, error, cond, bound in self.possible_duplicates:
+            self.add_root(zero, a, b, method, tol, depth, error, cond, bound)
+        self.duplicate_grid = PointGrid()
@@ -3,11 +3,12 @@ import itertools
 from yroots import OneDimension as oneD
 from yroots.polynomial import MultiCheb, MultiPower, is_power
 from yroots.Multiplication import multiplication
+from yroots import Resultant
 from yroots.utils import Term, get_var_list, divides, MacaulayError, \
                             InstabilityWarning, match_size, match_poly_dimensions, \
                             ConditioningError
 
-def solve(polys,MSmatrix=0, eigvals=True, verbose=False, return_all_roots=True, max_cond_num=1.e6, macaulay_zero_tol=1.e-12,method='svd'):
+def solve(polys,MSmatrix=0, eigvals=True, verbose=False, return_all_roots=True, max_cond_num=1.e6, macaulay_zero_tol=1.e-12,method='svd',in_box=False):
     '''
     Finds the roots of the given list of polynomials.
 
@@ -33,9 +34,18 @@ def solve(polys,MSmatrix=0, eigvals=True, verbose=False, return_all_roots=True,
     return_all_roots : bool
         If True returns all the roots, otherwise just the ones in the unit box.
     max_cond_num : float
-        The maximum condition number of the Macaulay Matrix Reduction
+        The maximum condition number of the Macaulay Matrix Reduction, or with
+        'resultant' of the roots in or near the unit box
     macaulay_zero_tol : float
         What is considered 0 in the macaulay matrix reduction.
+    method : str
+        The method to use when reducing the Macaulay matrix, 'svd', 'qrt', 'tvb'
+        or 'sparse'. For two bivariate polynomials it can also be 'resultant',
+        which uses the Chebyshev-Bezout resultant instead.
+    in_box : bool
+        If True only the roots in the unit box are found, without computing
+        every eigenvalue of the Moller-Stetter matrices. This is faster when
+        they are large and few of the roots are in the box.
 
     returns
     -------
@@ -65,8 +75,14 @@ def solve(polys,MSmatrix=0, eigvals=True, verbose=False, return_all_roots=True,
                         common.append(zero)
                 zeros = common
             return zeros
+    elif method == 'resultant':
+        res = Resultant.solve(polys, return_all_roots=return_all_roots, return_conds=True, max_cond_num=max_cond_num)
+        if res[0] is None:
+            raise ConditioningError(res[1])
+        else:
+            return res[0]
     else:
-        res = multiplication(polys, max_cond_num=max_cond_num, verbose=verbose, return_all_roots=return_all_roots,method=method)
+        res = multiplication(polys, max_cond_num=max_cond_num, verbose=verbose, return_all_roots=return_all_roots,method=method,in_box=in_box)
         if res[0] is None:
             raise ConditioningError(res[1])
         else:
@@ -8,13 +8,15 @@ the approximation degree is small enough to be solved efficiently.
 
 import numpy as np
 from scipy.fftpack import fftn
+from numpy.polynomial import chebyshev as cheb
 from yroots.OneDimension import divCheb, divPower, multCheb, multPower
-from yroots.Multiplication import multiplication
+from yroots.Multiplication import multiplication, multiplication_batch
+from yroots import Resultant
 from yroots.utils import clean_zeros_from_matrix, slice_top, MacaulayError, \
                          get_var_list, ConditioningError, TooManyRoots, \
                          Tolerances, solve_linear, memoize, Memoize
 from yroots.polynomial import MultiCheb
-from yroots.IntervalChecks import IntervalData
+from yroots.IntervalChecks import IntervalData, jacobian_is_regular_2d, topological_degree_2d
 from yroots.RootTracker import RootTracker
 from itertools import product
 from matplotlib import pyplot as plt
@@ -25,13 +27,18 @@ from numba import jit
 from math import log2, ceil
 
 macheps = 2.220446049250313e-16
+# The default fraction of each axis to split intervals at. Not 1/2 so that roots
+# at simple points like 0 don't land on the interval boundaries.
+RAND = 0.5139303900908738
 
 def solve(funcs, a, b, rel_approx_tol=1.e-15, abs_approx_tol=1.e-12,
           max_cond_num=1e5, good_zeros_factor=100, min_good_zeros_tol=1e-5,
           check_eval_error=True, check_eval_freq=1, plot=False,
           plot_intervals=False, deg=None, target_deg=2,
           return_potentials=False, method='svd', target_tol=1.01*macheps,
-          trust_small_evals=False):
+          trust_small_evals=False, schedule_seed=None, polish_margin=None,
+          return_records=False, merge_roots=False, certify_tol=None, split_policy='fixed',
+          fallbacks=(), batch_size=1, timed_schedule=False):
     """
     Finds the real roots of the given list of functions on a given interval.
 
@@ -91,7 +98,10 @@ def solve(funcs, a, b, rel_approx_tol=1.e-15, abs_approx_tol=1.e-12,
         If True, returns the potential roots. Else, it does not.
     method : str (optional)
         The method to use when reducing the Macaulay matrix. Valid options are
-        svd, tvb, and qrt.
+        svd, tvb, qrt, and sparse. With svd, leaves whose approximations are two 2D
+        quadratics are solved in closed form first. In 2D it can also be resultant,
+        which solves the leaves with the Chebyshev-Bezout resultant instead, and works
+        well with a higher target_deg.
     target_tol : float
         The final absolute approximation tolerance to use before using any sort
         of solver (Macaulay, linear, etc).
@@ -99,6 +109,56 @@ def solve(funcs, a, b, rel_approx_tol=1.e-15, abs_approx_tol=1.e-12,
         Whether or not to trust function evaluations that may give floats
         smaller than machine epsilon. This should only be set to True if the
         function evaluations are very accurate.
+    schedule_seed : int or None
+        The interval checks and the functions are run in an order that adapts
+        to how cheaply each one throws out intervals, measured in deterministic
+        work counts. If an int, ties are broken with this seed instead of the
+        default order.
+    timed_schedule : bool
+        If True the order adapts to wall-clock timings instead of work counts.
+        This can be faster, but the solve is no longer reproducible.
+    polish_margin : float or None
+        If None, each polishing round reruns the solve on the intervals the roots were found in,
+        with overlapping intervals merged. If a float, each root is instead polished on a box
+        around it that is polish_margin times its clustering tolerance wide in each direction.
+        This is much faster for systems with many roots, but can lose roots whose error is
+        underestimated, such as multiple roots.
+    certify_tol : float or None
+        If a float, roots that a Kantorovich-type test on their Chebyshev approximation shows have
+        a root of the functions within certify_tol aren't polished again. If None, all the roots
+        are polished, and the test is only run for the root records.
+    split_policy : str
+        How to choose where to split intervals. 'fixed' always splits each axis at the same
+        fraction (a bit over the middle). 'informed' evaluates the approximations on a coarse
+        grid and moves the split away from the grid cells that may have a root, so that roots
+        are separated and don't fall on interval boundaries.
+    fallbacks : tuple of str
+        What to try, before subdividing, on an interval whose Macaulay matrix is too ill
+        conditioned. 'cluster' cuts out a cluster of roots around a multiple root, 'newton' finds
+        the root with Newton's method when the system can be shown to have at most one root on the
+        interval, and 'svd', 'qrt', 'tvb' or 'sparse' reduce the Macaulay matrix with another method
+        ('resultant' uses the Chebyshev-Bezout resultant, in 2D). They
+        are tried in the order that has solved intervals for the least cost so far. By default
+        there are none. Even without 'cluster', clusters are cut out of intervals whose
+        approximations still can't get to target_tol after max_level//2 subdivisions.
+    batch_size : int
+        If more than 1, the intervals that are solved with the Macaulay matrix are collected and the
+        systems with the same shapes are solved together in groups of this many, which saves the
+        overhead of solving many small systems one at a time. Only for method 'svd' in 2 or more
+        dimensions.
+    return_records : bool
+        If True, the roots are returned as a structured array with one record per root that
+        also has the interval it was found in, the method, the subdivision depth, the
+        approximation error, the condition number of the eigenvalue it came from (nan for
+        methods that don't solve an eigenvalue problem), the bound on its distance to a root from
+        the Kantorovich test (inf if the test failed) and its estimated multiplicity. The
+        coordinates are in the 'root' field. The copies of each root are merged, as with
+        merge_roots, since that is where the multiplicity comes from.
+    merge_roots : bool
+        If True, copies of the same root found in neighboring intervals or around a multiple
+        root are merged into their mean after each solve, which also saves polishing them
+        separately. Roots within each other's tolerance are merged, which can merge distinct
+        roots that are closer than the approximation error allows to tell apart.
 
     If finding roots of a univariate function, `funcs` does not need to be a list,
     and `a` and `b` can be floats instead of arrays.
@@ -106,7 +166,8 @@ def solve(funcs, a, b, rel_approx_tol=1.e-15, abs_approx_tol=1.e-12,
     Returns
     -------
     zeros : numpy array
-        The common zeros of the polynomials. Each row is a root.
+        The common zeros of the polynomials. Each row is a root. A structured
+        array if return_records is True.
     """
     # Detect the dimension
     if isinstance(funcs, list):
@@ -115,6 +176,15 @@ def solve(funcs, a, b, rel_approx_tol=1.e-15, abs_approx_tol=1.e-12,
         dim = 1
     else:
         raise ValueError('`funcs` must be a callable or list of callables.')
+    if split_policy not in ('fixed', 'informed'):
+        raise ValueError("`split_policy` must be 'fixed' or 'informed'.")
+    for fallback in fallbacks:
+        if fallback not in ('cluster', 'newton', 'svd', 'qrt', 'tvb', 'sparse', 'resultant'):
+            raise ValueError("`fallbacks` must be from 'cluster', 'newton', 'svd', 'qrt', 'tvb', 'sparse' and 'resultant'.")
+    if dim != 2 and (method == 'resultant' or 'resultant' in fallbacks):
+        raise ValueError("The resultant method is only for 2D systems.")
+    if batch_size > 1 and method != 'svd':
+        raise ValueError("`batch_size` can only be more than 1 with method 'svd'.")
 
 
     # make a and b the right type
@@ -145,8 +215,8 @@ def solve(funcs, a, b, rel_approx_tol=1.e-15, abs_approx_tol=1.e-12,
     tols.nextTols()
 
     # Set up the interval data and root tracker classes and cheb blocky copy arr
-    interval_data = IntervalData(a, b)
-    root_tracker = RootTracker()
+    interval_data = IntervalData(a, b, dim, schedule_seed, track_intervals=plot and plot_intervals, fallbacks=fallbacks, timed=timed_schedule)
+    root_tracker = RootTracker(track_conds=return_records, track_bounds=return_records or certify_tol is not None)
     values_arr.memo = {}
     initialize_values_arr(dim, 2*(deg+3))
 
@@ -156,11 +226,13 @@ def solve(funcs, a, b, rel_approx_tol=1.e-15, abs_approx_tol=1.e-12,
         solve_func = subdivision_solve_1d
         if isinstance(funcs, list):
             funcs = funcs[0]
+        solve_kwargs = {}
     else:
         solve_func = subdivision_solve_nd
+        batch = MacaulayBatch(batch_size, tols, interval_data, root_tracker) if batch_size > 1 else None
+        solve_kwargs = {'batch': batch}
 
-    # TODO : Set the maximum number of subdivisions so that
-    # intervals cannot possibly be smaller than 2^-51
+    # Intervals stop at the floating point resolution (see at_resolution), so this is just a backstop
     max_level = 52
 
     
@@ -168,17 +240,26 @@ def solve(funcs, a, b, rel_approx_tol=1.e-15, abs_approx_tol=1.e-12,
     # Initial Solve
     solve_func(funcs, a, b, deg, target_deg, interval_data,
                root_tracker, tols, max_level, method=method,
-               trust_small_evals=trust_small_evals)
+               trust_small_evals=trust_small_evals, split_policy=split_policy, **solve_kwargs)
+    if solve_kwargs.get('batch') is not None:
+        solve_kwargs['batch'].flush()
     root_tracker.keep_possible_duplicates()
+    merge_roots = merge_roots or return_records
+    if merge_roots:
+        root_tracker.cluster_roots()
 
     # Polishing
     while tols.nextTols():
-        polish_intervals = root_tracker.get_polish_intervals()
+        polish_intervals = root_tracker.get_polish_intervals(polish_margin, certify_tol)
         interval_data.add_polish_intervals(polish_intervals)
         for new_a, new_b in polish_intervals:
             interval_data.start_polish_interval()
-            solve_func(funcs, new_a, new_b, deg, target_deg, interval_data, root_tracker, tols, max_level, method=method)
+            solve_func(funcs, new_a, new_b, deg, target_deg, interval_data, root_tracker, tols, max_level, method=method, split_policy=split_policy, **solve_kwargs)
+            if solve_kwargs.get('batch') is not None:
+                solve_kwargs['batch'].flush()
             root_tracker.keep_possible_duplicates(),
+        if merge_roots:
+            root_tracker.cluster_roots()
     print("\rPercent Finished: 100%{}".format(' '*50))
 
     # Print results
@@ -195,12 +276,13 @@ def solve(funcs, a, b, rel_approx_tol=1.e-15, abs_approx_tol=1.e-12,
             interval_data.plot_results(funcs, root_tracker.roots, plot_intervals)
 
     if len(root_tracker.potential_roots) != 0:
-        warnings.warn("Some intervals subdivided too deep and some potential roots were found. To access these roots, rerun the solver with the keyword return_potentials=True")
+        warnings.warn("Some intervals subdivided too deep or down to the floating point resolution and some potential roots were found. To access these roots, rerun the solver with the keyword return_potentials=True")
 
+    zeros = root_tracker.get_root_records() if return_records else root_tracker.roots
     if return_potentials:
-        return root_tracker.roots, root_tracker.potential_roots
+        return zeros, root_tracker.potential_roots
     else:
-        return root_tracker.roots
+        return zeros
 
 @jit
 def transform(x, a, b):
@@ -490,7 +572,7 @@ def interval_approx_slicers(dim, deg):
     return x0_slicer, deg_slicer, slices, deg**dim
 
 def get_subintervals(a, b, dimensions, interval_data, polys, approx_error,
-                     check_subintervals=False):
+                     check_subintervals=False, split_policy='fixed'):
     """Gets the subintervals to divide a search interval into.
 
     Parameters
@@ -510,16 +592,49 @@ def get_subintervals(a, b, dimensions, interval_data, polys, approx_error,
         The bound of the sup norm error of the chebyshev approximation.
     check_subintervals : bool
         If True runs the subinterval checks to throw out intervals where the functions are never 0.
+    split_policy : str
+        'fixed' splits each axis at the RAND fraction, 'informed' uses informed_split on polys.
+
+    Returns
+    -------
+    subintervals : list
+        Each element of the list is a tuple containing an a and b, the lower and upper bounds of the interval.
+    """
+    if split_policy == 'informed' and len(polys) > 0:
+        splits = informed_split(polys, approx_error)
+    else:
+        splits = np.full(len(a), RAND)
+    subintervals = split_interval(a, b, dimensions, splits)
+
+    if check_subintervals:
+        # get intervals -1 to 1
+        scaled_subintervals = split_interval(-np.ones_like(a), np.ones_like(a), dimensions, splits)
+        return interval_data.check_subintervals(subintervals, scaled_subintervals, polys, approx_error)
+    else:
+        return subintervals
+
+def split_interval(a, b, dimensions, splits):
+    """Splits an interval into 2^len(dimensions) subintervals.
+
+    Parameters
+    ----------
+    a : numpy array
+        The lower bound on the interval.
+    b : numpy array
+        The upper bound on the interval.
+    dimensions : numpy array
+        The dimensions to split.
+    splits : numpy array
+        The fraction of the way along each axis to split at.
 
     Returns
     -------
     subintervals : list
         Each element of the list is a tuple containing an a and b, the lower and upper bounds of the interval.
     """
-    RAND = 0.5139303900908738
     subintervals = []
-    diffs1 = ((b-a)*RAND)[dimensions]
-    diffs2 = ((b-a)-(b-a)*RAND)[dimensions]
+    diffs1 = ((b-a)*splits)[dimensions]
+    diffs2 = ((b-a)-(b-a)*splits)[dimensions]
 
     for subset in product([False, True], repeat=len(dimensions)):
         subset = np.array(subset)
@@ -528,13 +643,89 @@ def get_subintervals(a, b, dimensions, interval_data, polys, approx_error,
         aTemp[dimensions] += (~subset)*diffs1
         bTemp[dimensions] -= subset*diffs2
         subintervals.append((aTemp, bTemp))
+    return subintervals
 
-    if check_subintervals:
-        # get intervals -1 to 1
-        scaled_subintervals = get_subintervals(-np.ones_like(a), np.ones_like(a), dimensions, None, None, approx_error)
-        return interval_data.check_subintervals(subintervals, scaled_subintervals, polys, approx_error)
-    else:
-        return subintervals
+@memoize
+def split_grid(num_points, deg):
+    """The grid informed_split evaluates on and the Chebyshev polynomials on it.
+
+    Parameters
+    ----------
+    num_points : int
+        The number of evenly spaced points on [-1,1].
+    deg : int
+        The highest degree Chebyshev polynomial.
+
+    Returns
+    -------
+    x : numpy array
+        The grid points.
+    vander : numpy array
+        The Chebyshev Vandermonde matrix of x.
+    """
+    x = np.linspace(-1, 1, num_points)
+    return x, cheb.chebvander(x, deg)
+
+def informed_split(coeffs, errors, num_points=9):
+    """Chooses where to split an interval using the Chebyshev approximations on it.
+
+    The approximations are evaluated on an evenly spaced grid, and the grid cells where every
+    function may be zero (its values on the cell corners, widened by how much they change over the
+    cell and by the approximation error, straddle 0) are taken as the places a root may be. When
+    these cells form separate groups along an axis, the split is moved from the RAND fraction in
+    steps of half a cell until it is half a cell away from all of them, if it can be. This
+    separates roots into different subintervals and keeps them off the boundaries, where they
+    would be found more than once. Otherwise the axis is split at the RAND fraction, as moving
+    the split off a single group of cells (like the ones along a curve) only unbalances the
+    subintervals.
+
+    Parameters
+    ----------
+    coeffs : list
+        The Chebyshev coefficients of the approximations on the interval.
+    errors : list
+        The approximation errors.
+    num_points : int
+        The number of grid points along each axis.
+
+    Returns
+    -------
+    splits : numpy array
+        The fraction of the way along each axis to split at.
+    """
+    dim = coeffs[0].ndim
+    cell = 2/(num_points - 1)
+    possible = np.ones((num_points - 1,)*dim, dtype=bool)
+    for coeff, error in zip(coeffs, errors):
+        # Contracting the first axis each time puts the axes back in order at the end
+        values = coeff
+        for axis in range(dim):
+            x, vander = split_grid(num_points, coeff.shape[axis] - 1)
+            values = np.tensordot(values, vander, axes=([0], [1]))
+        low, high = values, values
+        for axis in range(dim):
+            first = tuple(slice(None, -1) if i == axis else slice(None) for i in range(dim))
+            last = tuple(slice(1, None) if i == axis else slice(None) for i in range(dim))
+            low = np.minimum(low[first], low[last])
+            high = np.maximum(high[first], high[last])
+        # The functions can go past their values on the corners, by about as much as they change
+        spread = high - low + error
+        possible &= (low - spread <= 0) & (high + spread >= 0)
+
+    splits = np.full(dim, RAND)
+    # Candidate splits in [-1,1], closest to the RAND fraction first
+    steps = np.array(sorted(range(-4, 5), key=abs))
+    cuts = 2*RAND - 1 + steps*cell/2
+    centers = x[:-1] + cell/2
+    for axis in range(dim):
+        cells = np.any(possible, axis=tuple(i for i in range(dim) if i != axis))
+        # Only split between separate groups of cells that may have roots
+        possible_cells = np.nonzero(cells)[0]
+        if len(possible_cells) == 0 or possible_cells[-1] - possible_cells[0] + 1 == len(possible_cells):
+            continue
+        dists = np.min(np.abs(cuts[:, np.newaxis] - centers[cells]), axis=1)
+        splits[axis] = (cuts[np.argmax(np.minimum(dists, cell/2))] + 1)/2
+    return splits
 
 def full_cheb_approximate(f, a, b, deg, abs_approx_tol, rel_approx_tol, good_deg=None):
     """Gives the full chebyshev approximation and checks if it's good enough.
@@ -584,7 +775,7 @@ def full_cheb_approximate(f, a, b, deg, abs_approx_tol, rel_approx_tol, good_deg
         return coeff, inf_norm, error
 
 
-def zeros_in_interval(zeros, a, b, dim, within_interval_tol=1e-9):
+def zeros_in_interval(zeros, a, b, dim, within_interval_tol=1e-9, return_mask=False):
     """Returns the zeros that are only in the interval [a, b].
 
     Parameters
@@ -597,21 +788,132 @@ def zeros_in_interval(zeros, a, b, dim, within_interval_tol=1e-9):
             The upper bounds of the interval for each variable.
         dim : int
             The dimension of the system.
+        return_mask : bool
+            If True, also returns which of the zeros were kept.
     
     Returns
     -------
         zeros : numpy array
             The zeros that are in the interval [a, b]
+        mask : numpy array
+            Boolean array of which zeros were kept, if return_mask is True.
     """
     # Check along each axis to ensure roots are within the boundaries
-    for i in range(dim):
-        zeros = zeros[zeros[:, i] - a[i] >= -within_interval_tol]
-        zeros = zeros[zeros[:, i] - b[i] <= within_interval_tol]
-    
-    return zeros
+    mask = np.all(zeros - a >= -within_interval_tol, axis=1)
+    mask &= np.all(zeros - b <= within_interval_tol, axis=1)
+    if return_mask:
+        return zeros[mask], mask
+    return zeros[mask]
+
+
+def at_resolution(a, b, deg):
+    """Checks if an interval is too small to subdivide in floating point.
+
+    The error of an approximation of degree deg is estimated on the Chebyshev
+    grid of degree 2*deg, whose closest points are (b-a)(1-cos(pi/(2 deg)))/2
+    apart. Once that is at most the floating point spacing of the coordinates
+    along some axis, the grid points collapse and the approximation means
+    nothing, so the interval shouldn't be subdivided any further.
+
+    Parameters
+    ----------
+    a : numpy array or float
+        The lower bound on the interval.
+    b : numpy array or float
+        The upper bound on the interval.
+    deg : int
+        The degree of the approximation.
+
+    Returns
+    -------
+    at_resolution : bool
+        True if the grid collapses along any axis.
+    """
+    gap = (b - a)*(1 - np.cos(np.pi/(2*deg)))/2
+    return np.any(gap <= np.spacing(np.maximum(np.abs(a), np.abs(b))))
+
+def root_cluster_tol(a, b, errors, coeffs=None, zeros=None):
+    """How far apart two copies of a root found on [a,b] can be and still be merged.
+
+    An approximation error of size e moves a simple root by about ||J^-1|| e, and a multiple
+    root by about sqrt(e). So each root gets 10 ||J^-1|| e, from the Jacobian of the
+    approximations at the root, but no more than sqrt(e), which is only reached near singular
+    roots. Without the approximations this is sqrt(e). It is scaled from [-1,1] to the interval.
+
+    Parameters
+    ----------
+    a : numpy array
+        The lower bound on the interval.
+    b : numpy array
+        The upper bound on the interval.
+    errors : float or list
+        The approximation errors on the interval.
+    coeffs : list or None
+        The approximations on [-1,1]^n.
+    zeros : numpy array or None
+        The roots of the approximations on [-1,1]^n, one per row.
+
+    Returns
+    -------
+    root_cluster_tol : float or numpy array
+        The tolerance, or the tolerance of each root if coeffs and zeros are given.
+    """
+    error = max(np.sum(errors), macheps)
+    scale = np.max(b - a)/2
+    if coeffs is None:
+        return scale*np.sqrt(error)
+    return scale*np.minimum(np.sqrt(error), 10*jacobian_inverse_norms(coeffs, zeros)*error)
+
+def chebval_points(x, coeff):
+    """Evaluates a Chebyshev polynomial at several points.
 
+    Parameters
+    ----------
+    x : numpy array
+        The points, one per row.
+    coeff : numpy array
+        The coefficients of the polynomial, with one axis per coordinate.
 
-def good_zeros_nd(zeros, imag_tol, real_tol):
+    Returns
+    -------
+    values : numpy array
+        The value of the polynomial at each point.
+    """
+    values = np.tensordot(cheb.chebvander(x[:,0], coeff.shape[0]-1), coeff, axes=(1,0))
+    for j in range(1, x.shape[1]):
+        values = np.einsum('ki,ki...->k...', cheb.chebvander(x[:,j], coeff.shape[j]-1), values)
+    return values
+
+def jacobian_inverse_norms(coeffs, zeros):
+    """Bounds the inf norm of the inverse of the Jacobian of a system of Chebyshev polynomials
+    at several points, by sqrt(n) over its smallest singular value.
+
+    Parameters
+    ----------
+    coeffs : list
+        The coefficient arrays of the polynomials.
+    zeros : numpy array
+        The points, one per row.
+
+    Returns
+    -------
+    norms : numpy array
+        The bound at each point, inf where the Jacobian is singular.
+    """
+    dim = len(coeffs)
+    zeros = np.reshape(np.real(zeros), (-1, dim))
+    if len(zeros) == 0:
+        return np.zeros(0)
+    jacs = np.empty((len(zeros), dim, dim))
+    for i, coeff in enumerate(coeffs):
+        for j in range(dim):
+            deriv = cheb.chebder(coeff, axis=j) if coeff.shape[j] > 1 else np.zeros([1]*dim)
+            jacs[:,i,j] = chebval_points(zeros, deriv)
+    smallest = np.linalg.svd(jacs, compute_uv=False)[:,-1]
+    with np.errstate(divide='ignore'):
+        return np.sqrt(dim)/smallest
+
+def good_zeros_nd(zeros, imag_tol, real_tol, return_mask=False):
     """Get the real zeros in the -1 to 1 interval in each dimension.
 
     Parameters
@@ -623,11 +925,15 @@ def good_zeros_nd(zeros, imag_tol, real_tol):
     real_tol : float
         How far the real part can be outside the interval [-1, 1]^n and still be
         considered valid.
+    return_mask : bool
+        If True, also returns which of the zeros were kept.
 
     Returns
     -------
     good_zeros : numpy array
         The real zeros in [-1, 1]^n of the input zeros.
+    mask : numpy array
+        Boolean array of which zeros were kept, if return_mask is True.
     """
     # Take care of the case where we found only 1 root
     if len(zeros.shape) == 1:
@@ -636,6 +942,8 @@ def good_zeros_nd(zeros, imag_tol, real_tol):
     else:
         mask = np.all(np.abs(zeros.imag) <= imag_tol, axis = 1)
         mask *= np.all(np.abs(zeros.real) <= 1 + real_tol, axis = 1)
+    if return_mask:
+        return zeros[mask].real, mask
     return zeros[mask].real
 
 def get_abs_approx_tol(func, deg, a, b, dim):
@@ -727,7 +1035,7 @@ def random_point(dim):
 def subdivision_solve_nd(funcs, a, b, deg, target_deg, interval_data,
                          root_tracker, tols, max_level,good_degs=None, level=0,
                          method='svd', use_target_tol=False,
-                         trust_small_evals=False):
+                         trust_small_evals=False, split_policy='fixed', batch=None):
     """Finds the common zeros of the given functions.
 
     All the zeros will be stored in root_tracker.
@@ -760,11 +1068,19 @@ def subdivision_solve_nd(funcs, a, b, deg, target_deg, interval_data,
         The current level of the recursion.
     method : str (optional)
         The method to use when reducing the Macaulay matrix. Valid options are
-        svd, tvb, and qrt.
+        svd, tvb, qrt, and sparse.
     use_target_tol : bool
         Whether or not to use tols.target_tol when making approximations. This
         is necessary to get a sufficiently accurate approximation from which to
         build the Macaulay matrix and run the solver.
+    trust_small_evals : bool
+        Whether or not to trust function evaluations that may give floats
+        smaller than machine epsilon.
+    split_policy : str
+        How to choose where to split intervals, 'fixed' or 'informed'.
+    batch : MacaulayBatch or None
+        If not None, the systems to solve with the Macaulay matrix are added to it
+        to be solved in groups instead of right away.
     """
 
     if level >= max_level:
@@ -776,6 +1092,11 @@ def subdivision_solve_nd(funcs, a, b, deg, target_deg, interval_data,
 
     dim = len(a)
 
+    if at_resolution(a, b, deg):
+        interval_data.track_interval("Resolution", [a, b])
+        root_tracker.add_potential_roots((a + b)/2, a, b, "Resolution")
+        return
+
     if tols.check_eval_error:
         # Using the first abs_approx_tol
         if not use_target_tol:
@@ -802,43 +1123,71 @@ def subdivision_solve_nd(funcs, a, b, deg, target_deg, interval_data,
     a -= interval_buffer_size
     b += interval_buffer_size
 
-    cheb_approx_list = []
     interval_data.print_progress()
     if good_degs is None:
         good_degs = [None]*len(funcs)
-    inf_norms = []
-    approx_errors = []
-    # Get the chebyshev approximations
+    # Get the chebyshev approximations. They are stored in the order of funcs,
+    # but computed in the order most likely to throw out the interval cheaply.
     num_funcs = len(funcs)
-    for func_num, (func, good_deg) in enumerate(zip(funcs, good_degs)):
+    cheb_approx_list = [None]*num_funcs
+    inf_norms = [None]*num_funcs
+    approx_errors = [None]*num_funcs
+    func_order = interval_data.func_order
+    for func_num in tuple(func_order.order):
+        func, good_deg = funcs[func_num], good_degs[func_num]
+        start = time.perf_counter()
         if use_target_tol:
             coeff, inf_norm, approx_error = full_cheb_approximate(func, a, b, deg, tols.target_tol, tols.rel_approx_tol, good_deg)
         else:
             coeff, inf_norm, approx_error = full_cheb_approximate(func, a, b, deg, tols.abs_approx_tol, tols.rel_approx_tol, good_deg)
-        inf_norms.append(inf_norm)
-        approx_errors.append(approx_error)
+        approx_deg = deg if good_deg is None else good_deg
+        num_evals = (approx_deg+1)**dim + (2*approx_deg+1)**dim
+        inf_norms[func_num] = inf_norm
+        approx_errors[func_num] = approx_error
         # Subdivides if a bad approximation
         if coeff is None:
+            func_order.record(func_num, time.perf_counter() - start, num_evals, 0)
+            done = [i for i in range(num_funcs) if cheb_approx_list[i] is not None]
+            done_errors = [approx_errors[i] for i in done]
             if not trust_small_evals:
-                approx_errors = [max(err,macheps) for err in approx_errors]
-            intervals = get_subintervals(og_a, og_b,get_div_dirs(dim),interval_data,cheb_approx_list,approx_errors)
-
-            #reorder funcs. TODO: fancier things like how likely it is to pass checks
-            funcs2 = funcs.copy()
-            if func_num + 1 < num_funcs:
-                del funcs2[func_num]
-                funcs2.append(func)
+                done_errors = [max(err,macheps) for err in done_errors]
+            intervals = get_subintervals(og_a,og_b,get_div_dirs(dim),interval_data,[cheb_approx_list[i] for i in done],done_errors, split_policy=split_policy)
             for new_a, new_b in intervals:
-                subdivision_solve_nd(funcs2,new_a,new_b,deg,target_deg,interval_data,root_tracker,tols,max_level,level=level+1, method=method, trust_small_evals=trust_small_evals)
+                subdivision_solve_nd(funcs,new_a,new_b,deg,target_deg,interval_data,root_tracker,tols,max_level,level=level+1, method=method, trust_small_evals=trust_small_evals, split_policy=split_policy, batch=batch)
             return
         else:
             # Run checks to try and throw out the interval
             if not trust_small_evals:
                 approx_error = max(approx_error, macheps)
-            if interval_data.check_interval(coeff, approx_error, og_a, og_b):
+            thrown_out = interval_data.check_interval(coeff, approx_error, og_a, og_b)
+            func_order.record(func_num, time.perf_counter() - start, num_evals, thrown_out)
+            if thrown_out:
                 return
 
-            cheb_approx_list.append(coeff)
+            cheb_approx_list[func_num] = coeff
+
+    # Check if the functions can have a common zero on the interval
+    check_errors = approx_errors if trust_small_evals else [max(err, macheps) for err in approx_errors]
+    if interval_data.check_system(cheb_approx_list, check_errors, og_a, og_b):
+        return
+
+    # In 2D, when the Jacobian can't be singular there is at most one root, and the topological
+    # degree on the boundary says whether there is one.
+    if dim == 2 and num_funcs == 2 and jacobian_is_regular_2d(cheb_approx_list):
+        degree = topological_degree_2d(cheb_approx_list, check_errors)
+        if degree == 0:
+            interval_data.track_interval("Degree", [a, b])
+            return
+        if degree in (-1, 1) and np.all(np.array(approx_errors) <= np.array(tols.target_tol) + tols.rel_approx_tol*np.array(inf_norms)):
+            zero = single_root_solve(cheb_approx_list)
+            if zero is not None:
+                bounds = root_bounds(cheb_approx_list, zero, check_errors, a, b, root_tracker)
+                cluster_tols = root_cluster_tol(a, b, approx_errors, cheb_approx_list, zero)
+                zero = transform(zero, a, b)
+                zero, mask = zeros_in_interval(zero, og_a, og_b, dim, return_mask=True)
+                interval_data.track_interval("Degree", [a, b])
+                root_tracker.add_roots(zero, a, b, "Degree", cluster_tols[mask], level, np.sum(approx_errors), bounds=bounds[mask])
+                return
 
     # Reduce the degree of the approximations while not introducing too much error
     coeffs, good_approx, approx_errors = trim_coeffs(cheb_approx_list, tols.abs_approx_tol, tols.rel_approx_tol, inf_norms, approx_errors)
@@ -854,46 +1203,966 @@ def subdivision_solve_nd(funcs, a, b, deg, target_deg, interval_data,
 
     # Check if the degree is small enough or if trim_coeffs introduced too much error
     if np.any(np.array([coeff.shape[0] for coeff in coeffs]) > target_deg + 1) or not good_approx:
-        intervals = get_subintervals(og_a, og_b, get_div_dirs(dim), interval_data, cheb_approx_list, approx_errors, True)
+        intervals = get_subintervals(og_a, og_b, get_div_dirs(dim), interval_data, cheb_approx_list, approx_errors, True, split_policy)
         for new_a, new_b in intervals:
-            subdivision_solve_nd(funcs, new_a, new_b, deg, target_deg, interval_data, root_tracker, tols, max_level, good_degs, level+1, method=method, trust_small_evals=trust_small_evals, use_target_tol=True)
+            subdivision_solve_nd(funcs, new_a, new_b, deg, target_deg, interval_data, root_tracker, tols, max_level, good_degs, level+1, method=method, trust_small_evals=trust_small_evals, use_target_tol=True, split_policy=split_policy, batch=batch)
 
     # Check if any approx error is greater than target_tol for Macaulay method
+    # Near a multiple root the approximations can't get to target_tol, even on small intervals where
+    # they would for a simple root, so there cut out a cluster if there is one
     elif np.any(np.array(approx_errors) > np.array(tols.target_tol) + tols.rel_approx_tol*np.array(inf_norms)):
-        intervals = get_subintervals(og_a, og_b, get_div_dirs(dim), interval_data, cheb_approx_list, approx_errors, True)
+        intervals = None
+        if 'cluster' in interval_data.fallbacks or level >= max_level//2:
+            intervals = solve_cluster(coeffs, cheb_approx_list, approx_errors, a, b, og_a, og_b, interval_data, root_tracker, level)
+        if intervals is None:
+            intervals = get_subintervals(og_a, og_b, get_div_dirs(dim), interval_data, cheb_approx_list, approx_errors, True, split_policy)
         for new_a, new_b in intervals:
-            subdivision_solve_nd(funcs, new_a, new_b, deg, target_deg, interval_data, root_tracker, tols, max_level, good_degs, level+1, method=method, trust_small_evals=trust_small_evals, use_target_tol=True)
+            subdivision_solve_nd(funcs, new_a, new_b, deg, target_deg, interval_data, root_tracker, tols, max_level, good_degs, level+1, method=method, trust_small_evals=trust_small_evals, use_target_tol=True, split_policy=split_policy, batch=batch)
 
     # Check if everything is linear
     elif np.all(np.array([coeff.shape[0] for coeff in coeffs]) == 2):
         if deg != 2:
-            subdivision_solve_nd(funcs, a, b, 2, target_deg, interval_data, root_tracker, tols, max_level, good_degs, level, method=method, trust_small_evals=trust_small_evals, use_target_tol=True)
+            subdivision_solve_nd(funcs, a, b, 2, target_deg, interval_data, root_tracker, tols, max_level, good_degs, level, method=method, trust_small_evals=trust_small_evals, use_target_tol=True, split_policy=split_policy, batch=batch)
             return
         zero, cond = solve_linear(coeffs)
         # Store the information and exit
         zero = good_zeros_nd(zero, good_zeros_tol, good_zeros_tol)
+        bounds = root_bounds(coeffs, zero, approx_errors, a, b, root_tracker)
+        cluster_tols = root_cluster_tol(a, b, approx_errors, coeffs, zero)
         zero = transform(zero, a, b)
-        zero = zeros_in_interval(zero, og_a, og_b, dim)
+        zero, mask = zeros_in_interval(zero, og_a, og_b, dim, return_mask=True)
         interval_data.track_interval("Base Case", [a, b])
-        root_tracker.add_roots(zero, a, b, "Base Case")
+        root_tracker.add_roots(zero, a, b, "Base Case", cluster_tols[mask], level, np.sum(approx_errors), bounds=bounds[mask])
 
     # Solve using spectral methods if stable.
     else:
-        polys = [MultiCheb(coeff, lead_term = [coeff.shape[0]-1], clean_zeros = False) for coeff in coeffs]
-        res = multiplication(polys, max_cond_num=tols.max_cond_num, method=method)
+        def finish(intervals):
+            if intervals is None:
+                # The Macaulay matrix is ill conditioned, so try the fallbacks. If none of them
+                # work subdivide, but run some checks on the intervals first.
+                intervals = solve_fallbacks(coeffs, cheb_approx_list, approx_errors, a, b, og_a, og_b, good_zeros_tol, interval_data, root_tracker, tols, level, method)
+            if intervals is None:
+                intervals = get_subintervals(og_a, og_b, get_div_dirs(dim), interval_data, cheb_approx_list, approx_errors, True, split_policy)
+            for new_a, new_b in intervals:
+                subdivision_solve_nd(funcs, new_a, new_b, deg, target_deg, interval_data, root_tracker, tols, max_level, good_degs, level+1, method=method, trust_small_evals=trust_small_evals, use_target_tol=True, split_policy=split_policy, batch=batch)
+
+        if batch is None:
+            intervals = None
+            if method == 'svd':
+                intervals = solve_quadratic(coeffs, approx_errors, a, b, og_a, og_b, good_zeros_tol, interval_data, root_tracker, tols, level)
+            if intervals is None:
+                intervals = solve_macaulay(coeffs, approx_errors, a, b, og_a, og_b, good_zeros_tol, interval_data, root_tracker, tols, level, method)
+            finish(intervals)
+        else:
+            batch.add(coeffs, approx_errors, a, b, og_a, og_b, good_zeros_tol, level, finish)
+
+def solve_macaulay(coeffs, approx_errors, a, b, og_a, og_b, good_zeros_tol, interval_data, root_tracker, tols, level, method):
+    """Solves the approximations on an interval with the Macaulay matrix, or the resultant
+    if method is 'resultant', and stores the roots.
+
+    Parameters
+    ----------
+    coeffs : list
+        The trimmed approximations on the interval.
+    approx_errors : list
+        The approximation errors.
+    a : numpy array
+        The lower bound on the interval the approximations are on.
+    b : numpy array
+        The upper bound on the interval the approximations are on.
+    og_a : numpy array
+        The lower bound on the interval being solved.
+    og_b : numpy array
+        The upper bound on the interval being solved.
+    good_zeros_tol : float
+        How far outside of [-1,1] a root can be and still be kept.
+    interval_data : IntervalData
+        A class to run the subinterval checks and keep track of the solve progress
+    root_tracker : RootTracker
+        A class to keep track of the roots that are found.
+    tols : Tolerances
+        The tolerances to be used.
+    level : int
+        The current level of the recursion.
+    method : str
+        The method to use when reducing the Macaulay matrix, or 'resultant'.
+
+    Returns
+    -------
+    subintervals : list or None
+        No intervals if it was solved, or None if the Macaulay matrix was ill conditioned.
+    """
+    polys = [MultiCheb(coeff, lead_term = [coeff.shape[0]-1], clean_zeros = False) for coeff in coeffs]
+    # The condition numbers are only computed when the root records need them
+    if method == 'resultant':
+        res = Resultant.solve(polys, return_conds=root_tracker.track_conds, max_cond_num=tols.max_cond_num)
+        name = "Resultant"
+    else:
+        res = multiplication(polys, max_cond_num=tols.max_cond_num, method=method, return_conds=root_tracker.track_conds)
+        name = "Macaulay"
+    if isinstance(res, tuple):
         #check for a conditioning error
         if res[0] is None:
-            # Subdivide but run some checks on the intervals first
-            intervals = get_subintervals(og_a, og_b, get_div_dirs(dim), interval_data, cheb_approx_list, approx_errors, True)
-            for new_a, new_b in intervals:
-                subdivision_solve_nd(funcs, new_a, new_b, deg, target_deg, interval_data, root_tracker, tols, max_level, good_degs, level+1, method=method, trust_small_evals=trust_small_evals, use_target_tol=True)
+            return None
+        zeros, conds = res
+    else:
+        zeros, conds = res, np.full(len(res), np.nan)
+    store_macaulay_roots(zeros, conds, coeffs, approx_errors, a, b, og_a, og_b, good_zeros_tol, interval_data, root_tracker, level, name)
+    return []
+
+def solve_quadratic(coeffs, approx_errors, a, b, og_a, og_b, good_zeros_tol, interval_data, root_tracker, tols, level):
+    """Solves the approximations on an interval with quadratic_solve_2d, if they are two 2D
+    quadratics, and stores the roots.
+
+    Parameters
+    ----------
+    coeffs : list
+        The trimmed approximations on the interval.
+    approx_errors : list
+        The approximation errors.
+    a : numpy array
+        The lower bound on the interval the approximations are on.
+    b : numpy array
+        The upper bound on the interval the approximations are on.
+    og_a : numpy array
+        The lower bound on the interval being solved.
+    og_b : numpy array
+        The upper bound on the interval being solved.
+    good_zeros_tol : float
+        How far outside of [-1,1] a root can be and still be kept.
+    interval_data : IntervalData
+        A class to run the subinterval checks and keep track of the solve progress
+    root_tracker : RootTracker
+        A class to keep track of the roots that are found.
+    tols : Tolerances
+        The tolerances to be used.
+    level : int
+        The current level of the recursion.
+
+    Returns
+    -------
+    subintervals : list or None
+        No intervals if it was solved, or None if it couldn't be.
+    """
+    if len(coeffs) != 2 or any(coeff.shape != (3,3) for coeff in coeffs):
+        return None
+    zeros, solved = quadratic_solve_2d(coeffs[0][np.newaxis], coeffs[1][np.newaxis], tols.max_cond_num)
+    if not solved[0]:
+        return None
+    store_macaulay_roots(zeros[0], np.full(4, np.nan), coeffs, approx_errors, a, b, og_a, og_b, good_zeros_tol, interval_data, root_tracker, level, "Quadratic")
+    return []
+
+def store_macaulay_roots(zeros, conds, coeffs, approx_errors, a, b, og_a, og_b, good_zeros_tol, interval_data, root_tracker, level, method="Macaulay"):
+    """Stores the roots the Macaulay matrix, or another eigenvalue solver, found on an interval.
+
+    Parameters
+    ----------
+    zeros : numpy array
+        The roots of the approximations, on [-1,1].
+    conds : numpy array
+        The condition number of the eigenvalue each root came from.
+    coeffs : list
+        The trimmed approximations on the interval.
+    approx_errors : list
+        The approximation errors.
+    a : numpy array
+        The lower bound on the interval the approximations are on.
+    b : numpy array
+        The upper bound on the interval the approximations are on.
+    og_a : numpy array
+        The lower bound on the interval being solved.
+    og_b : numpy array
+        The upper bound on the interval being solved.
+    good_zeros_tol : float
+        How far outside of [-1,1] a root can be and still be kept.
+    interval_data : IntervalData
+        A class to run the subinterval checks and keep track of the solve progress
+    root_tracker : RootTracker
+        A class to keep track of the roots that are found.
+    level : int
+        The current level of the recursion.
+    method : str
+        The name to track the interval and the roots with.
+    """
+    dim = len(a)
+    zeros, mask = good_zeros_nd(zeros, good_zeros_tol, good_zeros_tol, return_mask=True)
+    conds = conds[mask]
+    bounds = root_bounds(coeffs, zeros, approx_errors, a, b, root_tracker)
+    cluster_tols = root_cluster_tol(a, b, approx_errors, coeffs, zeros)
+    zeros = transform(zeros, a, b)
+    zeros, mask = zeros_in_interval(zeros, og_a, og_b, dim, return_mask=True)
+    interval_data.track_interval(method, [a, b])
+    root_tracker.add_roots(zeros, a, b, method, cluster_tols[mask], level, np.sum(approx_errors), conds[mask], bounds[mask])
+
+class MacaulayBatch:
+    """Collects the intervals that are solved with the Macaulay matrix, so that
+    the systems with the same shapes can be solved together with
+    multiplication_batch, or quadratic_solve_2d for pairs of 2D quadratics.
+
+    Each interval is added with a function that finishes solving it. That is
+    called with no intervals once its roots are stored, or with None if its
+    Macaulay matrix was too ill conditioned, to fall back and subdivide.
+
+    Parameters
+    ----------
+    batch_size : int
+        How many systems to collect before solving them.
+    tols : Tolerances
+        The tolerances to be used.
+    interval_data : IntervalData
+        A class to run the subinterval checks and keep track of the solve progress
+    root_tracker : RootTracker
+        A class to keep track of the roots that are found.
+    """
+    def __init__(self, batch_size, tols, interval_data, root_tracker):
+        self.batch_size = batch_size
+        self.tols = tols
+        self.interval_data = interval_data
+        self.root_tracker = root_tracker
+        self.groups = dict()
+        self.solving = False
+
+    def add(self, coeffs, approx_errors, a, b, og_a, og_b, good_zeros_tol, level, finish):
+        """Adds a system to solve, solving its group if it is full.
+
+        Parameters
+        ----------
+        coeffs : list
+            The trimmed approximations on the interval.
+        approx_errors : list
+            The approximation errors.
+        a : numpy array
+            The lower bound on the interval the approximations are on.
+        b : numpy array
+            The upper bound on the interval the approximations are on.
+        og_a : numpy array
+            The lower bound on the interval being solved.
+        og_b : numpy array
+            The upper bound on the interval being solved.
+        good_zeros_tol : float
+            How far outside of [-1,1] a root can be and still be kept.
+        level : int
+            The current level of the recursion.
+        finish : function
+            Finishes solving the interval.
+        """
+        shapes = tuple(coeff.shape for coeff in coeffs)
+        group = self.groups.setdefault(shapes, [])
+        group.append((coeffs, approx_errors, a, b, og_a, og_b, good_zeros_tol, level, finish))
+        # Solving a group can add more systems, which wait until that is done.
+        if len(group) >= self.batch_size and not self.solving:
+            self.solving = True
+            self.solve_group(shapes)
+            self.solving = False
+
+    def solve_group(self, shapes):
+        """Solves the systems of a group and finishes their intervals.
+
+        Parameters
+        ----------
+        shapes : tuple
+            The shapes of the coefficient tensors of the group.
+        """
+        group = self.groups.pop(shapes)
+        stacks = [np.array(coeffs) for coeffs in zip(*[system[0] for system in group])]
+        if shapes == ((3,3), (3,3)):
+            quadratic_roots, solved = quadratic_solve_2d(*stacks, self.tols.max_cond_num)
+            for system, zeros in zip([group[i] for i in np.flatnonzero(solved)], quadratic_roots[solved]):
+                coeffs, approx_errors, a, b, og_a, og_b, good_zeros_tol, level, finish = system
+                store_macaulay_roots(zeros, np.full(4, np.nan), coeffs, approx_errors, a, b, og_a, og_b, good_zeros_tol, self.interval_data, self.root_tracker, level, "Quadratic")
+                finish([])
+            group = [group[i] for i in np.flatnonzero(~solved)]
+            if len(group) == 0:
+                return
+            stacks = [stack[~solved] for stack in stacks]
+        roots, conds = multiplication_batch(stacks, self.tols.max_cond_num)
+        for system, zeros, zero_conds in zip(group, roots, conds):
+            coeffs, approx_errors, a, b, og_a, og_b, good_zeros_tol, level, finish = system
+            if zeros is None:
+                finish(None)
+            else:
+                store_macaulay_roots(zeros, zero_conds, coeffs, approx_errors, a, b, og_a, og_b, good_zeros_tol, self.interval_data, self.root_tracker, level)
+                finish([])
+
+    def flush(self):
+        """Solves all the systems left, including any added while doing so."""
+        self.solving = True
+        while self.groups:
+            self.solve_group(next(iter(self.groups)))
+        self.solving = False
+
+def solve_unique_root(coeffs, approx_errors, a, b, og_a, og_b, interval_data, root_tracker, level):
+    """Solves the approximations on an interval with unique_root_solve and stores the root.
+
+    Parameters
+    ----------
+    coeffs : list
+        The trimmed approximations on the interval.
+    approx_errors : list
+        The approximation errors.
+    a : numpy array
+        The lower bound on the interval the approximations are on.
+    b : numpy array
+        The upper bound on the interval the approximations are on.
+    og_a : numpy array
+        The lower bound on the interval being solved.
+    og_b : numpy array
+        The upper bound on the interval being solved.
+    interval_data : IntervalData
+        A class to run the subinterval checks and keep track of the solve progress
+    root_tracker : RootTracker
+        A class to keep track of the roots that are found.
+    level : int
+        The current level of the recursion.
+
+    Returns
+    -------
+    subintervals : list or None
+        No intervals if it was solved, or None if it couldn't be.
+    """
+    zeros = unique_root_solve(coeffs, approx_errors)
+    if zeros is None:
+        return None
+    dim = len(a)
+    bounds = root_bounds(coeffs, zeros, approx_errors, a, b, root_tracker)
+    cluster_tols = root_cluster_tol(a, b, approx_errors, coeffs, zeros)
+    zeros = transform(zeros, a, b)
+    zeros, mask = zeros_in_interval(zeros, og_a, og_b, dim, return_mask=True)
+    interval_data.track_interval("Newton", [a, b])
+    root_tracker.add_roots(zeros, a, b, "Newton", cluster_tols[mask], level, np.sum(approx_errors), bounds=bounds[mask])
+    return []
+
+def solve_fallbacks(coeffs, cheb_approx_list, approx_errors, a, b, og_a, og_b, good_zeros_tol, interval_data, root_tracker, tols, level, method):
+    """Tries the fallbacks in interval_data on an interval whose Macaulay matrix is ill
+    conditioned, in the order interval_data.fallback_order expects to solve it for the least
+    cost, and stops at the first one that works. The fallbacks are
+
+    'cluster' : Cut out a cluster of roots around a multiple root with solve_cluster.
+    'newton' : Find the only root with unique_root_solve, if the system is one to one.
+    'svd', 'qrt', 'tvb', 'sparse' : Reduce the Macaulay matrix with another method. The one the
+        solve already used is skipped.
+    'resultant' : Solve with the Chebyshev-Bezout resultant, in 2D.
+
+    Parameters
+    ----------
+    coeffs : list
+        The trimmed approximations on the interval.
+    cheb_approx_list : list
+        The approximations on the interval, used in the subinterval checks.
+    approx_errors : list
+        The approximation errors.
+    a : numpy array
+        The lower bound on the interval the approximations are on.
+    b : numpy array
+        The upper bound on the interval the approximations are on.
+    og_a : numpy array
+        The lower bound on the interval being solved.
+    og_b : numpy array
+        The upper bound on the interval being solved.
+    good_zeros_tol : float
+        How far outside of [-1,1] a root can be and still be kept.
+    interval_data : IntervalData
+        A class to run the subinterval checks and keep track of the solve progress
+    root_tracker : RootTracker
+        A class to keep track of the roots that are found.
+    tols : Tolerances
+        The tolerances to be used.
+    level : int
+        The current level of the recursion.
+    method : str
+        The method the Macaulay matrix was reduced with.
+
+    Returns
+    -------
+    subintervals : list or None
+        The intervals left to solve, or None if no fallback worked.
+    """
+    fallback_order = interval_data.fallback_order
+    work = sum(coeff.size for coeff in coeffs)
+    for fallback_num in tuple(fallback_order.order):
+        fallback = interval_data.fallbacks[fallback_num]
+        if fallback == method:
+            continue
+        start = time.perf_counter()
+        if fallback == 'cluster':
+            intervals = solve_cluster(coeffs, cheb_approx_list, approx_errors, a, b, og_a, og_b, interval_data, root_tracker, level)
+        elif fallback == 'newton':
+            intervals = solve_unique_root(coeffs, approx_errors, a, b, og_a, og_b, interval_data, root_tracker, level)
         else:
-            zeros = res
-            zeros = good_zeros_nd(zeros, good_zeros_tol, good_zeros_tol)
-            zeros = transform(zeros, a, b)
-            zeros = zeros_in_interval(zeros, og_a, og_b, dim)
-            interval_data.track_interval("Macaulay", [a, b])
-            root_tracker.add_roots(zeros, a, b, "Macaulay")
+            intervals = solve_macaulay(coeffs, approx_errors, a, b, og_a, og_b, good_zeros_tol, interval_data, root_tracker, tols, level, fallback)
+        fallback_order.record(fallback_num, time.perf_counter() - start, work, intervals is not None)
+        if intervals is not None:
+            return intervals
+    return None
+
+def single_root_solve(coeffs, max_iter=50):
+    """Finds the root of a 2D system of Chebyshev polynomials on [-1,1]^2 known to have exactly one
+    root there, using Newton's method started at the center of the box.
+
+    Parameters
+    ----------
+    coeffs : list
+        The coefficient matrices of the two polynomials.
+    max_iter : int
+        The maximum number of Newton steps.
+
+    Returns
+    -------
+    zero : numpy array or None
+        A 1x2 array holding the root, or None if Newton's method didn't converge.
+    """
+    derivs = [[cheb.chebder(coeff, axis=j) if coeff.shape[j] > 1 else np.zeros((1,1)) for j in range(2)] for coeff in coeffs]
+    x = np.zeros(2)
+    for _ in range(max_iter):
+        f = np.array([cheb.chebval2d(x[0], x[1], coeff) for coeff in coeffs])
+        jac = np.array([[cheb.chebval2d(x[0], x[1], deriv) for deriv in row] for row in derivs])
+        step = np.linalg.solve(jac, f)
+        # The root is in the box, so keep the iterates there
+        new_x = np.clip(x - step, -1, 1)
+        if np.all(np.abs(new_x - x) <= 1.e-14):
+            return new_x.reshape(1,2)
+        x = new_x
+    return None
+
+@memoize
+def second_derivative_weights(shape):
+    """Bounds on the second partial derivatives of the Chebyshev basis on [-1,1]^n.
+
+    Uses |T_k'| <= k^2 and |T_k''| <= k^2(k^2-1)/3 on [-1,1].
+
+    Parameters
+    ----------
+    shape : tuple
+        The shape of the coefficient array.
+
+    Returns
+    -------
+    weights : numpy array
+        Array of the shape of the coefficients, holding for each basis function
+        the sum over j and k of the bounds on its second partial derivative in
+        x_j and x_k.
+    """
+    degs = np.indices(shape).astype(float)
+    first = degs**2
+    second = degs**2*(degs**2 - 1)/3
+    total = np.sum(first, axis=0)
+    return np.sum(second, axis=0) + total**2 - np.sum(first**2, axis=0)
+
+def chebval_nd(x, coeff):
+    """Evaluates a Chebyshev polynomial at a point.
+
+    Parameters
+    ----------
+    x : numpy array
+        The point.
+    coeff : numpy array
+        The coefficients of the polynomial, with one axis per coordinate.
+
+    Returns
+    -------
+    chebval_nd : float
+        The value of the polynomial at x.
+    """
+    for xi in x:
+        coeff = cheb.chebval(xi, coeff)
+    return coeff
+
+def certify_roots(coeffs, zeros, errors):
+    """Bounds how far each approximate root is from a root of the functions with a
+    Kantorovich-type test on the Chebyshev approximations.
+
+    The functions are f = p + d with |d_i| <= errors[i] on [-1,1]^n. With A the
+    computed inverse of the Jacobian J of p at x, T(y) = y - A f(y) maps the ball of
+    radius r around x into itself if eta + rho*r + beta*K*r^2/2 <= r, where
+    beta = ||A||, rho = ||I - A J||, eta = ||A p(x)|| + || |A| errors || and K
+    is a Lipschitz constant of the Jacobian on [-1,1]^n found from the
+    coefficients. By Brouwer's theorem the functions then have a root in the ball,
+    as long as it is inside [-1,1]^n, where the bounds hold. The rounding error
+    of evaluating p is added to the errors. This shows a root exists, not that it
+    is unique. All norms are inf norms.
+
+    Parameters
+    ----------
+    coeffs : list
+        The coefficient arrays of the approximations on [-1,1]^n.
+    zeros : numpy array
+        The approximate roots on [-1,1]^n, one per row.
+    errors : list
+        The approximation errors of the functions.
+
+    Returns
+    -------
+    bounds : numpy array
+        The bound on the distance to the root for each approximate root, or inf
+        if the test fails.
+    """
+    dim = len(coeffs)
+    zeros = np.reshape(zeros, (-1, dim))
+    bounds = np.full(len(zeros), np.inf)
+    if len(zeros) == 0:
+        return bounds
+    derivs = [[cheb.chebder(coeff, axis=j) if coeff.shape[j] > 1 else np.zeros([1]*dim) for j in range(dim)] for coeff in coeffs]
+    lipschitz = max(np.sum(np.abs(coeff)*second_derivative_weights(coeff.shape)) for coeff in coeffs)
+    errors = np.broadcast_to(errors, dim) + 10*macheps*np.array([np.sum(np.abs(coeff)) for coeff in coeffs])
+    for i, zero in enumerate(zeros):
+        vals = np.array([chebval_nd(zero, coeff) for coeff in coeffs])
+        jac = np.array([[chebval_nd(zero, deriv) for deriv in row] for row in derivs])
+        try:
+            jac_inv = np.linalg.inv(jac)
+        except np.linalg.LinAlgError:
+            continue
+        beta = np.linalg.norm(jac_inv, np.inf)
+        rho = np.linalg.norm(np.eye(dim) - jac_inv@jac, np.inf)
+        eta = np.linalg.norm(jac_inv@vals, np.inf) + np.max(np.abs(jac_inv)@errors)
+        if rho >= 1:
+            continue
+        if lipschitz == 0:
+            radius = eta/(1 - rho)
+        elif (1 - rho)**2 >= 2*beta*lipschitz*eta:
+            radius = 2*eta/((1 - rho) + np.sqrt((1 - rho)**2 - 2*beta*lipschitz*eta))
+        else:
+            continue
+        # The bounds only hold on [-1,1]^n
+        if np.all(np.abs(zero) + radius <= 1):
+            bounds[i] = radius
+    return bounds
+
+def root_bounds(coeffs, zeros, errors, a, b, root_tracker):
+    """The certify_roots bounds of the roots found on [a,b], scaled to the interval, if the root
+    tracker keeps them.
+
+    Parameters
+    ----------
+    coeffs : list
+        The coefficient arrays of the approximations on [-1,1]^n.
+    zeros : numpy array
+        The approximate roots on [-1,1]^n.
+    errors : list
+        The approximation errors of the functions.
+    a : numpy array
+        The lower bound on the interval.
+    b : numpy array
+        The upper bound on the interval.
+    root_tracker : RootTracker
+        The root tracker the roots will be added to.
+
+    Returns
+    -------
+    bounds : numpy array
+        The bound for each root, or inf if they aren't needed.
+    """
+    if not root_tracker.track_bounds:
+        return np.full(len(zeros), np.inf)
+    return certify_roots(coeffs, zeros, errors)*np.max(b - a)/2
+
+def center_jacobian_bounds(coeffs):
+    """The inverse of the Jacobian of a system of Chebyshev polynomials at the center of
+    [-1,1]^n, and the Lipschitz constant of the Jacobian on [-1,1]^n in the inf norm.
+
+    When ||J(0)^-1|| times the Lipschitz constant is below 1, J(0)^-1 J(x) is within
+    distance 1 of the identity on the whole box, so the Jacobian is never singular and the
+    system is one to one on the box.
+
+    Parameters
+    ----------
+    coeffs : list
+        The coefficient arrays of the polynomials.
+
+    Returns
+    -------
+    jac_inv : numpy array or None
+        The inverse of the Jacobian at 0, or None if it is singular.
+    lipschitz : float
+        The Lipschitz constant of the Jacobian.
+    """
+    dim = len(coeffs)
+    jac = np.array([[chebval_nd(np.zeros(dim), cheb.chebder(coeff, axis=j)) for j in range(dim)] for coeff in coeffs])
+    lipschitz = max(np.sum(np.abs(coeff)*second_derivative_weights(coeff.shape)) for coeff in coeffs)
+    try:
+        return np.linalg.inv(jac), lipschitz
+    except np.linalg.LinAlgError:
+        return None, lipschitz
+
+def unique_root_solve(coeffs, errors, max_iter=50):
+    """Solves a system of Chebyshev polynomials on [-1,1]^n that is one to one on the box,
+    so it has at most one root there.
+
+    With beta = ||J(0)^-1|| and K the Lipschitz constant of the Jacobian, the system is one
+    to one if beta*K < 1 (see center_jacobian_bounds). Taylor's theorem then puts any point
+    of the box where the functions are within the approximation error of 0 within
+    beta*(K/2 + max(errors)) of the Newton step from 0, so if that step lands farther than
+    this outside the box there is no root. Otherwise Newton's method is run from the center,
+    and if it converges in the box the root it finds is the only one.
+
+    Parameters
+    ----------
+    coeffs : list
+        The coefficient arrays of the approximations on [-1,1]^n.
+    errors : list
+        The approximation errors of the functions.
+    max_iter : int
+        The maximum number of Newton steps.
+
+    Returns
+    -------
+    zeros : numpy array or None
+        An array with a row for the root, with no rows if there isn't one, or None if it
+        couldn't be decided.
+    """
+    dim = len(coeffs)
+    jac_inv, lipschitz = center_jacobian_bounds(coeffs)
+    if jac_inv is None:
+        return None
+    beta = np.linalg.norm(jac_inv, np.inf)
+    if beta*lipschitz >= 1:
+        return None
+    x = -jac_inv@np.array([chebval_nd(np.zeros(dim), coeff) for coeff in coeffs])
+    if np.max(np.abs(x)) - 1 > beta*(lipschitz/2 + np.max(errors)):
+        return np.zeros((0, dim))
+
+    derivs = [[cheb.chebder(coeff, axis=j) if coeff.shape[j] > 1 else np.zeros([1]*dim) for j in range(dim)] for coeff in coeffs]
+    for _ in range(max_iter):
+        if np.any(np.abs(x) > 2):
+            return None
+        vals = np.array([chebval_nd(x, coeff) for coeff in coeffs])
+        jac = np.array([[chebval_nd(x, deriv) for deriv in row] for row in derivs])
+        try:
+            step = np.linalg.solve(jac, vals)
+        except np.linalg.LinAlgError:
+            return None
+        x = x - step
+        if np.linalg.norm(step, np.inf) <= 1.e-14:
+            break
+    else:
+        return None
+    if np.any(np.abs(x) > 1):
+        return None
+    return x[np.newaxis]
+
+def quadratic_solve_2d(coeffs1, coeffs2, max_cond):
+    """Finds the common roots of many pairs of 2D Chebyshev quadratics at once, in closed form.
+
+    In the power basis each quadratic is p2 x^2 + p1(y) x + p0(y). Their resultant in x,
+    (p2 q0 - q2 p0)^2 - (p2 q1 - q2 p1)(p1 q0 - q1 p0), is a quartic in y whose roots are the
+    eigenvalues of its companion matrix. q2 f - p2 g is linear in x, which gives x at each of
+    them. The roots are then polished with two Newton steps. A system isn't solved if the
+    quartic loses degree (a root at infinity), or if the slope of the linear combination in x
+    at a root is small next to the coefficients it is made from (two roots with the same y),
+    to within 1/max_cond. It also isn't solved if f or g isn't small at a polished root, next
+    to the sizes of their terms there.
+
+    Parameters
+    ----------
+    coeffs1 : (k,3,3) numpy array
+        The Chebyshev coefficients of the first quadratic of each system.
+    coeffs2 : (k,3,3) numpy array
+        The Chebyshev coefficients of the second quadratic of each system.
+    max_cond : float
+        How ill conditioned a system can be and still be solved.
+
+    Returns
+    -------
+    zeros : (k,4,2) numpy array
+        The four complex roots of each system.
+    solved : (k,) numpy array
+        Whether each system was solved.
+    """
+    def power_coeffs(c):
+        # The coefficients of 1, x, y, x^2, xy, y^2, using T_2(t) = 2t^2 - 1
+        return c[:,0,0] - c[:,2,0] - c[:,0,2], c[:,1,0], c[:,0,1], 2*c[:,2,0], c[:,1,1], 2*c[:,0,2]
+
+    def mult(u, v):
+        # Multiplies polynomials in y with coefficients in increasing order along the last axis
+        prod = np.zeros((len(u), u.shape[1] + v.shape[1] - 1))
+        for i in range(u.shape[1]):
+            prod[:,i:i+v.shape[1]] += u[:,i:i+1]*v
+        return prod
+
+    a0, a1, a2, a3, a4, a5 = power_coeffs(coeffs1)
+    b0, b1, b2, b3, b4, b5 = power_coeffs(coeffs2)
+    f0, f1 = np.stack([a0, a2, a5], axis=1), np.stack([a1, a4], axis=1)
+    g0, g1 = np.stack([b0, b2, b5], axis=1), np.stack([b1, b4], axis=1)
+    lin0 = a3[:,np.newaxis]*g0 - b3[:,np.newaxis]*f0
+    lin1 = a3[:,np.newaxis]*g1 - b3[:,np.newaxis]*f1
+    resultant = mult(lin0, lin0) - mult(lin1, mult(f1, g0) - mult(g1, f0))
+
+    num = len(resultant)
+    solved = np.abs(resultant[:,4])*max_cond > np.max(np.abs(resultant), axis=1)
+    companion = np.zeros((num, 4, 4))
+    companion[:,1:,:-1] = np.eye(3)
+    companion[solved,:,-1] = -resultant[solved,:4]/resultant[solved,4:]
+    y = np.linalg.eigvals(companion)
+    # The slope is a3 g1(y) - b3 f1(y), which cancels when f and g have the same
+    # x^2 and x terms up to scaling, so it is compared with the sizes of f and g.
+    f_norm = np.linalg.norm(np.stack([a0, a1, a2, a3, a4, a5]), axis=0)
+    g_norm = np.linalg.norm(np.stack([b0, b1, b2, b3, b4, b5]), axis=0)
+    slope = lin1[:,:1] + lin1[:,1:]*y
+    slope_scale = (np.abs(a3)*g_norm + np.abs(b3)*f_norm)[:,np.newaxis]*(1 + np.abs(y))
+    solved &= np.all(np.abs(slope)*max_cond > slope_scale, axis=1)
+
+    def terms(c, x, y):
+        # The terms of the quadratic with power coefficients c at x and y
+        return [ci[:,np.newaxis]*term for ci, term in zip(c, [np.ones_like(x), x, y, x**2, x*y, y**2])]
+
+    with np.errstate(all='ignore'):
+        x = -(lin0[:,:1] + lin0[:,1:2]*y + lin0[:,2:]*y**2)/slope
+
+        for _ in range(2):
+            f = sum(terms((a0, a1, a2, a3, a4, a5), x, y))
+            g = sum(terms((b0, b1, b2, b3, b4, b5), x, y))
+            fx = a1[:,np.newaxis] + 2*a3[:,np.newaxis]*x + a4[:,np.newaxis]*y
+            fy = a2[:,np.newaxis] + a4[:,np.newaxis]*x + 2*a5[:,np.newaxis]*y
+            gx = b1[:,np.newaxis] + 2*b3[:,np.newaxis]*x + b4[:,np.newaxis]*y
+            gy = b2[:,np.newaxis] + b4[:,np.newaxis]*x + 2*b5[:,np.newaxis]*y
+            det = fx*gy - fy*gx
+            step = det != 0
+            x = np.where(step, x - (f*gy - g*fy)/det, x)
+            y = np.where(step, y - (g*fx - f*gx)/det, y)
+
+        # The polished roots have to be roots, to about the rounding error of evaluating f and g
+        for c in [(a0, a1, a2, a3, a4, a5), (b0, b1, b2, b3, b4, b5)]:
+            values = terms(c, x, y)
+            solved &= np.all(np.abs(sum(values)) <= 1.e3*macheps*sum(np.abs(value) for value in values), axis=1)
+    solved &= np.all(np.isfinite(x) & np.isfinite(y), axis=1)
+    return np.stack([x, y], axis=-1), solved
+
+def cluster_derivatives(coeffs):
+    """Stacks the Chebyshev polynomials with their first and second partial
+    derivatives so they can all be evaluated at once with chebval_nd.
+
+    Parameters
+    ----------
+    coeffs : list
+        The coefficient arrays of the polynomials.
+
+    Returns
+    -------
+    polys : numpy array
+        The coefficients, zero padded to the same shape, with two extra axes.
+        polys[...,i,0] is the ith polynomial, polys[...,i,1+j] its derivative in
+        x_j and polys[...,i,1+dim+dim*j+k] its derivative in x_j and x_k.
+    """
+    dim = len(coeffs)
+    size = max(coeff.shape[0] for coeff in coeffs)
+    polys = np.zeros((size,)*dim + (dim, 1 + dim + dim**2))
+    def put(coeff, i, spot):
+        if coeff.size > 0:
+            polys[tuple(slice(0, n) for n in coeff.shape) + (i, spot)] = coeff
+    for i, coeff in enumerate(coeffs):
+        put(coeff, i, 0)
+        for j in range(dim):
+            deriv = cheb.chebder(coeff, axis=j)
+            put(deriv, i, 1 + j)
+            for k in range(dim):
+                put(cheb.chebder(deriv, axis=k), i, 1 + dim + dim*j + k)
+    return polys
+
+def cluster_solve(coeffs, errors, max_iter=50):
+    """Finds a singular root of a system of Chebyshev polynomials on [-1,1]^n,
+    along with the radius of the cluster of roots around it.
+
+    Near a multiple root the Jacobian is singular, so Newton's method converges
+    slowly and the Macaulay matrix is ill conditioned. Instead this solves the
+    deflated system p(x) = 0, J(x)v = 0, c.v = 1 with Gauss-Newton, starting
+    from the center of the box and the centers of its quadrants. The deflated
+    system is regular at a double root, and Gauss-Newton still converges
+    linearly at higher multiplicities. It isn't run if the Jacobian can't be
+    singular on the box, which holds when ||J(0)^-1|| times the Lipschitz
+    constant of the Jacobian is below 1. The point is a singular root if the
+    polynomials are within 10 times the approximation error there and J(x)v is
+    below the cluster tolerance below.
+
+    A multiple root can only be found to about half the digits the functions
+    are known to, so the cluster is the box around the root where the
+    polynomials are below the geometric mean of the approximation error and
+    their size. Its radius is the first power of 2 where they are above it in
+    both directions along the null vector, or 1 if the whole box is in the
+    cluster.
+
+    Parameters
+    ----------
+    coeffs : list
+        The coefficient arrays of the approximations on [-1,1]^n.
+    errors : list
+        The approximation errors of the functions.
+    max_iter : int
+        The maximum number of Gauss-Newton steps from each start.
+
+    Returns
+    -------
+    zero : numpy array or None
+        The singular root, or None if none was found.
+    radius : float
+        The radius of the cluster.
+    """
+    dim = len(coeffs)
+    jac_inv, lipschitz = center_jacobian_bounds(coeffs)
+    if jac_inv is not None and np.linalg.norm(jac_inv, np.inf)*lipschitz < 1:
+        return None, 0
+
+    polys = cluster_derivatives(coeffs)
+    error = np.sum(errors)
+    cluster_tol = np.sqrt(error*max(np.sum(np.abs(coeff)) for coeff in coeffs))
+    def evaluate(x):
+        vals = chebval_nd(x, polys)
+        return vals[:,0], vals[:,1:1+dim], vals[:,1+dim:].reshape(dim, dim, dim)
+
+    starts = [np.zeros(dim)] + [np.array(corner)/2 for corner in product([-1, 1], repeat=dim)]
+    for x in starts:
+        vals, jac, hess = evaluate(x)
+        v = np.linalg.svd(jac)[2][-1]
+        c = v.copy()
+        for _ in range(max_iter):
+            system = np.concatenate([vals, jac@v, [c@v - 1]])
+            system_jac = np.zeros((2*dim + 1, 2*dim))
+            system_jac[:dim,:dim] = jac
+            system_jac[dim:2*dim,:dim] = np.einsum('ijk,j->ik', hess, v)
+            system_jac[dim:2*dim,dim:] = jac
+            system_jac[2*dim,dim:] = c
+            step = np.linalg.lstsq(system_jac, system, rcond=None)[0]
+            x = x - step[:dim]
+            v = v - step[dim:]
+            if np.any(np.abs(x) > 2):
+                break
+            vals, jac, hess = evaluate(x)
+            if np.linalg.norm(step) <= 1.e-14:
+                break
+        if np.any(np.abs(x) > 1) or np.max(np.abs(vals)) > 10*error or np.max(np.abs(jac@v)) > cluster_tol:
+            continue
+        v = v/np.linalg.norm(v, np.inf)
+        for radius in 2.**np.arange(-52, 0):
+            if min(np.max(np.abs(evaluate(x + sign*radius*v)[0])) for sign in [-1, 1]) >= cluster_tol:
+                return x, radius
+        return x, 1.
+    return None, 0
+
+def cluster_subintervals(a, b, lower, upper):
+    """Splits the box [a,b] into the 3^n boxes cut out by a box inside it and
+    returns all of them but the inner box.
+
+    Parameters
+    ----------
+    a : numpy array
+        The lower bound on the interval.
+    b : numpy array
+        The upper bound on the interval.
+    lower : numpy array
+        The lower bound on the inner box.
+    upper : numpy array
+        The upper bound on the inner box.
+
+    Returns
+    -------
+    subintervals : list
+        Each element of the list is a tuple containing an a and b, the lower and upper bounds of the interval.
+    """
+    cuts = [[(a_, l), (l, u), (u, b_)] for a_, b_, l, u in zip(a, b, lower, upper)]
+    subintervals = []
+    for pieces in product(*cuts):
+        if all(piece == cut[1] for piece, cut in zip(pieces, cuts)):
+            continue
+        sub_a, sub_b = np.array(pieces).T
+        if np.all(sub_b > sub_a):
+            subintervals.append((sub_a, sub_b))
+    return subintervals
+
+def cluster_holds_all_roots(coeffs, zero, radius=1., width=.125):
+    """Checks that every root of a system of Chebyshev polynomials in the box of the given radius
+    around a singular root is close to the line through it along the null vector of its Jacobian.
+
+    For a root y in the box, p(y) = p(x) + J(y-x) + R with |R| <= 2Kr^2, where K is the Lipschitz
+    constant of the Jacobian on [-1,1]^n and r is the radius. Writing y - x = tv + w with w
+    orthogonal to the null vector v, this gives |w| <= sqrt(n)(|p(x)| + 2Kr^2 + 2r s_1)/s_2, where
+    s_1 and s_2 are the two smallest singular values of J. So when that is small next to r, the
+    only roots in the box are the ones along the line, in the cluster. The bound shrinks like r^2,
+    so it holds on a small enough box around any root where s_2 isn't 0.
+
+    Parameters
+    ----------
+    coeffs : list
+        The coefficient arrays of the approximations on [-1,1]^n.
+    zero : numpy array
+        The singular root.
+    radius : float
+        The radius of the box around the root to check.
+    width : float
+        How far from the line the roots can be, as a fraction of the radius.
+
+    Returns
+    -------
+    cluster_holds_all_roots : bool
+        Whether every root in the box is within width*radius of the line.
+    """
+    dim = len(coeffs)
+    if dim < 2:
+        return False
+    vals = np.array([chebval_nd(zero, coeff) for coeff in coeffs])
+    jac = np.array([[chebval_nd(zero, cheb.chebder(coeff, axis=j)) if coeff.shape[j] > 1 else 0. for j in range(dim)] for coeff in coeffs])
+    lipschitz = max(np.sum(np.abs(coeff)*second_derivative_weights(coeff.shape)) for coeff in coeffs)
+    singular_values = np.linalg.svd(jac, compute_uv=False)
+    if singular_values[-2] == 0:
+        return False
+    distance = np.sqrt(dim)*(np.max(np.abs(vals)) + 2*lipschitz*radius**2 + 2*radius*singular_values[-1])/singular_values[-2]
+    return distance <= width*radius
+
+def solve_cluster(coeffs, cheb_approx_list, approx_errors, a, b, og_a, og_b, interval_data, root_tracker, level):
+    """Looks for a cluster of roots in an interval with cluster_solve.
+
+    If the cluster fills the interval, its root is stored for the largest box around it, of radius
+    a power of 2, where cluster_holds_all_roots shows there are no other roots, and the rest of the
+    interval is left to solve. If the cluster is smaller, the interval is split into the box around
+    the cluster and the boxes around that, so the cluster box keeps being searched at a finer scale.
+
+    Parameters
+    ----------
+    coeffs : list
+        The trimmed approximations on the interval.
+    cheb_approx_list : list
+        The approximations on the interval, used in the subinterval checks.
+    approx_errors : list
+        The approximation errors.
+    a : numpy array
+        The lower bound on the interval the approximations are on.
+    b : numpy array
+        The upper bound on the interval the approximations are on.
+    og_a : numpy array
+        The lower bound on the interval being solved.
+    og_b : numpy array
+        The upper bound on the interval being solved.
+    interval_data : IntervalData
+        A class to run the subinterval checks and keep track of the solve progress
+    root_tracker : RootTracker
+        A class to keep track of the roots that are found.
+    level : int
+        The current level of the recursion.
+
+    Returns
+    -------
+    subintervals : list or None
+        The intervals left to solve, or None if there was no cluster, or it fills the interval
+        but no box around it could be shown to hold no other roots.
+    """
+    zero, radius = cluster_solve(coeffs, approx_errors)
+    if zero is None:
+        return None
+    holds_all_roots = radius == 1
+    if holds_all_roots:
+        for radius in 2.**np.arange(0, -27, -1):
+            if cluster_holds_all_roots(coeffs, zero, radius):
+                break
+        else:
+            return None
+    cluster_a, cluster_b = transform(np.array([zero - radius, zero + radius]), a, b)
+    cluster_a, cluster_b = np.maximum(cluster_a, og_a), np.minimum(cluster_b, og_b)
+    if holds_all_roots:
+        interval_data.track_interval("Cluster", [cluster_a, cluster_b])
+        root_tracker.add_roots(transform(zero[np.newaxis], a, b), cluster_a, cluster_b, "Cluster", np.max(cluster_b - cluster_a)/2, level, np.sum(approx_errors))
+    intervals = cluster_subintervals(og_a, og_b, cluster_a, cluster_b)
+    if not holds_all_roots and np.all(cluster_b > cluster_a):
+        intervals.append((cluster_a, cluster_b))
+    # Scale the same pieces to the interval the approximations are on
+    scaled_intervals = [(2*(sub_a - a)/(b - a) - 1, 2*(sub_b - a)/(b - a) - 1) for sub_a, sub_b in intervals]
+    return interval_data.check_subintervals(intervals, scaled_intervals, cheb_approx_list, approx_errors)
 
 @memoize
 def get_div_dirs(dim):
@@ -1081,7 +2350,7 @@ def good_zeros_1d(zeros, imag_tol, real_tol):
 
 def subdivision_solve_1d(f, a, b, deg, target_deg, interval_data, root_tracker,
                          tols, max_level, level=0, method='svd',
-                         trust_small_evals=False):
+                         trust_small_evals=False, split_policy='fixed'):
     """Finds the roots of a one-dimensional function using subdivision and
     chebyshev approximation.
 
@@ -1107,6 +2376,8 @@ def subdivision_solve_1d(f, a, b, deg, target_deg, interval_data, root_tracker,
         The maximum level for the recursion
     level : int
         The current level of the recursion.
+    split_policy : str
+        How to choose where to split intervals, 'fixed' or 'informed'.
 
     Returns
     -------
@@ -1118,9 +2389,11 @@ def subdivision_solve_1d(f, a, b, deg, target_deg, interval_data, root_tracker,
         interval_data.track_interval("Too Deep", [a, b])
         return
 
+    if at_resolution(a, b, deg):
+        interval_data.track_interval("Resolution", [a, b])
+        root_tracker.add_potential_roots((a + b)/2, a, b, "Resolution")
+        return
 
-    # Determine the point at which to subdivide the interval
-    RAND = 0.5139303900908738
     interval_data.print_progress()
 
     # Approximate the function using Chebyshev polynomials
@@ -1135,10 +2408,11 @@ def subdivision_solve_1d(f, a, b, deg, target_deg, interval_data, root_tracker,
 
     if error > allowed_error:
         # Subdivide the interval and recursively call the function.
-        div_spot = a + (b-a)*RAND
+        split = informed_split([coeff], [error])[0] if split_policy == 'informed' else RAND
+        div_spot = a + (b-a)*split
         good_deg = deg
-        subdivision_solve_1d(f, a, div_spot, good_deg, target_deg, interval_data, root_tracker, tols, max_level, level+1)
-        subdivision_solve_1d(f, div_spot, b, good_deg, target_deg, interval_data, root_tracker, tols, max_level, level+1)
+        subdivision_solve_1d(f, a, div_spot, good_deg, target_deg, interval_data, root_tracker, tols, max_level, level+1, split_policy=split_policy)
+        subdivision_solve_1d(f, div_spot, b, good_deg, target_deg, interval_data, root_tracker, tols, max_level, level+1, split_policy=split_policy)
     else:
         # Trim the coefficient array (reduce the degree) as much as we can.
         # This identifies a 'good degree' with which to approximate the function
@@ -1164,10 +2438,14 @@ def subdivision_solve_1d(f, a, b, deg, target_deg, interval_data, root_tracker,
 
         try:
             good_zeros_tol = max(tols.min_good_zeros_tol, error*tols.good_zeros_factor)
-            zeros = transform(good_zeros_1d(multCheb(coeff), good_zeros_tol, good_zeros_tol), a, b)
+            zeros = good_zeros_1d(multCheb(coeff), good_zeros_tol, good_zeros_tol)
+            bounds = root_bounds([coeff], zeros, [error], a, b, root_tracker)
+            cluster_tols = root_cluster_tol(a, b, error, [coeff], zeros)
+            zeros = transform(zeros, a, b)
             interval_data.track_interval("Macaulay", [a, b])
-            root_tracker.add_roots(zeros, a, b, "Macaulay")
+            root_tracker.add_roots(zeros, a, b, "Macaulay", cluster_tols, level, error, bounds=bounds)
         except (ConditioningError, TooManyRoots) as e:
-            div_spot = a + (b-a)*RAND
-            subdivision_solve_1d(f, a, div_spot, good_deg, target_deg, interval_data, root_tracker, tols, max_level, level+1)
-            subdivision_solve_1d(f, div_spot, b, good_deg, target_deg, interval_data, root_tracker, tols, max_level, level+1)
+            split = informed_split([coeff], [error])[0] if split_policy == 'informed' else RAND
+            div_spot = a + (b-a)*split
+            subdivision_solve_1d(f, a, div_spot, good_deg, target_deg, interval_data, root_tracker, tols, max_level, level+1, split_policy=split_policy)
+            subdivision_solve_1d(f, div_spot, b, good_deg, target_deg, interval_data, root_tracker, tols, max_level, level+1, split_policy=split_policy)
@@ -1,6 +1,7 @@
 # A collection of functions used in the F4 Macaulay and TVB solvers
 import numpy as np
 import itertools
+from collections import OrderedDict
 from scipy.linalg import qr, solve_triangular, svd, norm, eig, lu
 from scipy.special import comb
 import time
@@ -256,9 +257,7 @@ def row_swap_matrix(matrix):
            [0, 2, 0, 2],
            [0, 1, 3, 0]])
     '''
-    leading_mon_columns = list()
-    for row in matrix:
-        leading_mon_columns.append(np.where(row!=0)[0][0])
+    leading_mon_columns = np.argmax(matrix!=0, axis=1)
     return matrix[np.argsort(leading_mon_columns)]
 
 def get_var_list(dim):
@@ -933,6 +932,37 @@ def memoize(function):
             return val
     return decorated_function
 
+def lru_memoize(maxsize=128):
+    """Memoizes a function like memoize, but only keeps the maxsize most
+    recently used results, so it can be used on functions called with many
+    different arguments. numpy array arguments are keyed by their contents.
+
+    Parameters
+    ----------
+    maxsize : int
+        The most results to keep.
+
+    Returns
+    -------
+    decorator : function
+        Decorates the function to memoize.
+    """
+    def decorator(function):
+        cache = OrderedDict()
+        def decorated_function(*args):
+            key = tuple((arg.shape, arg.dtype.str, arg.tobytes()) if isinstance(arg, np.ndarray) else arg for arg in args)
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+            val = function(*args)
+            cache[key] = val
+            if len(cache) > maxsize:
+                cache.popitem(last=False)
+            return val
+        decorated_function.cache = cache
+        return decorated_function
+    return decorator
+
 memoized_arrays = memoize(arrays)
 slice_top = memoize(slice_top)
 
@@ -1315,6 +1345,84 @@ def isNumOrBool(x):
     """
     return isinstance(x, (int, float, complex, bool))
 
+class GrowableArray:
+    '''
+    A contiguous array that rows can be appended to. The buffer doubles in size when it fills up,
+    so appending is amortized constant time.
+
+    Attributes
+    ----------
+    data : numpy array
+        The buffer. Only the first size rows are in use.
+    size : int
+        The number of rows that have been appended.
+    values : numpy array
+        A view of the rows that have been appended. It is invalidated when the buffer grows.
+
+    Methods
+    -------
+    __init__
+        Initializes everything.
+    append
+        Appends a row.
+    extend
+        Appends several rows.
+    clear
+        Removes all the rows.
+    '''
+    def __init__(self, row_shape=(), dtype=float, capacity=16):
+        self.data = np.empty((capacity,) + tuple(row_shape), dtype=dtype)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def values(self):
+        return self.data[:self.size]
+
+    def _reserve(self, size):
+        ''' Makes sure the buffer can hold size rows.
+        '''
+        capacity = len(self.data)
+        if size > capacity:
+            capacity = max(capacity, 1)
+            while capacity < size:
+                capacity *= 2
+            data = np.empty((capacity,) + self.data.shape[1:], dtype=self.data.dtype)
+            data[:self.size] = self.data[:self.size]
+            self.data = data
+
+    def append(self, row):
+        ''' Appends a row.
+
+        Parameters
+        ----------
+        row : array-like
+            The row to append. Must broadcast to the row shape.
+        '''
+        self._reserve(self.size + 1)
+        self.data[self.size] = row
+        self.size += 1
+
+    def extend(self, rows):
+        ''' Appends several rows.
+
+        Parameters
+        ----------
+        rows : array-like
+            The rows to append, stacked along the first axis.
+        '''
+        rows = np.asarray(rows, dtype=self.data.dtype).reshape((-1,) + self.data.shape[1:])
+        self._reserve(self.size + len(rows))
+        self.data[self.size:self.size + len(rows)] = rows
+        self.size += len(rows)
+
+    def clear(self):
+        ''' Removes all the rows, keeping the buffer.
+        '''
+        self.size = 0
+
 class Tolerances:
     '''
     Class to track the tolerances being used in the subdivision solver.
@@ -1425,6 +1533,43 @@ def condeigs(A,w,v,condvec=False):
     if condvec: return cond[:,0],cond[:,1]
     else: return cond
 
+def condeigs_schur(T):
+    """Computes the condition numbers of the eigenvalues of a matrix from its
+    Schur form, without another factorization.
+
+    The right eigenvector of T for T[i,i] only has entries up to i and the left
+    eigenvector only has entries from i on, so both come from a triangular
+    solve. Scaled to be 1 at i, the condition number is the product of their
+    norms.
+
+    Parameters
+    ----------
+    T : (n,n) ndarray
+        Upper triangular Schur form of the matrix.
+
+    Returns
+    -------
+    cond : (n,) ndarray
+        The condition number of the eigenvalue T[i,i]. It is infinite for
+        repeated eigenvalues.
+    """
+    n = T.shape[0]
+    cond = np.empty(n)
+    for i in range(n):
+        eig = T[i,i]
+        x_norm, y_norm = 0, 0
+        with np.errstate(all='ignore'):
+            try:
+                if i > 0:
+                    x_norm = norm(solve_triangular(T[:i,:i]-eig*np.eye(i),-T[:i,i],check_finite=False))
+                if i < n-1:
+                    y_norm = norm(solve_triangular(T[i+1:,i+1:]-eig*np.eye(n-i-1),-T[i,i+1:].conj(),trans=2,check_finite=False))
+                cond[i] = np.sqrt((1+x_norm**2)*(1+y_norm**2))
+            except np.linalg.LinAlgError:
+                cond[i] = np.inf
+    cond[np.isnan(cond)] = np.inf
+    return cond
+
 def householder(x):
     """Given a vector x, computes a Householder reflector Q such that the first
     column of (Q^H)AQ is a multiple of e_1, whenever x is an eigenvector of A.